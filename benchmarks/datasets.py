@@ -0,0 +1,96 @@
+"""
+Synthetic source/target table pairs for the benchmarks.
+
+Values are derived arithmetically from the row number, so a dataset is cheap to build
+at 10M rows and identical for the same parameters. A seeded RNG picks which rows differ:
+a diff_rate fraction of the source rows is split evenly between rows missing in the
+target, rows with one changed value and extra rows that only exist in the target.
+"""
+import random
+
+COLUMN_TYPES = ["varchar(64)", "int(11)", "decimal(12,2)"]
+# Rows per shard when the table has a composite (shard, id) primary key
+SHARD_SIZE = 1000
+NULL_EVERY = 17
+
+def dataset_columns(width, composite_pk=False):
+    """Returns ([(name, mysql_type), ...], pk_columns) for a table with width value columns."""
+    pk = ["shard", "id"] if composite_pk else ["id"]
+    columns = [(c, "int(11)") for c in pk]
+    columns += [(f"c{i}", COLUMN_TYPES[i % len(COLUMN_TYPES)]) for i in range(width)]
+    return columns, pk
+
+def _key(n, composite_pk):
+    return (n // SHARD_SIZE, n % SHARD_SIZE) if composite_pk else (n,)
+
+def _value(n, i):
+    h = (n * 2654435761 + i * 40503) % 4294967291
+    if h % NULL_EVERY == 0:
+        return None
+    kind = i % len(COLUMN_TYPES)
+    if kind == 0:
+        return f"v{h:x}"
+    if kind == 1:
+        return h % 1000000
+    return (h % 1000000) / 100
+
+def _changed(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return value + "x"
+    return value + 1
+
+def generate_rows(side, rows, width, diff_rate=0.01, composite_pk=False, seed=0, counts=None):
+    """
+    Yields the row tuples of the "source" or "target" table, in PK order.
+    counts, if given, is filled with the expected diff sizes.
+    """
+    rng = random.Random(seed)
+    third = diff_rate / 3
+    extra = 0
+    if counts is not None:
+        counts.update({"missing_in_target": 0, "missing_in_source": 0, "values_different": 0})
+    for n in range(rows):
+        r = rng.random()
+        row = _key(n, composite_pk) + tuple(_value(n, i) for i in range(width))
+        if r < third:
+            if counts is not None:
+                counts["missing_in_target"] += 1
+            if side == "source":
+                yield row
+            continue
+        if r < 2 * third and width:
+            if counts is not None:
+                counts["values_different"] += 1
+            if side == "target":
+                pos = len(row) - width + n % width
+                row = row[:pos] + (_changed(row[pos]),) + row[pos + 1:]
+        elif r < diff_rate:
+            extra += 1
+        yield row
+    if counts is not None:
+        counts["missing_in_source"] = extra
+    if side == "target":
+        for n in range(rows, rows + extra):
+            yield _key(n, composite_pk) + tuple(_value(n, i) for i in range(width))
+
+def build_dataset(
+    src_server, tgt_server, source_db, target_db, table, rows,
+    width=10, diff_rate=0.01, composite_pk=False, seed=0
+):
+    """
+    Creates table in source_db on src_server and in target_db on tgt_server and loads them.
+    Returns the expected diff counts.
+    """
+    columns, pk = dataset_columns(width, composite_pk)
+    col_names = [c[0] for c in columns]
+    indexes = {"idx_c1": (["c1"], False)} if width > 1 else {}
+    counts = {}
+    for server, db, side in ((src_server, source_db, "source"), (tgt_server, target_db, "target")):
+        server.create_table(db, table, columns, pk, indexes)
+        server.insert_rows(
+            db, table, col_names,
+            generate_rows(side, rows, width, diff_rate, composite_pk, seed, counts if side == "source" else None)
+        )
+    return counts
@@ -0,0 +1,329 @@
+"""
+Benchmarks for the compare and sync-SQL code paths on synthetic datasets.
+
+Runs against StandInServer (SQLite files, see standin.py), so no MySQL is needed.
+Every scenario runs in a fresh process, which makes peak RSS per scenario meaningful.
+Results are written as JSON; pass an earlier file as --baseline to flag regressions.
+
+    python -m benchmarks.run_benchmarks --rows 10000 100000 --width 10 --diff-rate 0.01 \
+        --output bench.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from importlib import metadata
+
+from db_tools.checksum_compare import compare_table_checksums, compare_table_server_digests
+from db_tools.columnar_compare import compare_table_content_columnar
+from db_tools.external_compare import compare_table_content_external
+from db_tools.sharded_compare import compare_table_sharded
+from db_tools.sample_compare import compare_table_sample
+from db_tools.diff_export import export_table_diff
+from db_tools.content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    compare_table_content,
+    generate_content_sync_sql,
+    sync_batch_bytes,
+)
+from db_tools.submit_handler import (
+    compare_table_structure,
+    compare_tables_handler,
+    get_table_columns,
+    get_table_constraints_and_indices,
+)
+from .datasets import build_dataset
+from .standin import StandInServer
+
+SOURCE_DB = "bench_src"
+TARGET_DB = "bench_tgt"
+TABLE = "bench"
+DIFF_KINDS = ["missing_in_target", "missing_in_source", "values_different"]
+DEFAULT_MAX_REGRESSION = 0.2
+
+def _diff_counts(result):
+    return {kind: len(result[kind]) for kind in DIFF_KINDS}
+
+def _content(chunk_size=None):
+    def scenario(src_conn, tgt_conn):
+        return lambda: _diff_counts(compare_table_content(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE, chunk_size=chunk_size))
+    return scenario
+
+def _hash_only(src_conn, tgt_conn):
+    return lambda: _diff_counts(compare_table_content(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE, hash_only=True))
+
+def _external(src_conn, tgt_conn):
+    # A small sort budget, so the runs really spill and get merged
+    return lambda: _diff_counts(compare_table_content_external(
+        src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE, memory_budget=4 * 1024 * 1024
+    ))
+
+def _server_digests(src_conn, tgt_conn):
+    return lambda: _diff_counts(compare_table_server_digests(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE))
+
+def _standin_engine(data_dir, name, databases):
+    return StandInServer(data_dir, name, databases).engine
+
+def _sharded(src_conn, tgt_conn):
+    # Workers open the stand-in servers themselves; their queries are not in the counts
+    data_dir = os.path.dirname(src_conn.engine.url.database)
+    factories = (
+        partial(_standin_engine, data_dir, "source", [SOURCE_DB]),
+        partial(_standin_engine, data_dir, "target", [TARGET_DB]),
+    )
+    return lambda: _diff_counts(compare_table_sharded(
+        src_conn.engine, tgt_conn.engine, SOURCE_DB, TARGET_DB, TABLE, engine_factories=factories
+    ))
+
+def _sample(src_conn, tgt_conn):
+    def run():
+        result = compare_table_sample(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE)
+        return {key: result[key] for key in ("sampled", "mismatches", "recommendation")}
+    return run
+
+def _checksums(src_conn, tgt_conn):
+    return lambda: _diff_counts(compare_table_checksums(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE))
+
+def _columnar(src_conn, tgt_conn):
+    return lambda: _diff_counts(compare_table_content_columnar(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE))
+
+def _structure(src_conn, tgt_conn):
+    def run():
+        src_cols = get_table_columns(src_conn, SOURCE_DB, TABLE)
+        tgt_cols = get_table_columns(tgt_conn, TARGET_DB, TABLE)
+        src_constraints = get_table_constraints_and_indices(src_conn, SOURCE_DB, TABLE)
+        tgt_constraints = get_table_constraints_and_indices(tgt_conn, TARGET_DB, TABLE)
+        is_same, _ = compare_table_structure(src_cols, tgt_cols, src_constraints, tgt_constraints)
+        return {"same": is_same}
+    return run
+
+def _sync_sql(batched):
+    def scenario(src_conn, tgt_conn):
+        # The diff is set-up work; only the SQL generation is measured
+        diff = compare_table_content(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE, chunk_size=DEFAULT_CHUNK_SIZE)
+        batch_bytes = sync_batch_bytes(tgt_conn) if batched else None
+
+        def run():
+            sql = generate_content_sync_sql(
+                diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], TABLE,
+                values_different=diff["values_different"], pk=diff["pk"], batch_bytes=batch_bytes
+            )
+            return {"statements": sql.count(";\n") + 1 if sql else 0, "bytes": len(sql)}
+        return run
+    return scenario
+
+def _export(suffix):
+    def scenario(src_conn, tgt_conn):
+        def run():
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, f"{TABLE}{suffix}")
+                counts = export_table_diff(
+                    src_conn, tgt_conn, SOURCE_DB, TARGET_DB, TABLE, path, batch_bytes=sync_batch_bytes(tgt_conn)
+                )
+                return {**counts, "bytes": os.path.getsize(path)}
+        return run
+    return scenario
+
+def _handler(src_conn, tgt_conn):
+    def run():
+        rows = compare_tables_handler(src_conn, tgt_conn, SOURCE_DB, TARGET_DB, [TABLE])
+        return {"rows": [list(row) for row in rows]}
+    return run
+
+# name -> factory(src_conn, tgt_conn) doing any set-up and returning the callable to time
+SCENARIOS = {
+    "compare_table_content": _content(),
+    "compare_table_content_chunked": _content(DEFAULT_CHUNK_SIZE),
+    "compare_table_content_hash_only": _hash_only,
+    "compare_table_content_external": _external,
+    "compare_table_server_digests": _server_digests,
+    "compare_table_sharded": _sharded,
+    "compare_table_sample": _sample,
+    "compare_table_checksums": _checksums,
+    "compare_table_content_columnar": _columnar,
+    "compare_table_structure": _structure,
+    "generate_content_sync_sql": _sync_sql(batched=False),
+    "generate_content_sync_sql_batched": _sync_sql(batched=True),
+    "export_table_diff_ndjson": _export(".ndjson.gz"),
+    "export_table_diff_sql": _export(".sql.gz"),
+    "compare_tables_handler": _handler,
+}
+
+def _servers(data_dir):
+    return (
+        StandInServer(data_dir, "source", [SOURCE_DB]),
+        StandInServer(data_dir, "target", [TARGET_DB]),
+    )
+
+def _max_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def run_scenario(data_dir, name):
+    """Runs one scenario on the dataset in data_dir; meant to be called in a fresh process."""
+    src_server, tgt_server = _servers(data_dir)
+    try:
+        with src_server.engine.connect() as src_conn, tgt_server.engine.connect() as tgt_conn:
+            run = SCENARIOS[name](src_conn, tgt_conn)
+            src_server.reset_query_count()
+            tgt_server.reset_query_count()
+            baseline_rss = _max_rss_kb()
+            start = time.perf_counter()
+            outcome = run()
+            wall_time = time.perf_counter() - start
+            return {
+                "wall_time_s": round(wall_time, 4),
+                "peak_rss_kb": _max_rss_kb(),
+                "setup_rss_kb": baseline_rss,
+                "queries": {"source": src_server.query_count, "target": tgt_server.query_count},
+                "outcome": outcome,
+            }
+    finally:
+        src_server.dispose()
+        tgt_server.dispose()
+
+def _run_isolated(data_dir, name):
+    # Not a multiprocessing.Pool: its daemonic workers can't start the sharded scenario's processes
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(run_scenario, data_dir, name).result()
+
+def _dataset_key(rows, args):
+    return {
+        "rows": rows, "width": args.width, "diff_rate": args.diff_rate,
+        "composite_pk": args.composite_pk, "seed": args.seed,
+    }
+
+def prepare_dataset(data_dir, key):
+    """Builds the dataset unless data_dir already holds one with the same parameters. Returns the expected diff counts."""
+    marker = os.path.join(data_dir, "dataset.json")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            saved = json.load(f)
+        if saved["key"] == key:
+            logging.info(f"Reusing dataset in {data_dir}")
+            return saved["expected"]
+    logging.info(f"Building dataset {key} in {data_dir}")
+    start = time.perf_counter()
+    src_server, tgt_server = _servers(data_dir)
+    try:
+        expected = build_dataset(
+            src_server, tgt_server, SOURCE_DB, TARGET_DB, TABLE, key["rows"],
+            width=key["width"], diff_rate=key["diff_rate"], composite_pk=key["composite_pk"], seed=key["seed"]
+        )
+    finally:
+        src_server.dispose()
+        tgt_server.dispose()
+    with open(marker, "w") as f:
+        json.dump({"key": key, "expected": expected}, f)
+    logging.info(f"Dataset built in {time.perf_counter() - start:.1f}s")
+    return expected
+
+def run_benchmarks(args):
+    results = []
+    for rows in args.rows:
+        key = _dataset_key(rows, args)
+        data_dir = os.path.join(args.data_dir, f"rows_{rows}") if args.data_dir else tempfile.mkdtemp(prefix="db_tools_bench_")
+        os.makedirs(data_dir, exist_ok=True)
+        try:
+            expected = prepare_dataset(data_dir, key)
+            for name in args.scenarios:
+                logging.info(f"Running {name} on {rows} rows")
+                record = {"scenario": name, **key, **_run_isolated(data_dir, name)}
+                outcome = record["outcome"]
+                if all(kind in outcome for kind in DIFF_KINDS):
+                    record["expected"] = expected
+                    # Only the counts are checked; scenarios may report more, e.g. the bytes written
+                    record["correct"] = {kind: outcome[kind] for kind in DIFF_KINDS} == expected
+                results.append(record)
+                logging.info(
+                    f"{name} on {rows} rows: {record['wall_time_s']}s, {record['peak_rss_kb']} KB peak RSS, "
+                    f"{record['queries']['source'] + record['queries']['target']} queries"
+                )
+        finally:
+            if not args.data_dir:
+                shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+def _record_id(record):
+    return (record["scenario"], record["rows"], record["width"], record["diff_rate"], record["composite_pk"])
+
+def find_regressions(results, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """
+    Returns a description of every result whose wall time or query count grew by more
+    than max_regression (a fraction) over the matching record in baseline.
+    """
+    previous = {_record_id(r): r for r in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get(_record_id(record))
+        if old is None:
+            continue
+        if record["wall_time_s"] > old["wall_time_s"] * (1 + max_regression):
+            regressions.append(f"{record['scenario']} ({record['rows']} rows): wall time {old['wall_time_s']}s -> {record['wall_time_s']}s")
+        old_queries = sum(old["queries"].values())
+        new_queries = sum(record["queries"].values())
+        if new_queries > old_queries * (1 + max_regression):
+            regressions.append(f"{record['scenario']} ({record['rows']} rows): queries {old_queries} -> {new_queries}")
+        if record.get("correct") is False:
+            regressions.append(f"{record['scenario']} ({record['rows']} rows): diff does not match the dataset")
+    return regressions
+
+def _version():
+    try:
+        return metadata.version("db-tools")
+    except metadata.PackageNotFoundError:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark db_tools compare and sync-SQL generation on synthetic tables.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="Table sizes to benchmark")
+    parser.add_argument("--width", type=int, default=10, help="Number of non-PK columns")
+    parser.add_argument("--diff-rate", type=float, default=0.01, help="Fraction of rows that differ")
+    parser.add_argument("--composite-pk", action="store_true", help="Use a (shard, id) primary key")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--data-dir", help="Keep the generated datasets here and reuse them on later runs")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON results to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    results = run_benchmarks(args)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "db_tools_version": _version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    else:
+        json.dump(report, sys.stdout, indent=2, default=str)
+        sys.stdout.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f)["results"], args.max_regression)
+        for line in regressions:
+            logging.error(f"Regression: {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
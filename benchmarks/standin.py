@@ -0,0 +1,280 @@
+"""
+A local stand-in for a MySQL server, so the benchmarks run without one.
+
+Each StandInServer is a set of SQLite files behind a SQLAlchemy engine: one file per
+database (ATTACHed under the database name) plus an information_schema file kept up to
+date by create_table/insert_rows. The MySQL functions db_tools uses (CONCAT_WS, ISNULL,
+MD5, CRC32, CONV, BIT_XOR, RAND) are registered on every connection, and the MySQL-only
+statements (USE, SHOW TABLES/COLUMNS/KEYS, SELECT @@max_allowed_packet) are rewritten
+into SQLite queries before they run. Everything else is passed through unchanged.
+
+Unqualified table names resolve in ATTACH order, so give each server a single database
+if the code under test relies on USE (the benchmarks use one server per side).
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+import zlib
+from datetime import datetime
+from sqlalchemy import create_engine, event, text
+
+MAX_ALLOWED_PACKET = 64 * 1024 * 1024
+INSERT_BATCH_SIZE = 50000
+
+# Key in Connection.info for the database selected by the last USE on that connection
+_CURRENT_DB_KEY = "standin.current_db"
+
+_USE_RE = re.compile(r"^\s*USE\s+`([^`]+)`\s*;?\s*$", re.I)
+_SHOW_TABLES_RE = re.compile(r"^\s*SHOW\s+TABLES\s*;?\s*$", re.I)
+_SHOW_COLUMNS_RE = re.compile(
+    r"^\s*SHOW\s+COLUMNS\s+FROM\s+`([^`]+)`(?:\s+(?:FROM|IN)\s+`([^`]+)`)?\s*;?\s*$", re.I
+)
+_SHOW_KEYS_RE = re.compile(
+    r"^\s*SHOW\s+(?:KEYS|INDEX|INDEXES)\s+FROM\s+`([^`]+)`(?:\s+(?:FROM|IN)\s+`([^`]+)`)?"
+    r"(?:\s+WHERE\s+(.*?))?\s*;?\s*$",
+    re.I | re.S
+)
+_MAX_PACKET_RE = re.compile(r"@@max_allowed_packet", re.I)
+# ISNULL is an operator keyword in SQLite, so the MySQL function is registered under another name
+_ISNULL_RE = re.compile(r"\bISNULL\s*\(", re.I)
+
+_INFORMATION_SCHEMA_DDL = [
+    "CREATE TABLE IF NOT EXISTS information_schema.TABLES ("
+    "TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_TYPE TEXT, ENGINE TEXT, TABLE_ROWS INTEGER, "
+    "CREATE_TIME TEXT, UPDATE_TIME TEXT, PRIMARY KEY (TABLE_SCHEMA, TABLE_NAME))",
+    "CREATE TABLE IF NOT EXISTS information_schema.COLUMNS ("
+    "TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, ORDINAL_POSITION INTEGER, COLUMN_TYPE TEXT, "
+    "IS_NULLABLE TEXT, COLUMN_KEY TEXT, COLUMN_DEFAULT TEXT, EXTRA TEXT)",
+    "CREATE TABLE IF NOT EXISTS information_schema.STATISTICS ("
+    "TABLE_SCHEMA TEXT, TABLE_NAME TEXT, INDEX_NAME TEXT, NON_UNIQUE INTEGER, SEQ_IN_INDEX INTEGER, "
+    "COLUMN_NAME TEXT)",
+]
+
+def _to_str(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+def _concat_ws(sep, *args):
+    if sep is None:
+        return None
+    return sep.join(_to_str(a) for a in args if a is not None)
+
+def _concat(*args):
+    if any(a is None for a in args):
+        return None
+    return "".join(_to_str(a) for a in args)
+
+def _isnull(value):
+    return 1 if value is None else 0
+
+def _md5(value):
+    return None if value is None else hashlib.md5(_to_str(value).encode("utf-8")).hexdigest()
+
+def _crc32(value):
+    return None if value is None else zlib.crc32(_to_str(value).encode("utf-8"))
+
+def _conv(value, from_base, to_base):
+    # SQLite integers are signed 64-bit, so the top bit is dropped; both sides hash the same way
+    if value is None:
+        return None
+    return int(_to_str(value), int(from_base)) & ((1 << 63) - 1)
+
+class _BitXor:
+    def __init__(self):
+        self.value = 0
+
+    def step(self, value):
+        if value is not None:
+            self.value ^= int(value)
+
+    def finalize(self):
+        return self.value
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _sqlite_type(column_type):
+    column_type = column_type.lower()
+    if "int" in column_type:
+        return "INTEGER"
+    if column_type.startswith(("decimal", "float", "double")):
+        return "REAL"
+    return "TEXT"
+
+class StandInServer:
+    """
+    One stand-in MySQL server stored under root_dir. Opening it again with the same
+    root_dir and name reuses the data, so a dataset can be built once and benchmarked
+    from other processes.
+    """
+
+    def __init__(self, root_dir, name, databases):
+        self.root_dir = root_dir
+        self.name = name
+        self.databases = list(databases)
+        self.query_count = 0
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+        self.engine = create_engine(
+            f"sqlite:///{self._path('main')}", connect_args={"check_same_thread": False}
+        )
+        event.listen(self.engine, "connect", self._on_connect)
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute, retval=True)
+        with self.engine.begin() as conn:
+            for ddl in _INFORMATION_SCHEMA_DDL:
+                conn.exec_driver_sql(ddl)
+        self.reset_query_count()
+
+    def _path(self, db):
+        return os.path.join(self.root_dir, f"{self.name}.{db}.sqlite")
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        for name, num_args, func in [
+            ("CONCAT_WS", -1, _concat_ws),
+            ("CONCAT", -1, _concat),
+            ("MYSQL_ISNULL", 1, _isnull),
+            ("MD5", 1, _md5),
+            ("CRC32", 1, _crc32),
+            ("CONV", 3, _conv),
+        ]:
+            dbapi_connection.create_function(name, num_args, func, deterministic=True)
+        dbapi_connection.create_function("RAND", 0, random.random)
+        dbapi_connection.create_aggregate("BIT_XOR", 1, _BitXor)
+        for db in ["information_schema"] + self.databases:
+            dbapi_connection.execute(f"ATTACH DATABASE {_quote(self._path(db))} AS \"{db}\"")
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.query_count += 1
+        return self.rewrite(statement, conn.info), parameters
+
+    def rewrite(self, statement, info):
+        """Translates the MySQL-only statements db_tools issues into SQLite queries."""
+        match = _USE_RE.match(statement)
+        if match:
+            info[_CURRENT_DB_KEY] = match.group(1)
+            return "SELECT 1"
+        current_db = info.get(_CURRENT_DB_KEY, self.databases[0])
+        if _SHOW_TABLES_RE.match(statement):
+            return (
+                "SELECT TABLE_NAME FROM information_schema.TABLES "
+                f"WHERE TABLE_SCHEMA = {_quote(current_db)} ORDER BY TABLE_NAME"
+            )
+        match = _SHOW_COLUMNS_RE.match(statement)
+        if match:
+            table, db = match.group(1), match.group(2) or current_db
+            return (
+                "SELECT COLUMN_NAME AS Field, COLUMN_TYPE AS Type, IS_NULLABLE AS \"Null\", "
+                "COLUMN_KEY AS \"Key\", COLUMN_DEFAULT AS \"Default\", EXTRA AS Extra "
+                f"FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = {_quote(db)} "
+                f"AND TABLE_NAME = {_quote(table)} ORDER BY ORDINAL_POSITION"
+            )
+        match = _SHOW_KEYS_RE.match(statement)
+        if match:
+            table, db, where = match.group(1), match.group(2) or current_db, match.group(3)
+            sql = (
+                "SELECT * FROM (SELECT TABLE_NAME AS \"Table\", NON_UNIQUE AS Non_unique, "
+                "INDEX_NAME AS Key_name, SEQ_IN_INDEX AS Seq_in_index, COLUMN_NAME AS Column_name "
+                f"FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = {_quote(db)} "
+                f"AND TABLE_NAME = {_quote(table)})"
+            )
+            if where:
+                sql += f" WHERE {where}"
+            return sql + " ORDER BY Key_name != 'PRIMARY', Key_name, Seq_in_index"
+        statement = _ISNULL_RE.sub("MYSQL_ISNULL(", statement)
+        return _MAX_PACKET_RE.sub(str(MAX_ALLOWED_PACKET), statement)
+
+    def reset_query_count(self):
+        with self._lock:
+            self.query_count = 0
+
+    def create_table(self, db, table, columns, primary_key, indexes=None):
+        """
+        Creates db.table and its information_schema rows.
+        columns: [(name, mysql_type), ...]; primary_key: [column, ...];
+        indexes: {index_name: ([column, ...], unique)}.
+        """
+        indexes = indexes or {}
+        col_defs = [f"`{name}` {_sqlite_type(col_type)}" for name, col_type in columns]
+        pk_str = ", ".join(f"`{c}`" for c in primary_key)
+        # A single integer PK becomes the rowid and composite PKs use WITHOUT ROWID,
+        # so rows are stored in PK order like an InnoDB clustered index
+        without_rowid = " WITHOUT ROWID" if len(primary_key) > 1 else ""
+        keys = {c: "PRI" for c in primary_key}
+        for cols, unique in indexes.values():
+            keys.setdefault(cols[0], "UNI" if unique else "MUL")
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS `{db}`.`{table}`")
+            conn.exec_driver_sql(
+                f"CREATE TABLE `{db}`.`{table}` ({', '.join(col_defs)}, PRIMARY KEY ({pk_str})){without_rowid}"
+            )
+            for index_name, (cols, unique) in indexes.items():
+                conn.exec_driver_sql(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX `{db}`.`{table}_{index_name}` "
+                    f"ON `{table}` ({', '.join(f'`{c}`' for c in cols)})"
+                )
+            for info_table in ("TABLES", "COLUMNS", "STATISTICS"):
+                conn.execute(
+                    text(f"DELETE FROM information_schema.{info_table} WHERE TABLE_SCHEMA = :db AND TABLE_NAME = :table"),
+                    {"db": db, "table": table}
+                )
+            conn.execute(
+                text(
+                    "INSERT INTO information_schema.TABLES VALUES "
+                    "(:db, :table, 'BASE TABLE', 'InnoDB', 0, :now, NULL)"
+                ),
+                {"db": db, "table": table, "now": now}
+            )
+            conn.execute(
+                text("INSERT INTO information_schema.COLUMNS VALUES (:db, :table, :name, :pos, :type, :nullable, :key, NULL, '')"),
+                [
+                    {
+                        "db": db, "table": table, "name": name, "pos": pos, "type": col_type,
+                        "nullable": "NO" if name in primary_key else "YES", "key": keys.get(name, ""),
+                    }
+                    for pos, (name, col_type) in enumerate(columns, start=1)
+                ]
+            )
+            all_indexes = {"PRIMARY": (primary_key, True), **indexes}
+            conn.execute(
+                text("INSERT INTO information_schema.STATISTICS VALUES (:db, :table, :index, :non_unique, :seq, :col)"),
+                [
+                    {"db": db, "table": table, "index": index_name, "non_unique": 0 if unique else 1, "seq": seq, "col": col}
+                    for index_name, (cols, unique) in all_indexes.items()
+                    for seq, col in enumerate(cols, start=1)
+                ]
+            )
+
+    def insert_rows(self, db, table, col_names, rows, batch_size=INSERT_BATCH_SIZE):
+        """Bulk-loads an iterable of row tuples and updates TABLE_ROWS/UPDATE_TIME. Returns the row count."""
+        sql = (
+            f"INSERT INTO `{db}`.`{table}` ({', '.join(f'`{c}`' for c in col_names)}) "
+            f"VALUES ({', '.join('?' for _ in col_names)})"
+        )
+        total = 0
+        batch = []
+        with self.engine.begin() as conn:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    conn.exec_driver_sql(sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                conn.exec_driver_sql(sql, batch)
+                total += len(batch)
+            conn.execute(
+                text(
+                    "UPDATE information_schema.TABLES SET TABLE_ROWS = TABLE_ROWS + :n, UPDATE_TIME = :now "
+                    "WHERE TABLE_SCHEMA = :db AND TABLE_NAME = :table"
+                ),
+                {"n": total, "now": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "db": db, "table": table}
+            )
+        return total
+
+    def dispose(self):
+        self.engine.dispose()
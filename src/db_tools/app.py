@@ -1,20 +1,50 @@
 import os
-import json
 import re
+import queue
 import logging
+import threading
 import tkinter as tk
-from tkinter import messagebox, ttk, simpledialog
+from tkinter import messagebox, ttk, simpledialog, filedialog
 from sqlalchemy import create_engine, text
 from .submit_handler import (
     compare_tables_handler,
     generate_alter_table_sql,
     get_tables,
-    get_table_columns,
-    get_table_constraints_and_indices
+    engine_pool_options,
+    DEFAULT_MAX_WORKERS,
+    MAX_WORKERS
 )
 from .content_compare import (
     compare_table_content,
-    generate_content_sync_sql
+    generate_content_sync_sql,
+    sync_batch_bytes
+)
+from .metadata_cache import cached_compare_snapshots
+from .diff_view import DEFAULT_PAGE_SIZE, DIFF_KIND_LABELS, page_count, stream_table_diff
+from .diff_export import (
+    INLINE_DIFF_LIMIT,
+    diff_size,
+    export_table_diff,
+    open_text_output,
+    upgrade_script_header,
+    write_upgrade_script,
+)
+from .sample_compare import (
+    DEFAULT_SAMPLE_SIZE,
+    RECOMMEND_FULL_COMPARE,
+    SAMPLE_METHODS,
+    compare_table_sample,
+    format_sample_result
+)
+from .sync_apply import apply_content_diff, default_checkpoint_path
+from .cancellation import QueryCanceller
+from .row_count import COUNT_EXACT, COUNT_STRATEGIES
+from .compare_report import (
+    ALL_TABLES,
+    PHASE_METADATA,
+    CompareReport,
+    append_to_report_log,
+    phase
 )
 from .shared import (
     load_connections,
@@ -44,7 +74,11 @@ def connect_and_next():
 
     try:
         global db_engine
-        db_engine = create_engine(f"mysql+pymysql://{username}:{password}@{host}:{port}/")
+        # Sized for MAX_WORKERS parallel compares; with no separate target, the pool serves both sides
+        db_engine = create_engine(
+            f"mysql+pymysql://{username}:{password}@{host}:{port}/",
+            **engine_pool_options(MAX_WORKERS, shared=not use_different_target_var.get())
+        )
         global db_connection
         db_connection = db_engine.connect()
     except Exception as e:
@@ -59,7 +93,10 @@ def connect_and_next():
         target_username = target_username_var.get()
         target_password = target_password_var.get()
         try:
-            target_engine = create_engine(f"mysql+pymysql://{target_username}:{target_password}@{target_host}:{target_port}/")
+            target_engine = create_engine(
+                f"mysql+pymysql://{target_username}:{target_password}@{target_host}:{target_port}/",
+                **engine_pool_options(MAX_WORKERS, shared=False)
+            )
             target_connection = target_engine.connect()
         except Exception as e:
             messagebox.showerror("Target Connection Error", f"Failed to connect to target: {str(e)}")
@@ -115,15 +152,138 @@ def submit():
     for table, widget in where_clause_text_widgets.items():
         table_where_clauses[table] = widget.get("1.0", tk.END).strip()
     # Pass table_where_clauses to result table
-    try:
+    where_clauses = dict(table_where_clauses)
+    # The Spinbox accepts typed values beyond its range; the pools only hold MAX_WORKERS
+    max_workers = max(1, min(workers_var.get(), MAX_WORKERS))
+    count_strategy = count_strategy_var.get()
+    global compare_report
+    compare_report = CompareReport(f"{source_db} -> {target_db}")
+    report = compare_report
+
+    def job(report_progress):
+        with phase(report, ALL_TABLES, PHASE_METADATA):
+            schemas = cached_compare_snapshots(
+                db_connection, target_connection, source_db, target_db, selected_tables
+            )
         result_rows = compare_tables_handler(
-            db_connection, target_connection, source_db, target_db, selected_tables, dict(table_where_clauses)
+            db_connection, target_connection, source_db, target_db, selected_tables, where_clauses,
+            max_workers=max_workers, src_schema=schemas[0], tgt_schema=schemas[1],
+            count_strategy=count_strategy, report=report,
+            progress_callback=lambda table, row, done, total: report_progress(
+                table, f"Structure: {row[2]}, Rows: {row[3]}" if row[1] == "✅ Yes" else "Missing in target", done
+            )
         )
-        show_result_table(result_rows, selected_tables, dict(table_where_clauses))
-    except DbToolsError as e:
-        messagebox.showerror("Error", str(e))
+        return schemas, result_rows
+
+    def on_done(result):
+        # Keep the bulk-loaded metadata so clicks on the result tree don't re-query it
+        global src_schema, tgt_schema
+        (src_schema, tgt_schema), result_rows = result
+        append_to_report_log(report)
+        show_result_table(result_rows, selected_tables, where_clauses)
+
+    run_in_background("Comparing Tables", job, on_done, tables=selected_tables)
+
+def run_in_background(title, job, on_done, tables=None):
+    """
+    Runs job(report_progress) on a worker thread so the window stays responsive.
+    A modal progress window shows per-table status (when tables are given) and a
+    Cancel button that stops new queries and KILLs the running ones.
+    report_progress(table, status, done=None) may be called from any thread; the
+    updates, and on_done(result) or the error message, are handled on the Tk thread.
+    """
+    events = queue.Queue()
+    canceller = QueryCanceller().watch(db_engine, target_engine)
+
+    win = tk.Toplevel(root)
+    win.title(title)
+    win.transient(root)
+    status_var = tk.StringVar(value="Starting...")
+    tk.Label(win, textvariable=status_var, anchor="w").pack(fill="x", padx=10, pady=(10, 0))
+    if tables:
+        bar = ttk.Progressbar(win, mode="determinate", maximum=len(tables), length=500)
+    else:
+        bar = ttk.Progressbar(win, mode="indeterminate", length=500)
+        bar.start(15)
+    bar.pack(padx=10, pady=10)
+    status_tree = None
+    if tables:
+        status_tree = ttk.Treeview(win, columns=("Table", "Status"), show="headings", height=min(len(tables), 10))
+        status_tree.heading("Table", text="Table")
+        status_tree.heading("Status", text="Status")
+        status_tree.column("Table", width=180)
+        status_tree.column("Status", width=420)
+        for table in tables:
+            status_tree.insert("", tk.END, iid=table, values=(table, "Pending"))
+        status_tree.pack(fill="both", expand=True, padx=10)
+
+    def on_cancel():
+        cancel_btn.config(state="disabled")
+        status_var.set("Cancelling...")
+        # KILL QUERY needs its own round trip, so keep it off the Tk thread too
+        threading.Thread(target=canceller.cancel, daemon=True).start()
+
+    cancel_btn = tk.Button(win, text="Cancel", command=on_cancel)
+    cancel_btn.pack(pady=10)
+    win.protocol("WM_DELETE_WINDOW", on_cancel)
+    win.grab_set()
+
+    def report_progress(table, status, done=None):
+        events.put(("progress", (table, status, done)))
+
+    def worker():
+        try:
+            events.put(("done", job(report_progress)))
+        except Exception as e:
+            events.put(("error", e))
+
+    def finish(kind, value):
+        canceller.unwatch()
+        win.grab_release()
+        win.destroy()
+        if kind == "done":
+            on_done(value)
+            return
+        # A failed or killed statement can leave the shared connections mid-transaction
+        for conn in {id(db_connection): db_connection, id(target_connection): target_connection}.values():
+            try:
+                conn.rollback()
+            except Exception as e:
+                logging.warning(f"Rollback after failed job failed: {e}")
+        if canceller.cancelled.is_set():
+            messagebox.showinfo("Cancelled", f"{title} was cancelled.")
+        else:
+            messagebox.showerror("Error", str(value))
 
-def show_content_diff_window(table_name, diff_json):
+    def poll():
+        try:
+            while True:
+                kind, value = events.get_nowait()
+                if kind != "progress":
+                    finish(kind, value)
+                    return
+                table, status, done = value
+                if status_tree is not None and status_tree.exists(table):
+                    status_tree.set(table, "Status", status)
+                if done is not None and tables:
+                    bar["value"] = done
+                    status_var.set(f"{done} of {len(tables)} tables compared")
+                else:
+                    status_var.set(f"{table}: {status}")
+        except queue.Empty:
+            pass
+        win.after(100, poll)
+
+    threading.Thread(target=worker, daemon=True, name="db-tools-job").start()
+    win.after(100, poll)
+
+def show_content_diff_window(table_name, pager, on_done=None, export=None):
+    """
+    Shows the diffs of a DiffPager one page at a time while they stream in; only the rows
+    of the current page are inserted into the Treeview. Closing the window stops the compare.
+    on_done() is called on the Tk thread once the pager is finished. With export, a Save As
+    action calls export(path) in the background to write all diffs to a file.
+    """
     win = tk.Toplevel()
     win.title(f"Content Differences for {table_name}")
     script_window_width = int(700 * 1.3)
@@ -133,10 +293,102 @@ def show_content_diff_window(table_name, diff_json):
     x = int((screen_width / 2) - (script_window_width / 2))
     y = int((screen_height / 2) - (script_window_height / 2))
     win.geometry(f"{script_window_width}x{script_window_height}+{x}+{y}")
-    txt = tk.Text(win, wrap="word")
-    txt.insert("1.0", json.dumps(diff_json, indent=2, default=str))
-    txt.pack(expand=True, fill="both", padx=10, pady=10)
-    tk.Button(win, text="Close", command=win.destroy).pack(pady=5)
+
+    filter_frame = tk.Frame(win)
+    filter_frame.pack(fill="x", padx=10, pady=(10, 0))
+    tk.Label(filter_frame, text="Type:").pack(side="left")
+    kind_labels = {"All": None, **{label: [kind] for kind, label in DIFF_KIND_LABELS.items()}}
+    kind_var = tk.StringVar(value="All")
+    ttk.Combobox(filter_frame, textvariable=kind_var, values=list(kind_labels), state="readonly", width=18).pack(side="left", padx=5)
+    tk.Label(filter_frame, text="Changed column:").pack(side="left")
+    column_var = tk.StringVar(value="Any")
+    column_combo = ttk.Combobox(filter_frame, textvariable=column_var, values=["Any"], state="readonly", width=20)
+    column_combo.pack(side="left", padx=5)
+    status_var = tk.StringVar()
+    tk.Label(filter_frame, textvariable=status_var, anchor="e").pack(side="right")
+
+    columns = ("Type", "Key", "Columns", "Source", "Target")
+    diff_tree = ttk.Treeview(win, columns=columns, show="headings")
+    for col in columns:
+        diff_tree.heading(col, text=col)
+        diff_tree.column(col, width=250 if col in ("Source", "Target") else 110)
+    diff_tree.pack(expand=True, fill="both", padx=10, pady=5)
+
+    nav_frame = tk.Frame(win)
+    nav_frame.pack(pady=5)
+    page = {"number": 0, "shown": None}
+    page_var = tk.StringVar()
+
+    def current_filter():
+        column = column_var.get()
+        return kind_labels[kind_var.get()], None if column == "Any" else column
+
+    def refresh(force=False):
+        kinds, column = current_filter()
+        total = pager.count(kinds, column)
+        pages = page_count(total)
+        page["number"] = min(page["number"], pages - 1)
+        # Re-insert rows only when the visible page can have changed
+        shown = (kinds, column, page["number"], min(total - page["number"] * DEFAULT_PAGE_SIZE, DEFAULT_PAGE_SIZE))
+        if force or shown != page["shown"]:
+            page["shown"] = shown
+            diff_tree.delete(*diff_tree.get_children())
+            for row in pager.page(page["number"], kinds=kinds, column=column):
+                diff_tree.insert("", tk.END, values=tuple(row[col] for col in columns))
+        page_var.set(f"Page {page['number'] + 1} of {pages} ({total} rows)")
+        counts = pager.counts()
+        summary = ", ".join(f"{DIFF_KIND_LABELS[kind]}: {n}" for kind, n in counts.items())
+        if pager.error:
+            status_var.set(f"Error: {pager.error}")
+        else:
+            status_var.set(summary if pager.done else f"Comparing... {summary}")
+        if len(column_combo["values"]) != len(pager.col_names) + 1:
+            column_combo["values"] = ["Any"] + pager.col_names
+
+    def go(step):
+        page["number"] = max(0, page["number"] + step)
+        refresh()
+
+    def poll():
+        if not win.winfo_exists():
+            return
+        refresh()
+        if pager.done:
+            if on_done:
+                on_done()
+            return
+        win.after(250, poll)
+
+    def close():
+        pager.cancel()
+        win.destroy()
+
+    tk.Button(nav_frame, text="< Prev", command=lambda: go(-1)).pack(side="left", padx=5)
+    tk.Label(nav_frame, textvariable=page_var, width=30).pack(side="left")
+    tk.Button(nav_frame, text="Next >", command=lambda: go(1)).pack(side="left", padx=5)
+    if export:
+        def save_as():
+            path = filedialog.asksaveasfilename(
+                parent=win, title="Save Content Differences", defaultextension=".ndjson.gz",
+                filetypes=[
+                    ("Differences (gzipped JSON Lines)", "*.ndjson.gz"), ("Differences (Parquet)", "*.parquet"),
+                    ("Sync SQL (gzipped)", "*.sql.gz"), ("Sync SQL", "*.sql"), ("All files", "*.*")
+                ]
+            )
+            if path:
+                run_in_background(
+                    f"Saving Content Differences for {table_name}", lambda report_progress: export(path),
+                    lambda counts: messagebox.showinfo(
+                        "Saved", f"Saved {sum(counts.values())} differences to {path}.", parent=win
+                    )
+                )
+
+        tk.Button(nav_frame, text="Save As...", command=save_as).pack(side="left", padx=15)
+    for var in (kind_var, column_var):
+        var.trace_add("write", lambda *args: (page.update(number=0), refresh()))
+    tk.Button(win, text="Close", command=close).pack(pady=5)
+    win.protocol("WM_DELETE_WINDOW", close)
+    poll()
 
 def show_structure_diff_window(table_name, src_cols, tgt_cols, src_constraints, tgt_constraints):
     import tkinter.font as tkfont
@@ -213,7 +465,7 @@ def show_result_table(result_rows, selected_tables, table_where_clauses):
     for widget in result_frame.winfo_children():
         widget.destroy()
     tk.Label(result_frame, text="Comparison Result", font=("Arial", 16, "bold")).pack(pady=10)
-    columns = ("Table", "Exists in Target", "Structure", "Content", "Action")
+    columns = ("Table", "Exists in Target", "Structure", "Content", "Action", "Timing")
     tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=15)
     for col in columns:
         tree.heading(col, text=col)
@@ -223,6 +475,8 @@ def show_result_table(result_rows, selected_tables, table_where_clauses):
             tree.column(col, width=110)
         elif col == "Action":
             tree.column(col, width=220)
+        elif col == "Timing":
+            tree.column(col, width=260)
         else:
             tree.column(col, width=180)
     for row in result_rows:
@@ -245,10 +499,14 @@ def show_result_table(result_rows, selected_tables, table_where_clauses):
                 content = "Error"
             else:
                 content = row[3]
+            # Keep the count kind (e.g. "[estimated]") visible
+            label = re.search(r"\[[^\]]+\]$", row[3])
+            if label and content != row[3]:
+                content += f" {label.group(0)}"
         action = ""
         if row[1] == "✅ Yes" and (row[2] == "⚠️ Different" or "Different" in content):
             action = "🔗 Generate Upgrade Script"
-        tree.insert("", tk.END, values=(row[0], row[1], row[2], content, action))
+        tree.insert("", tk.END, values=(row[0], row[1], row[2], content, action, compare_report.summary(row[0])))
     tree.pack(padx=10, pady=10, fill="x")
 
     def on_tree_click(event):
@@ -264,83 +522,130 @@ def show_result_table(result_rows, selected_tables, table_where_clauses):
             content_val = item['values'][3]
             action_val = item['values'][4]
             where_clause = table_where_clauses.get(table_name, None)
+            source_db = source_db_var.get()
+            target_db = target_db_var.get()
+            batch_sync = batch_sync_var.get()
             if col == "#5":  # Action column
                 if action_val.startswith("🔗"):
-                    src_cols = get_table_columns(
-                        db_connection,
-                        source_db_var.get(), table_name
-                    )
-                    tgt_cols = get_table_columns(
-                        target_connection,
-                        target_db_var.get(), table_name
-                    )
-                    alter_sql = ""
-                    data_sql = ""
-                    if struct_status == "⚠️ Different":
-                        alter_sql = generate_alter_table_sql(src_cols, tgt_cols, table_name)
-                    if "Different" in content_val and struct_status == "✅ Same":
-                        diff = compare_table_content(
-                            db_connection, target_connection,
-                            source_db_var.get(), target_db_var.get(), table_name,
-                            source_where=where_clause, target_where=where_clause
-                        )
-                        if isinstance(diff, dict) and "error" not in diff:
-                            # Identify auto-increment columns
-                            auto_inc_cols = [src_col[0] for src_col in src_cols if "auto_increment" in src_col[5].lower()]
-                            # When calling generate_content_sync_sql:
-                            data_sql = generate_content_sync_sql(
-                                diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], table_name,
-                                diff["values_different"], diff["pk"], auto_inc_cols=auto_inc_cols
+                    def build_script(report_progress):
+                        src_cols = src_schema.columns(table_name)
+                        tgt_cols = tgt_schema.columns(table_name)
+                        alter_sql = ""
+                        data_sql = ""
+                        apply_data = None
+                        save_script = None
+                        if struct_status == "⚠️ Different":
+                            alter_sql = generate_alter_table_sql(src_cols, tgt_cols, table_name)
+                        if "Different" in content_val and struct_status == "✅ Same":
+                            report_progress(table_name, "Comparing content")
+                            diff = compare_table_content(
+                                db_connection, target_connection,
+                                source_db, target_db, table_name,
+                                source_where=where_clause, target_where=where_clause,
+                                src_schema=src_schema, tgt_schema=tgt_schema, report=compare_report
                             )
-                        else:
-                            data_sql = "-- Error or structure not identical"
-                    elif "Different" in content_val:
-                        diff = compare_table_content(
-                            db_connection,
-                            source_db_var.get(), target_db_var.get(), table_name,
-                            source_where=where_clause, target_where=where_clause
-                        )
-                        if isinstance(diff, dict) and "error" not in diff:
-                            # Identify auto-increment columns
-                            auto_inc_cols = [src_col[0] for src_col in src_cols if "auto_increment" in src_col[5].lower()]
-                            # When calling generate_content_sync_sql:
-                            data_sql = generate_content_sync_sql(
-                                diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], table_name,
-                                diff["values_different"], diff["pk"], auto_inc_cols=auto_inc_cols
+                            if isinstance(diff, dict) and "error" not in diff:
+                                # Identify auto-increment columns
+                                auto_inc_cols = [src_col[0] for src_col in src_cols if "auto_increment" in src_col[5].lower()]
+                                sync_args = dict(
+                                    auto_inc_cols=auto_inc_cols,
+                                    batch_bytes=sync_batch_bytes(target_connection) if batch_sync else None,
+                                    upsert_updates=batch_sync, report=compare_report
+                                )
+                                if diff_size(diff) > INLINE_DIFF_LIMIT:
+                                    # Too large to show; the SQL is only generated when saved, straight into the file
+                                    data_sql = (
+                                        f"-- {diff_size(diff)} rows differ, too many to show here.\n"
+                                        "-- Use Save Script As... to write the data sync to a file."
+                                    )
+                                    save_script = lambda path, d=diff, a=alter_sql, kw=sync_args: write_upgrade_script(
+                                        path, table_name, a, d, **kw
+                                    )
+                                else:
+                                    report_progress(table_name, "Generating sync SQL")
+                                    # When calling generate_content_sync_sql:
+                                    data_sql = generate_content_sync_sql(
+                                        diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], table_name,
+                                        diff["values_different"], diff["pk"], **sync_args
+                                    )
+                                apply_data = lambda progress_callback=None, d=diff, a=auto_inc_cols: apply_content_diff(
+                                    target_connection, target_db, table_name, d, auto_inc_cols=a,
+                                    checkpoint_path=default_checkpoint_path(target_connection, target_db, table_name),
+                                    progress_callback=progress_callback
+                                )
+                            else:
+                                data_sql = "-- Error or structure not identical"
+                        elif "Different" in content_val:
+                            diff = compare_table_content(
+                                db_connection,
+                                source_db, target_db, table_name,
+                                source_where=where_clause, target_where=where_clause
                             )
-                        else:
-                            data_sql = "-- Error or structure not identical"
-
-                    script = "-- Upgrade Script\n"
-                    if alter_sql:
-                        script += f"\n-- Structure Upgrade\n{alter_sql}\n"
-                    if data_sql:
-                        script += f"\n-- Data Sync\n{data_sql}\n"
-                    show_script_window(table_name, script)
+                            if isinstance(diff, dict) and "error" not in diff:
+                                # Identify auto-increment columns
+                                auto_inc_cols = [src_col[0] for src_col in src_cols if "auto_increment" in src_col[5].lower()]
+                                # When calling generate_content_sync_sql:
+                                data_sql = generate_content_sync_sql(
+                                    diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], table_name,
+                                    diff["values_different"], diff["pk"], auto_inc_cols=auto_inc_cols,
+                                    batch_bytes=sync_batch_bytes(target_connection) if batch_sync else None,
+                                    upsert_updates=batch_sync
+                                )
+                            else:
+                                data_sql = "-- Error or structure not identical"
+
+                        script = "-- Upgrade Script\n"
+                        if alter_sql:
+                            script += f"\n-- Structure Upgrade\n{alter_sql}\n"
+                        if data_sql:
+                            script += f"\n-- Data Sync\n{data_sql}\n"
+                        return script, apply_data, save_script
+
+                    def show_script(result):
+                        tree.set(row_id, "Timing", compare_report.summary(table_name))
+                        script, apply_data, save_script = result
+                        show_script_window(table_name, script, apply_data=apply_data, save_script=save_script)
+
+                    run_in_background(f"Building Upgrade Script for {table_name}", build_script, show_script)
                 else:
                     messagebox.showinfo("No Upgrade Needed", "Selected table does not need an upgrade.")
             elif col == "#4":  # Content column
                 if "Different" in content_val:
                     struct_status_val = item['values'][2]
                     if struct_status_val == "✅ Same":
-                        try:
-                            diff_json = compare_table_content(
-                                db_connection, target_connection,
-                                source_db_var.get(), target_db_var.get(), table_name,
-                                source_where=where_clause, target_where=where_clause
-                            )
-                        except DbToolsError as e:
-                            diff_json = {"error": str(e)}
+                        # Streams on its own connections, so the window isn't modal
+                        pager = stream_table_diff(
+                            db_engine, target_engine, source_db, target_db, table_name,
+                            source_where=where_clause, target_where=where_clause,
+                            src_schema=src_schema, tgt_schema=tgt_schema, report=compare_report
+                        )
+                        auto_inc_cols = [
+                            src_col[0] for src_col in src_schema.columns(table_name) if "auto_increment" in src_col[5].lower()
+                        ]
+
+                        def export_diff(path):
+                            # Re-runs the diff streaming into the file, so memory stays flat however many rows differ
+                            with db_engine.connect() as src_conn, target_engine.connect() as tgt_conn:
+                                return export_table_diff(
+                                    src_conn, tgt_conn, source_db, target_db, table_name, path,
+                                    source_where=where_clause, target_where=where_clause,
+                                    src_schema=src_schema, tgt_schema=tgt_schema, auto_inc_cols=auto_inc_cols,
+                                    batch_bytes=sync_batch_bytes(tgt_conn) if batch_sync else None,
+                                    upsert_updates=batch_sync, header=upgrade_script_header(), report=compare_report
+                                )
+
+                        show_content_diff_window(
+                            table_name, pager,
+                            on_done=lambda: tree.set(row_id, "Timing", compare_report.summary(table_name)),
+                            export=export_diff
+                        )
                     else:
-                        diff_json = {"error": "Structure is not identical, cannot compare content."}
-                    show_content_diff_window(table_name, diff_json)
+                        messagebox.showerror("Cannot Compare Content", "Structure is not identical, cannot compare content.")
             elif col == "#3" and struct_status == "⚠️ Different":
-                source_db = source_db_var.get()
-                target_db = target_db_var.get()
-                src_cols = get_table_columns(db_connection, source_db, table_name)
-                tgt_cols = get_table_columns(db_connection, target_db, table_name)
-                src_constraints = get_table_constraints_and_indices(db_connection, source_db, table_name)
-                tgt_constraints = get_table_constraints_and_indices(db_connection, target_db, table_name)
+                src_cols = src_schema.columns(table_name)
+                tgt_cols = tgt_schema.columns(table_name)
+                src_constraints = src_schema.constraints(table_name)
+                tgt_constraints = tgt_schema.constraints(table_name)
                 show_structure_diff_window(table_name, src_cols, tgt_cols, src_constraints, tgt_constraints)
 
     def on_tree_motion(event):
@@ -364,9 +669,71 @@ def show_result_table(result_rows, selected_tables, table_where_clauses):
     tree.bind("<Button-1>", on_tree_click)
     tree.bind("<Motion>", on_tree_motion)
 
+    def sample_selected():
+        # Sampling looks rows up by PK on the other side, so it needs identical structure
+        row_ids = [
+            row_id for row_id in tree.selection()
+            if tree.item(row_id)['values'][1] == "✅ Yes" and tree.item(row_id)['values'][2] == "✅ Same"
+        ]
+        if not row_ids:
+            messagebox.showwarning("No Tables Selected", "Select tables with the same structure on both sides.")
+            return
+        tables = [tree.item(row_id)['values'][0] for row_id in row_ids]
+        source_db = source_db_var.get()
+        target_db = target_db_var.get()
+        method = sample_method_var.get()
+        sample_size = sample_size_var.get()
+
+        def sample_tables(report_progress):
+            results = {}
+            for table_name in tables:
+                where_clause = table_where_clauses.get(table_name) or None
+                report_progress(table_name, "Sampling")
+                results[table_name] = compare_table_sample(
+                    db_connection, target_connection, source_db, target_db, table_name,
+                    source_where=where_clause, target_where=where_clause, sample_size=sample_size, method=method,
+                    src_schema=src_schema, tgt_schema=tgt_schema, report=compare_report
+                )
+                report_progress(table_name, format_sample_result(results[table_name]), len(results))
+            return results
+
+        def show_samples(results):
+            for row_id, table_name in zip(row_ids, tables):
+                tree.set(row_id, "Content", format_sample_result(results[table_name]))
+                tree.set(row_id, "Timing", compare_report.summary(table_name))
+                if results[table_name]["recommendation"] == RECOMMEND_FULL_COMPARE:
+                    tree.set(row_id, "Action", "🔗 Generate Upgrade Script")
+
+        run_in_background("Sampling Table Content", sample_tables, show_samples, tables=tables)
+
+    sample_frame = tk.Frame(result_frame)
+    sample_frame.pack(pady=5)
+    tk.Label(sample_frame, text="Quick content check of the selected tables by sampling:").pack(side="left")
+    sample_method_var = tk.StringVar(value=SAMPLE_METHODS[0])
+    ttk.Combobox(sample_frame, textvariable=sample_method_var, values=SAMPLE_METHODS, state="readonly", width=12).pack(side="left", padx=5)
+    tk.Label(sample_frame, text="rows per side:").pack(side="left")
+    sample_size_var = tk.IntVar(value=DEFAULT_SAMPLE_SIZE)
+    tk.Spinbox(sample_frame, from_=100, to=100000, increment=100, textvariable=sample_size_var, width=7).pack(side="left", padx=5)
+    tk.Button(sample_frame, text="Sample Selected", command=sample_selected).pack(side="left", padx=5)
+
+    def save_report():
+        path = filedialog.asksaveasfilename(
+            title="Save Timing Report", defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("All files", "*.*")]
+        )
+        if path:
+            compare_report.dump_jsonl(path)
+
+    tk.Button(result_frame, text="Save Timing Report (JSON Lines)", command=save_report).pack(pady=5)
     tk.Button(result_frame, text="Back", command=lambda: back_to_schema(tree)).pack(pady=10)
 
-def show_script_window(table_name, script):
+def show_script_window(table_name, script, apply_data=None, save_script=None):
+    """
+    Shows an upgrade script with a Save Script As action (.sql or gzipped .sql.gz). save_script(path),
+    if given, writes the full script in the background instead of the shown text, for scripts too
+    large to show. apply_data(progress_callback), if given, is offered as an action and run in the
+    background too, so a large apply can be followed and cancelled.
+    """
     win = tk.Toplevel()
     win.title(f"Upgrade Script for {table_name}")
     script_window_width = int(700 * 1.3)
@@ -379,6 +746,49 @@ def show_script_window(table_name, script):
     txt = tk.Text(win, wrap="word")
     txt.insert("1.0", script)
     txt.pack(expand=True, fill="both", padx=10, pady=10)
+    if apply_data:
+        def on_apply():
+            if not messagebox.askyesno(
+                "Apply Data Sync",
+                f"Apply the data sync directly to the target table '{table_name}'?\n"
+                "Structure changes are not applied.", parent=win
+            ):
+                return
+
+            def job(report_progress):
+                return apply_data(progress_callback=lambda phase, done, total: report_progress(
+                    table_name, f"{phase.capitalize()}: {done} of {total} rows"
+                ))
+
+            def on_done(stats):
+                messagebox.showinfo(
+                    "Applied",
+                    f"Deleted {stats['delete']}, updated {stats['update']}, inserted {stats['insert']} rows "
+                    f"in {stats['commits']} commits" + (" (resumed from checkpoint)." if stats["resumed"] else "."),
+                    parent=win
+                )
+
+            # A cancelled or failed apply keeps its checkpoint, so applying again resumes after the last commit
+            run_in_background(f"Applying Data Sync to {table_name}", job, on_done)
+        tk.Button(win, text="Apply Data Sync to Target", command=on_apply).pack(pady=5)
+
+    def save_as():
+        path = filedialog.asksaveasfilename(
+            parent=win, title="Save Upgrade Script", defaultextension=".sql",
+            filetypes=[("SQL", "*.sql"), ("SQL (gzipped)", "*.sql.gz"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        if save_script:
+            run_in_background(
+                f"Saving Upgrade Script for {table_name}", lambda report_progress: save_script(path),
+                lambda result: messagebox.showinfo("Saved", f"Saved the upgrade script to {path}.", parent=win)
+            )
+            return
+        with open_text_output(path) as f:
+            f.write(script)
+
+    tk.Button(win, text="Save Script As...", command=save_as).pack(pady=5)
     tk.Button(win, text="Close", command=win.destroy).pack(pady=5)
 
 def back_to_schema(tree_widget):
@@ -556,6 +966,17 @@ where_clauses_frame.pack(fill="x", padx=10, pady=2)
 
 source_tables_listbox.bind("<<ListboxSelect>>", update_where_clause_boxes)
 
+tk.Label(schema_frame, text="Parallel table comparisons:").pack(anchor="w", padx=10, pady=(10, 0))
+workers_var = tk.IntVar(value=DEFAULT_MAX_WORKERS)
+tk.Spinbox(schema_frame, from_=1, to=MAX_WORKERS, textvariable=workers_var, width=5).pack(anchor="w", padx=10, pady=2)
+
+tk.Label(schema_frame, text="Row count:").pack(anchor="w", padx=10, pady=(10, 0))
+count_strategy_var = tk.StringVar(value=COUNT_EXACT)
+ttk.Combobox(schema_frame, textvariable=count_strategy_var, values=COUNT_STRATEGIES, state="readonly", width=20).pack(anchor="w", padx=10, pady=2)
+
+batch_sync_var = tk.BooleanVar(value=False)
+tk.Checkbutton(schema_frame, text="Batch sync SQL into multi-row statements (sized to max_allowed_packet)", variable=batch_sync_var).pack(anchor="w", padx=10, pady=2)
+
 submit_btn = tk.Button(schema_frame, text="Submit", command=submit)
 submit_btn.pack(pady=20)
 
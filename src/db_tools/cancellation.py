@@ -0,0 +1,93 @@
+from sqlalchemy import event
+import logging
+import threading
+from .shared import DbToolsError
+
+class QueryCancelled(DbToolsError):
+    pass
+
+def _server_thread_id(conn):
+    """The MySQL connection id (as used by KILL) of a SQLAlchemy Connection, if the driver exposes it."""
+    dbapi_connection = conn.connection.dbapi_connection
+    thread_id = getattr(dbapi_connection, "thread_id", None)
+    return thread_id() if callable(thread_id) else None
+
+class QueryCanceller:
+    """
+    Lets another thread stop a job running on watched engines: cancel() makes every
+    further query on them raise QueryCancelled, and interrupts the queries already
+    in flight with KILL QUERY sent over a separate connection.
+    """
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self._running = {}
+        self._lock = threading.Lock()
+        self._engines = []
+
+    def watch(self, *engines):
+        for engine in engines:
+            if engine is None or engine in self._engines:
+                continue
+            event.listen(engine, "before_cursor_execute", self._before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute)
+            event.listen(engine, "handle_error", self._on_error)
+            self._engines.append(engine)
+        return self
+
+    def unwatch(self):
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._before_execute)
+            event.remove(engine, "after_cursor_execute", self._after_execute)
+            event.remove(engine, "handle_error", self._on_error)
+        self._engines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unwatch()
+
+    def check(self):
+        """Raises QueryCancelled once cancel() has been called; for loops that run between queries."""
+        if self.cancelled.is_set():
+            raise QueryCancelled("Cancelled by user")
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.check()
+        thread_id = _server_thread_id(conn)
+        if thread_id is not None:
+            with self._lock:
+                self._running[id(cursor)] = (conn.engine, thread_id)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self._running.pop(id(cursor), None)
+
+    def _on_error(self, exception_context):
+        with self._lock:
+            # cursor is unset when the error came before one was created (e.g. QueryCancelled)
+            self._running.pop(id(getattr(exception_context, "cursor", None)), None)
+
+    def cancel(self):
+        """Stops the job: no new queries start, and running ones get KILL QUERY. Returns the number killed."""
+        self.cancelled.set()
+        with self._lock:
+            running = list(self._running.values())
+        killed = 0
+        for engine, thread_id in running:
+            # A raw DBAPI connection, so the KILL itself doesn't go through the cancelled check
+            side_connection = None
+            try:
+                side_connection = engine.raw_connection()
+                cursor = side_connection.cursor()
+                cursor.execute(f"KILL QUERY {int(thread_id)}")
+                cursor.close()
+                killed += 1
+            except Exception as e:
+                logging.warning(f"Failed to kill query on connection {thread_id}: {e}")
+            finally:
+                if side_connection is not None:
+                    side_connection.close()
+        logging.info(f"Cancelled job, interrupted {killed} running queries")
+        return killed
@@ -0,0 +1,343 @@
+from sqlalchemy import text
+import logging
+from .shared import DbToolsError
+from .fingerprint_store import fingerprint_key
+from .metadata_cache import server_key
+from .session import ensure_database
+from .compare_report import PHASE_DIFF, PHASE_FETCH, PHASE_METADATA, phase, record_rows, sub_phase
+from .content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    collect_row_digests,
+    diff_row_digests,
+    fetch_digest_mismatches,
+    iter_table_rows_by_pk,
+    merge_join_rows,
+    pk_columns,
+    pk_range_where,
+    prepare_content_compare,
+)
+
+# Rows per PK range for the initial checksum pass
+DEFAULT_RANGE_SIZE = 100000
+# Mismatching ranges with at most this many rows are fetched instead of bisected
+DEFAULT_MIN_RANGE_ROWS = 1000
+# A stored PK range that has grown past this many times range_size is split again
+RESPLIT_FACTOR = 2
+
+def row_hash_expr(compare_cols, algorithm="md5"):
+    """
+    Returns a SQL expression hashing the compared columns of a row into an unsigned integer.
+    NULL markers are appended because CONCAT_WS skips NULL values.
+    algorithm is "md5" (64 bits of the MD5) or "crc32" (cheaper, 32 bits).
+    """
+    cols = ", ".join(f"`{c}`" for c in compare_cols)
+    nulls = ", ".join(f"ISNULL(`{c}`)" for c in compare_cols)
+    concat = f"CONCAT_WS('#', {cols}, CONCAT({nulls}))"
+    if algorithm == "crc32":
+        return f"CRC32({concat})"
+    if algorithm == "md5":
+        return f"CAST(CONV(SUBSTRING(MD5({concat}), 1, 16), 16, 10) AS UNSIGNED)"
+    raise DbToolsError(f"Unknown checksum algorithm: {algorithm}")
+
+def checksum_cols(pk, compare_cols):
+    """
+    Columns hashed by the range checksums: the PK columns and then compare_cols. The PK must be
+    part of each row's hash even when it is not compared (auto_increment), or BIT_XOR would miss
+    values swapped between keys, and rows with the same content would cancel each other out.
+    """
+    pk_cols = pk_columns(pk)
+    return pk_cols + [c for c in compare_cols if c not in pk_cols]
+
+def get_pk_boundaries(db_connection, db, table, pk, range_size=DEFAULT_RANGE_SIZE, where_clause=None, lower=None):
+    """
+    Walks the PK index and returns the last PK of every full range of range_size rows,
+    starting after lower if given.
+    Each query only reads PK columns, so this is an index-only scan.
+    """
+    pk_cols = pk_columns(pk)
+    pk_str = ", ".join(f"`{c}`" for c in pk_cols)
+    boundaries = []
+    last_key = lower
+    while True:
+        where_sql, params = pk_range_where(pk_cols, where_clause, last_key)
+        sql = (
+            f"SELECT {pk_str} FROM `{db}`.`{table}`{where_sql} "
+            f"ORDER BY {pk_str} LIMIT 1 OFFSET {int(range_size) - 1}"
+        )
+        try:
+            if where_clause and where_clause.strip():
+                ensure_database(db_connection, db)
+            row = db_connection.execute(text(sql), params).first()
+        except Exception as e:
+            raise DbToolsError(f"Failed to get PK boundaries for table {table} in db {db}: {e}")
+        if row is None:
+            return boundaries
+        last_key = row[0] if len(pk_cols) == 1 else tuple(row)
+        boundaries.append(last_key)
+
+def split_pk_ranges(boundaries):
+    """
+    Turns sorted boundary keys into (lower, upper) ranges covering the whole PK space,
+    where lower is exclusive, upper is inclusive and None means unbounded.
+    """
+    ranges = []
+    lower = None
+    for key in boundaries:
+        ranges.append((lower, key))
+        lower = key
+    ranges.append((lower, None))
+    return ranges
+
+def get_range_checksum(db_connection, db, table, hash_cols, pk, lower=None, upper=None, where_clause=None, algorithm="md5"):
+    """
+    Returns (row_count, checksum) for the rows with lower < pk <= upper,
+    computed by the server as BIT_XOR over the per-row hashes of hash_cols (see checksum_cols).
+    """
+    where_sql, params = pk_range_where(pk_columns(pk), where_clause, lower, upper)
+    sql = (
+        f"SELECT COUNT(*), COALESCE(BIT_XOR({row_hash_expr(hash_cols, algorithm)}), 0) "
+        f"FROM `{db}`.`{table}`{where_sql}"
+    )
+    logging.debug(f"Executing SQL: {sql} with parameters: {params}")
+    try:
+        if where_clause and where_clause.strip():
+            ensure_database(db_connection, db)
+        row = db_connection.execute(text(sql), params).first()
+    except Exception as e:
+        raise DbToolsError(f"Failed to checksum table {table} in db {db}: {e}")
+    return int(row[0]), int(row[1])
+
+def get_range_midpoint(db_connection, db, table, pk, row_count, lower=None, upper=None, where_clause=None):
+    """
+    Returns the PK splitting the range lower < pk <= upper into two halves, or None if it can't be split.
+    """
+    if row_count < 2:
+        return None
+    pk_cols = pk_columns(pk)
+    pk_str = ", ".join(f"`{c}`" for c in pk_cols)
+    where_sql, params = pk_range_where(pk_cols, where_clause, lower, upper)
+    sql = (
+        f"SELECT {pk_str} FROM `{db}`.`{table}`{where_sql} "
+        f"ORDER BY {pk_str} LIMIT 1 OFFSET {row_count // 2 - 1}"
+    )
+    try:
+        if where_clause and where_clause.strip():
+            ensure_database(db_connection, db)
+        row = db_connection.execute(text(sql), params).first()
+    except Exception as e:
+        raise DbToolsError(f"Failed to split PK range for table {table} in db {db}: {e}")
+    if row is None:
+        return None
+    return row[0] if len(pk_cols) == 1 else tuple(row)
+
+def _diff_range(
+    src_conn, tgt_conn, source_db, target_db, table, src_cols, pk, col_names, compare_cols,
+    lower, upper, src_count, tgt_count, source_where, target_where, min_range_rows, algorithm, stats
+):
+    """
+    Diffs the PK range lower < pk <= upper, whose checksums are known to disagree: bisects it
+    while it holds more than min_range_rows rows, then fetches the mismatching parts.
+    Returns a list of (kind, item) pairs and the (lower, upper, src_count, tgt_count) parts fetched.
+    """
+    diff = []
+    fetched = []
+    hash_cols = checksum_cols(pk, compare_cols)
+    pending = [(lower, upper, src_count, tgt_count)]
+    while pending:
+        lower, upper, src_count, tgt_count = pending.pop()
+        if src_count is None:
+            src_count, src_sum = get_range_checksum(
+                src_conn, source_db, table, hash_cols, pk, lower, upper, source_where, algorithm
+            )
+            tgt_count, tgt_sum = get_range_checksum(
+                tgt_conn, target_db, table, hash_cols, pk, lower, upper, target_where, algorithm
+            )
+            stats["ranges_checked"] += 1
+            if src_count == tgt_count and src_sum == tgt_sum:
+                continue
+
+        if max(src_count, tgt_count) > min_range_rows:
+            # Split on the side holding most of the rows so both halves shrink
+            if src_count >= tgt_count:
+                mid = get_range_midpoint(src_conn, source_db, table, pk, src_count, lower, upper, source_where)
+            else:
+                mid = get_range_midpoint(tgt_conn, target_db, table, pk, tgt_count, lower, upper, target_where)
+            if mid is not None and mid != upper:
+                logging.debug(f"Bisecting range ({lower}, {upper}] of {table} at {mid}")
+                pending.append((mid, upper, None, None))
+                pending.append((lower, mid, None, None))
+                continue
+
+        part = (lower, upper, src_count, tgt_count)
+        diff.extend(_fetch_range(
+            src_conn, tgt_conn, source_db, target_db, table, src_cols, pk, col_names, compare_cols,
+            part, source_where, target_where, stats
+        ))
+        fetched.append(part)
+    return diff, fetched
+
+def _fetch_range(
+    src_conn, tgt_conn, source_db, target_db, table, src_cols, pk, col_names, compare_cols,
+    part, source_where, target_where, stats
+):
+    """Fetches the rows of the (lower, upper, src_count, tgt_count) part on both sides and diffs them."""
+    lower, upper, src_count, tgt_count = part
+    stats["ranges_fetched"] += 1
+    stats["rows_fetched"] += src_count + tgt_count
+    src_rows = iter_table_rows_by_pk(
+        src_conn, source_db, table, src_cols, pk, where_clause=source_where, lower=lower, upper=upper
+    )
+    tgt_rows = iter_table_rows_by_pk(
+        tgt_conn, target_db, table, src_cols, pk, where_clause=target_where, lower=lower, upper=upper
+    )
+    return list(merge_join_rows(src_rows, tgt_rows, col_names, pk, compare_cols))
+
+def compare_table_checksums(
+    src_conn, tgt_conn, source_db, target_db, table,
+    source_where=None, target_where=None, range_size=DEFAULT_RANGE_SIZE,
+    min_range_rows=DEFAULT_MIN_RANGE_ROWS, algorithm="md5", fingerprints=None
+):
+    """
+    Checksum-based compare_table_content: splits the PK space into ranges of range_size rows,
+    lets both servers checksum each range, and only fetches and diffs the full rows of
+    ranges whose checksums disagree. Mismatching ranges larger than min_range_rows are
+    bisected recursively first.
+    With a FingerprintStore as fingerprints, the ranges of the previous run are reused and
+    a mismatching range whose checksums haven't changed on either side since then only has
+    the parts it was bisected down to last time fetched again, without bisecting.
+    Returns the same dict as compare_table_content plus "checksum_stats".
+    """
+    src_cols, _, pk, col_names, compare_cols = prepare_content_compare(
+        src_conn, tgt_conn, source_db, target_db, table
+    )
+    hash_cols = checksum_cols(pk, compare_cols)
+    result = {"missing_in_target": [], "missing_in_source": [], "values_different": []}
+    stats = {"ranges_checked": 0, "ranges_fetched": 0, "rows_fetched": 0}
+
+    previous = None
+    if fingerprints is not None:
+        stats["ranges_reused"] = 0
+        key = fingerprint_key(
+            source=server_key(src_conn), source_db=source_db, target=server_key(tgt_conn), target_db=target_db,
+            table=table, source_where=source_where, target_where=target_where, hash_cols=hash_cols,
+            algorithm=algorithm, range_size=range_size
+        )
+        previous = fingerprints.load(key)
+    if previous is not None:
+        boundaries = previous["boundaries"]
+    else:
+        boundaries = get_pk_boundaries(src_conn, source_db, table, pk, range_size, where_clause=source_where)
+
+    ranges = split_pk_ranges(boundaries)
+    recorded = []
+    for index, (lower, upper) in enumerate(ranges):
+        src_count, src_sum = get_range_checksum(
+            src_conn, source_db, table, hash_cols, pk, lower, upper, source_where, algorithm
+        )
+        tgt_count, tgt_sum = get_range_checksum(
+            tgt_conn, target_db, table, hash_cols, pk, lower, upper, target_where, algorithm
+        )
+        stats["ranges_checked"] += 1
+        fingerprint = (src_count, src_sum, tgt_count, tgt_sum)
+        if src_count == tgt_count and src_sum == tgt_sum:
+            diff, fetched = [], []
+        elif previous is not None and index in previous["ranges"] and previous["ranges"][index][0] == fingerprint:
+            fetched = previous["ranges"][index][1]
+            diff = []
+            for part in fetched:
+                diff.extend(_fetch_range(
+                    src_conn, tgt_conn, source_db, target_db, table, src_cols, pk, col_names, compare_cols,
+                    part, source_where, target_where, stats
+                ))
+            stats["ranges_reused"] += 1
+        else:
+            diff, fetched = _diff_range(
+                src_conn, tgt_conn, source_db, target_db, table, src_cols, pk, col_names, compare_cols,
+                lower, upper, src_count, tgt_count, source_where, target_where, min_range_rows, algorithm, stats
+            )
+        for kind, item in diff:
+            result[kind].append(item)
+        recorded.append((fingerprint, fetched))
+
+    if fingerprints is not None:
+        # Rows appended since the ranges were laid out all land in the last one; split it again
+        if max(recorded[-1][0][0], recorded[-1][0][2]) > RESPLIT_FACTOR * range_size:
+            tail = get_pk_boundaries(
+                src_conn, source_db, table, pk, range_size, where_clause=source_where, lower=ranges[-1][0]
+            )
+            boundaries = boundaries + tail
+            recorded = recorded[:-1] + [None] * (len(tail) + 1)
+        fingerprints.save(key, boundaries, recorded)
+
+    logging.info(f"Checksum compare of {table}: {stats}")
+    result["pk"] = pk
+    result["col_names"] = col_names
+    result["checksum_stats"] = stats
+    return result
+
+def iter_server_row_digests(
+    db_connection, db, table, pk, compare_cols, where_clause=None, chunk_size=DEFAULT_CHUNK_SIZE, algorithm="md5"
+):
+    """
+    Yields (pk, digest) per row, with the digest computed by the server (see row_hash_expr),
+    so only the PK columns and one integer per row cross the network. Pages by keyset like
+    iter_table_rows_by_pk.
+    """
+    pk_cols = pk_columns(pk)
+    pk_str = ", ".join(f"`{c}`" for c in pk_cols)
+    hash_expr = row_hash_expr(compare_cols, algorithm)
+    last_key = None
+    while True:
+        where_sql, params = pk_range_where(pk_cols, where_clause, last_key)
+        sql = (
+            f"SELECT {pk_str}, {hash_expr} FROM `{db}`.`{table}`{where_sql} "
+            f"ORDER BY {pk_str} LIMIT {int(chunk_size)}"
+        )
+        logging.debug(f"Executing SQL: {sql} with parameters: {params}")
+        try:
+            with sub_phase(PHASE_FETCH):
+                if where_clause and where_clause.strip():
+                    ensure_database(db_connection, db)
+                rows = [tuple(row) for row in db_connection.execute(text(sql), params)]
+                record_rows(rows)
+        except Exception as e:
+            raise DbToolsError(f"Failed to get row hashes for table {table} in db {db}: {e}")
+        for row in rows:
+            yield (row[0] if len(pk_cols) == 1 else row[:-1]), int(row[-1])
+        if len(rows) < chunk_size:
+            return
+        last_key = rows[-1][0] if len(pk_cols) == 1 else rows[-1][:-1]
+
+def compare_table_server_digests(
+    src_conn, tgt_conn, source_db, target_db, table, source_where=None, target_where=None,
+    chunk_size=DEFAULT_CHUNK_SIZE, algorithm="md5", src_schema=None, tgt_schema=None, report=None
+):
+    """
+    compare_table_content for BLOB/TEXT-heavy tables: both servers hash every row, only
+    (pk, digest) pairs are transferred and compared, and the full rows are fetched by PK
+    batch for the keys that are missing or whose digests differ.
+    Returns the same dict as compare_table_content.
+    """
+    with phase(report, table, PHASE_METADATA):
+        meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+    _, _, pk, col_names, compare_cols = meta
+    single_key = len(pk_columns(pk)) == 1
+    # Row fetches are timed as nested fetch phases
+    with phase(report, table, PHASE_DIFF):
+        src = collect_row_digests(
+            iter_server_row_digests(src_conn, source_db, table, pk, compare_cols, source_where, chunk_size, algorithm),
+            single_key, "Q"
+        )
+        tgt = collect_row_digests(
+            iter_server_row_digests(tgt_conn, target_db, table, pk, compare_cols, target_where, chunk_size, algorithm),
+            single_key, "Q"
+        )
+        mismatches = diff_row_digests(src, tgt)
+        logging.info(f"Server digest pass of {table}: {len(src[0])} source and {len(tgt[0])} target rows")
+        del src, tgt
+        result = fetch_digest_mismatches(
+            src_conn, tgt_conn, source_db, target_db, table, meta, mismatches, source_where, target_where
+        )
+    result["pk"] = pk
+    result["col_names"] = col_names
+    return result
@@ -0,0 +1,380 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
+from fnmatch import fnmatchcase
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from .shared import load_connections, DbToolsError
+from .submit_handler import (
+    DEFAULT_MAX_WORKERS,
+    compare_table_structure,
+    engine_pool_options,
+    generate_alter_table_sql,
+    get_row_count,
+    get_tables,
+    iter_tables_parallel,
+    load_compare_snapshots,
+)
+from .content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    compare_table_content,
+    sync_batch_bytes,
+)
+from .diff_export import write_upgrade_script
+from .checksum_compare import compare_table_checksums, compare_table_server_digests
+from .fingerprint_store import DEFAULT_FINGERPRINT_PATH, FingerprintStore
+from .incremental_compare import compare_table_incremental
+from .external_compare import compare_table_content_external
+from .sharded_compare import compare_table_sharded
+from .snapshot import SNAPSHOT_MODES
+from .row_count import COUNT_EXACT, COUNT_STRATEGIES
+from .compare_report import (
+    ALL_TABLES,
+    PHASE_COUNT,
+    PHASE_DIFF,
+    PHASE_METADATA,
+    CompareReport,
+    append_to_report_log,
+    phase,
+)
+
+EXIT_SAME = 0
+EXIT_DIFFERENT = 1
+EXIT_ERROR = 2
+
+CONTENT_NEVER = "never"
+CONTENT_ON_COUNT_DIFF = "on-count-diff"
+CONTENT_ALWAYS = "always"
+CONTENT_MODES = [CONTENT_NEVER, CONTENT_ON_COUNT_DIFF, CONTENT_ALWAYS]
+
+SYSTEM_DATABASES = {"information_schema", "mysql", "performance_schema", "sys"}
+GLOB_CHARS = "*?["
+
+def create_profile_engine(profile, **pool_options):
+    """
+    Creates an engine for a saved connection profile (see shared.load_connections), its pool
+    sized by pool_options (see submit_handler.engine_pool_options).
+    """
+    url = URL.create(
+        "mysql+pymysql",
+        username=profile.get("username"),
+        password=profile.get("password"),
+        host=profile.get("host", "127.0.0.1"),
+        port=int(profile.get("port", 3306)),
+    )
+    return create_engine(url, **(pool_options or engine_pool_options(DEFAULT_MAX_WORKERS)))
+
+def get_databases(db_connection):
+    try:
+        return [row[0] for row in db_connection.execute(text("SHOW DATABASES;"))]
+    except Exception as e:
+        raise DbToolsError(f"Failed to get databases: {e}")
+
+def match_names(names, patterns, exclude=None):
+    """Returns the names matching any of the glob patterns and none of exclude, in the order of names."""
+    exclude = exclude or []
+    return [
+        name for name in names
+        if any(fnmatchcase(name, p) for p in patterns) and not any(fnmatchcase(name, p) for p in exclude)
+    ]
+
+def resolve_database_pairs(src_conn, specs):
+    """
+    Turns "source_db[:target_db]" specs into (source_db, target_db) pairs.
+    A source_db glob (e.g. "shop_*") matches the source server's databases, each
+    compared with the target database of the same name.
+    """
+    pairs = []
+    src_dbs = None
+    for spec in specs:
+        source_db, _, target_db = spec.partition(":")
+        if any(c in source_db for c in GLOB_CHARS):
+            if target_db:
+                raise DbToolsError(f"A database glob can't name a target database: {spec}")
+            if src_dbs is None:
+                src_dbs = [db for db in get_databases(src_conn) if db not in SYSTEM_DATABASES]
+            pairs += [(db, db) for db in match_names(src_dbs, [source_db])]
+        else:
+            pairs.append((source_db, target_db or source_db))
+    return pairs
+
+def parse_where_clauses(items):
+    """Parses repeated TABLE=CLAUSE options into {table_glob: clause}."""
+    clauses = {}
+    for item in items or []:
+        table, sep, clause = item.partition("=")
+        if not sep or not table:
+            raise DbToolsError(f"Expected TABLE=CLAUSE, got: {item}")
+        clauses[table] = clause
+    return clauses
+
+def where_for(table, where_clauses):
+    for pattern, clause in where_clauses.items():
+        if fnmatchcase(table, pattern):
+            return clause
+    return None
+
+def write_sync_script(
+    script_dir, target_db, table, alter_sql, diff=None, auto_inc_cols=None, batch_bytes=None, upsert_updates=False,
+    compress=False, report=None
+):
+    """
+    Writes script_dir/target_db/table.sql (.sql.gz if compress) in the same layout as the UIs' upgrade
+    script, streaming the data sync of diff (a compare_table_content result) into the file. Returns its path.
+    """
+    path = os.path.join(script_dir, target_db, f"{table}.sql" + (".gz" if compress else ""))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_upgrade_script(path, table, alter_sql, diff, auto_inc_cols, batch_bytes, upsert_updates, report)
+    return path
+
+def compare_table_record(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema, options, report):
+    """
+    Compares one table present on both sides and returns its NDJSON record:
+    structure, row counts and, depending on options.content, the content diff sizes.
+    Writes the sync script when options.script_dir is set and something differs.
+    """
+    record = {"type": "table", "source_db": source_db, "target_db": target_db, "table": table}
+    started = time.perf_counter()
+    where_clause = where_for(table, options.where_clauses)
+    with phase(report, table, PHASE_METADATA):
+        src_cols = src_schema.columns(table)
+        tgt_cols = tgt_schema.columns(table)
+        src_constraints = src_schema.constraints(table)
+        tgt_constraints = tgt_schema.constraints(table)
+    with phase(report, table, PHASE_DIFF):
+        is_same, details = compare_table_structure(src_cols, tgt_cols, src_constraints, tgt_constraints)
+    record["structure"] = "same" if is_same else "different"
+    record["structure_diff"] = sorted(details)
+
+    with phase(report, table, PHASE_COUNT):
+        src_count, src_label = get_row_count(
+            src_conn, source_db, table, where_clause=where_clause, strategy=options.count_strategy, schema=src_schema
+        )
+        tgt_count, tgt_label = get_row_count(
+            tgt_conn, target_db, table, where_clause=where_clause, strategy=options.count_strategy, schema=tgt_schema
+        )
+    record["row_count"] = {"source": src_count, "target": tgt_count, "source_kind": src_label, "target_kind": tgt_label}
+
+    diff = None
+    counts_differ = src_count != tgt_count
+    if is_same and (options.content == CONTENT_ALWAYS or (options.content == CONTENT_ON_COUNT_DIFF and counts_differ)):
+        if options.incremental:
+            with phase(report, table, PHASE_DIFF):
+                diff = compare_table_incremental(
+                    src_conn, tgt_conn, source_db, target_db, table, options.fingerprint_store,
+                    watermark_column=options.watermark_column, source_where=where_clause, target_where=where_clause,
+                    chunk_size=options.chunk_size, src_schema=src_schema, tgt_schema=tgt_schema
+                )
+            record["incremental_stats"] = diff["incremental_stats"]
+        elif options.fingerprint_store is not None:
+            with phase(report, table, PHASE_DIFF):
+                diff = compare_table_checksums(
+                    src_conn, tgt_conn, source_db, target_db, table, source_where=where_clause,
+                    target_where=where_clause, fingerprints=options.fingerprint_store
+                )
+            record["checksum_stats"] = diff["checksum_stats"]
+        elif options.server_hash:
+            diff = compare_table_server_digests(
+                src_conn, tgt_conn, source_db, target_db, table, source_where=where_clause, target_where=where_clause,
+                chunk_size=options.chunk_size, src_schema=src_schema, tgt_schema=tgt_schema, report=report
+            )
+        elif options.processes:
+            with phase(report, table, PHASE_DIFF):
+                diff = compare_table_sharded(
+                    src_conn.engine, tgt_conn.engine, source_db, target_db, table, source_where=where_clause,
+                    target_where=where_clause, workers=options.processes, chunk_size=options.chunk_size,
+                    src_schema=src_schema, tgt_schema=tgt_schema, snapshot=options.snapshot
+                )
+        elif options.spill:
+            diff = compare_table_content_external(
+                src_conn, tgt_conn, source_db, target_db, table, source_where=where_clause, target_where=where_clause,
+                memory_budget=options.memory_budget * 1024 * 1024, temp_dir=options.spill_dir,
+                chunk_size=options.chunk_size, src_schema=src_schema, tgt_schema=tgt_schema, report=report
+            )
+        else:
+            diff = compare_table_content(
+                src_conn, tgt_conn, source_db, target_db, table, source_where=where_clause, target_where=where_clause,
+                chunk_size=options.chunk_size, src_schema=src_schema, tgt_schema=tgt_schema, report=report,
+                hash_only=options.hash_only
+            )
+        record["content"] = {kind: len(diff[kind]) for kind in ("missing_in_target", "missing_in_source", "values_different")}
+        content_differs = any(record["content"].values())
+    else:
+        record["content"] = None
+        content_differs = counts_differ
+    record["status"] = "same" if is_same and not content_differs else "different"
+
+    if options.script_dir and record["status"] == "different":
+        alter_sql = "" if is_same else generate_alter_table_sql(src_cols, tgt_cols, table)
+        if diff is not None and any(record["content"].values()):
+            auto_inc_cols = [col[0] for col in src_cols if "auto_increment" in str(col[5]).lower()]
+            record["script"] = write_sync_script(
+                options.script_dir, target_db, table, alter_sql, diff, auto_inc_cols,
+                batch_bytes=sync_batch_bytes(tgt_conn) if options.batch_sync else None,
+                upsert_updates=options.batch_sync, compress=options.compress_scripts, report=report
+            )
+        else:
+            record["script"] = write_sync_script(
+                options.script_dir, target_db, table, alter_sql, compress=options.compress_scripts
+            )
+    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return record
+
+def compare_database(src_engine, tgt_engine, source_db, target_db, options, report, emit):
+    """Compares the matching tables of one database pair, calling emit(record) for each table as it finishes."""
+    with src_engine.connect() as src_conn, tgt_engine.connect() as tgt_conn:
+        src_tables = match_names(get_tables(src_conn, source_db), options.tables, options.exclude)
+        tgt_tables = match_names(get_tables(tgt_conn, target_db), options.tables, options.exclude)
+        with phase(report, ALL_TABLES, PHASE_METADATA):
+            src_schema, tgt_schema = load_compare_snapshots(
+                src_conn, tgt_conn, source_db, target_db, sorted(set(src_tables) | set(tgt_tables))
+            )
+
+    base = {"type": "table", "source_db": source_db, "target_db": target_db}
+    common = [t for t in src_tables if tgt_schema.has_table(t)]
+    for table in src_tables:
+        if table not in common:
+            emit({**base, "table": table, "status": "missing_in_target"})
+    for table in tgt_tables:
+        if not src_schema.has_table(table):
+            emit({**base, "table": table, "status": "missing_in_source"})
+
+    def compare_one(src_conn, tgt_conn, table):
+        try:
+            return compare_table_record(
+                src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema, options, report
+            )
+        except DbToolsError as e:
+            return {**base, "table": table, "status": "error", "error": str(e)}
+
+    for _, record in iter_tables_parallel(
+        src_engine, tgt_engine, common, compare_one, options.workers, snapshot=options.snapshot
+    ):
+        emit(record)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="db-tools-cli",
+        description="Compare databases without a GUI and stream the results as NDJSON.",
+        epilog="Exit status: 0 no differences, 1 differences found, 2 errors."
+    )
+    parser.add_argument("databases", nargs="+", metavar="SOURCE_DB[:TARGET_DB]",
+                        help="Database pairs to compare; a source glob such as 'shop_*' compares same-named databases")
+    parser.add_argument("--source", required=True, help="Saved connection profile of the source server")
+    parser.add_argument("--target", help="Saved connection profile of the target server (default: --source)")
+    parser.add_argument("--tables", nargs="+", default=["*"], metavar="GLOB", help="Tables to compare (default: all)")
+    parser.add_argument("--exclude", nargs="+", default=[], metavar="GLOB", help="Tables to skip")
+    parser.add_argument("--where", action="append", metavar="TABLE=CLAUSE",
+                        help="WHERE clause for the tables matching TABLE (a glob); may be repeated")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Tables compared in parallel")
+    parser.add_argument("--snapshot", choices=SNAPSHOT_MODES,
+                        help="Start every worker session on a consistent snapshot so all tables are read at one point "
+                             "in time; 'locked' also holds a global read lock while the snapshots start")
+    parser.add_argument("--count-strategy", choices=COUNT_STRATEGIES, default=COUNT_EXACT)
+    parser.add_argument("--content", choices=CONTENT_MODES, default=CONTENT_ON_COUNT_DIFF,
+                        help="When to diff table content (default: when the row counts differ)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per query when diffing content")
+    parser.add_argument("--hash-only", action="store_true",
+                        help="Keep only a PK and a digest per row while diffing, then fetch the differing rows by PK")
+    parser.add_argument("--server-hash", action="store_true",
+                        help="Let the servers hash each row so only PKs and digests are transferred, "
+                             "then fetch the differing rows by PK")
+    parser.add_argument("--processes", type=int, default=0, metavar="N",
+                        help="Diff each table's content in N processes, one PK range each (for CPU-bound huge tables)")
+    parser.add_argument("--spill", action="store_true",
+                        help="Sort the rows in runs on disk and merge them, for tables larger than memory "
+                             "or whose PK order differs between the servers")
+    parser.add_argument("--memory-budget", type=int, default=64, metavar="MB", help="Sort buffer per side for --spill")
+    parser.add_argument("--spill-dir", help="Directory for the --spill temporary files (default: the system temp dir)")
+    parser.add_argument("--fingerprints", nargs="?", const=DEFAULT_FINGERPRINT_PATH, metavar="PATH",
+                        help="Diff content by PK range checksums and keep them in this local file, so the next run "
+                             f"doesn't bisect ranges that haven't changed again (default: {DEFAULT_FINGERPRINT_PATH})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only diff rows changed since the last run, by a watermark column kept in the --fingerprints "
+                             "file; deleted rows are found by a PK-only pass")
+    parser.add_argument("--watermark-column", metavar="COLUMN",
+                        help="Watermark column for --incremental (default: updated_at or similar, else the auto_increment column)")
+    parser.add_argument("--script-dir", help="Write a sync script per differing table to SCRIPT_DIR/TARGET_DB/TABLE.sql")
+    parser.add_argument("--compress-scripts", action="store_true", help="Gzip the sync scripts (TABLE.sql.gz)")
+    parser.add_argument("--batch-sync", action="store_true", help="Batch the sync SQL into multi-row statements")
+    parser.add_argument("--output", help="Write the NDJSON records here instead of stdout")
+    parser.add_argument("--report", help="Append the per-phase timing report to this JSON lines file")
+    parser.add_argument("--verbose", action="store_true", help="Log progress to stderr")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if options.verbose else logging.WARNING, stream=sys.stderr)
+
+    out = open(options.output, "w") if options.output else sys.stdout
+    out_lock = threading.Lock()
+    totals = {"same": 0, "different": 0, "missing_in_target": 0, "missing_in_source": 0, "error": 0}
+
+    def emit(record):
+        with out_lock:
+            if record["type"] == "table":
+                totals[record["status"]] += 1
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+
+    started = time.perf_counter()
+    engines = []
+    report = CompareReport(" ".join(options.databases))
+    exit_code = EXIT_SAME
+    options.fingerprint_store = None
+    try:
+        if options.fingerprints or options.incremental:
+            options.fingerprint_store = FingerprintStore(options.fingerprints or DEFAULT_FINGERPRINT_PATH)
+        options.where_clauses = parse_where_clauses(options.where)
+        connections = load_connections()
+        for name in filter(None, (options.source, options.target)):
+            if name not in connections:
+                raise DbToolsError(f"Unknown connection profile: {name}")
+        shared = not options.target or options.target == options.source
+        src_engine = create_profile_engine(
+            connections[options.source], **engine_pool_options(options.workers, shared=shared)
+        )
+        engines.append(src_engine)
+        if shared:
+            tgt_engine = src_engine
+        else:
+            tgt_engine = create_profile_engine(
+                connections[options.target], **engine_pool_options(options.workers, shared=False)
+            )
+            engines.append(tgt_engine)
+        with src_engine.connect() as src_conn:
+            pairs = resolve_database_pairs(src_conn, options.databases)
+        if not pairs:
+            raise DbToolsError("No databases matched")
+        for source_db, target_db in pairs:
+            logging.info(f"Comparing {source_db} -> {target_db}")
+            compare_database(src_engine, tgt_engine, source_db, target_db, options, report, emit)
+    except Exception as e:
+        emit({"type": "error", "error": str(e)})
+        exit_code = EXIT_ERROR
+    finally:
+        for engine in engines:
+            engine.dispose()
+        if options.fingerprint_store is not None:
+            options.fingerprint_store.close()
+
+    if exit_code == EXIT_SAME:
+        if totals["error"]:
+            exit_code = EXIT_ERROR
+        elif totals["different"] or totals["missing_in_target"] or totals["missing_in_source"]:
+            exit_code = EXIT_DIFFERENT
+    emit({"type": "summary", **totals, "elapsed_s": round(time.perf_counter() - started, 3), "exit_code": exit_code})
+    if options.report:
+        report.dump_jsonl(options.report)
+    append_to_report_log(report)
+    if out is not sys.stdout:
+        out.close()
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import json
+import time
+import threading
+
+PHASE_METADATA = "metadata"
+PHASE_COUNT = "count"
+PHASE_FETCH = "fetch"
+PHASE_DIFF = "diff"
+PHASE_SQL = "sql_generation"
+PHASES = [PHASE_METADATA, PHASE_COUNT, PHASE_FETCH, PHASE_DIFF, PHASE_SQL]
+
+# Table name used for work done for all selected tables at once (bulk metadata loads)
+ALL_TABLES = "*"
+# Rows sampled from each fetched batch to estimate the bytes transferred
+BYTES_SAMPLE_ROWS = 100
+# If set, the UIs append every finished report to this JSON lines file
+REPORT_LOG_ENV = "DB_TOOLS_REPORT_JSONL"
+
+# Per-thread stack of open phases: [stats, resumed_at, report, table]
+_local = threading.local()
+
+class PhaseStats:
+    __slots__ = ("wall_time", "queries", "rows", "bytes")
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {
+            "wall_time_s": round(self.wall_time, 6),
+            "queries": self.queries,
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+class CompareReport:
+    """
+    Per-table, per-phase wall time, query count, rows fetched and approximate bytes
+    transferred of a compare run. Pass it as report= to the compare entry points.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.created = datetime.now().isoformat(timespec="seconds")
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def stats(self, table, phase_name):
+        with self._lock:
+            return self._stats.setdefault(table, {}).setdefault(phase_name, PhaseStats())
+
+    def tables(self):
+        with self._lock:
+            return list(self._stats)
+
+    def table_phases(self, table):
+        """Returns {phase: stats dict} for the phases recorded for table, in PHASES order."""
+        with self._lock:
+            phases = dict(self._stats.get(table, {}))
+        order = PHASES + sorted(set(phases) - set(PHASES))
+        return {name: phases[name].as_dict() for name in order if name in phases}
+
+    def table_totals(self, table):
+        totals = {"wall_time_s": 0.0, "queries": 0, "rows": 0, "bytes": 0}
+        for stats in self.table_phases(table).values():
+            for key in totals:
+                totals[key] += stats[key]
+        totals["wall_time_s"] = round(totals["wall_time_s"], 6)
+        return totals
+
+    def summary(self, table):
+        """One-line summary for result tables, e.g. "1.23s, 14 queries, 20000 rows, 2.1 MB"."""
+        totals = self.table_totals(table)
+        return (
+            f"{totals['wall_time_s']:.2f}s, {totals['queries']} queries, "
+            f"{totals['rows']} rows, {totals['bytes'] / 1024 / 1024:.1f} MB"
+        )
+
+    def to_records(self):
+        return [
+            {"report": self.label, "created": self.created, "table": table, "phase": name, **stats}
+            for table in self.tables()
+            for name, stats in self.table_phases(table).items()
+        ]
+
+    def to_jsonl(self):
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.to_records())
+
+    def dump_jsonl(self, path):
+        """Appends the report to path, one JSON object per table and phase."""
+        with open(path, "a") as f:
+            f.write(self.to_jsonl())
+
+def append_to_report_log(report):
+    """Appends report to the JSON lines file named by $DB_TOOLS_REPORT_JSONL, if set."""
+    path = os.environ.get(REPORT_LOG_ENV)
+    if report is not None and path:
+        report.dump_jsonl(path)
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+@contextmanager
+def phase(report, table, name):
+    """
+    Times the block as phase name of table in report (a no-op if report is None).
+    Queries run on this thread and rows passed to record_rows are counted to the
+    innermost open phase; a nested phase pauses the clock of the one around it.
+    Don't keep a phase open across a yield.
+    """
+    if report is None:
+        yield None
+        return
+    stats = report.stats(table, name)
+    stack = _stack()
+    now = time.perf_counter()
+    if stack:
+        stack[-1][0].wall_time += now - stack[-1][1]
+    entry = [stats, now, report, table]
+    stack.append(entry)
+    try:
+        yield stats
+    finally:
+        now = time.perf_counter()
+        stack.pop()
+        stats.wall_time += now - entry[1]
+        if stack:
+            stack[-1][1] = now
+
+def sub_phase(name):
+    """Opens phase name for the report and table of the innermost open phase, if any."""
+    stack = _stack()
+    if not stack:
+        return phase(None, None, name)
+    return phase(stack[-1][2], stack[-1][3], name)
+
+def _value_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(str(value))
+
+def record_rows(rows):
+    """Counts fetched row tuples (and an estimate of their size) to the innermost open phase."""
+    stack = getattr(_local, "stack", None)
+    if not stack or not rows:
+        return
+    stats = stack[-1][0]
+    stats.rows += len(rows)
+    sample = rows[::max(1, len(rows) // BYTES_SAMPLE_ROWS)]
+    sample_bytes = sum(_value_bytes(value) for row in sample for value in row)
+    stats.bytes += int(sample_bytes * len(rows) / len(sample))
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1][0].queries += 1
+
+event.listen(Engine, "before_cursor_execute", _count_query)
@@ -1,14 +1,27 @@
 from sqlalchemy import text
 from deepdiff import DeepDiff
+from array import array
+from decimal import Decimal
+import hashlib
+import io
 import logging
 from .shared import DbToolsError
+from .session import ensure_database
+from .compare_report import PHASE_DIFF, PHASE_FETCH, PHASE_METADATA, PHASE_SQL, phase, record_rows, sub_phase
+
+# Rows fetched per query by the streaming (keyset-paginated) compare
+DEFAULT_CHUNK_SIZE = 10000
+# Primary keys per query when fetching rows by key
+DEFAULT_KEY_BATCH_SIZE = 1000
+# Share of the target's max_allowed_packet used for one batched sync statement
+DEFAULT_PACKET_FRACTION = 0.5
 
 def get_table_columns(db_connection, db, table):
     """
     Returns a list of tuples: (column_name, column_type, extra_info)
     """
     try:
-        db_connection.execute(text(f"USE `{db}`;"))
+        ensure_database(db_connection, db)
         result = db_connection.execute(text(f"SHOW COLUMNS FROM `{table}`;"))
         columns = [(row[0], row[1], row[5]) for row in result]  # (name, type, extra)
         return columns
@@ -20,7 +33,7 @@ def get_table_rows(db_connection, db, table, columns, where_clause=None):
     Returns (col_names, rows) for all columns (including auto_increment/PK columns).
     """
     try:
-        db_connection.execute(text(f"USE `{db}`;"))
+        ensure_database(db_connection, db)
         col_names = [col[0] for col in columns ]
         col_str = ", ".join(f"`{c}`" for c in col_names)
         sql = f"SELECT {col_str} FROM `{table}`"
@@ -29,6 +42,7 @@ def get_table_rows(db_connection, db, table, columns, where_clause=None):
             sql += f" WHERE {where_clause.strip()}"
         result = db_connection.execute(text(sql))
         rows = [tuple(row) for row in result]
+        record_rows(rows)
         return col_names, rows
     except Exception as e:
         raise DbToolsError(f"Failed to get rows for table {table} in db {db}: {e}")
@@ -39,7 +53,7 @@ def get_primary_key(db_connection, db, table):
     Returns a string for single PK, or a list for composite PKs, or None if no PK.
     """
     try:
-        db_connection.execute(text(f"USE `{db}`;"))
+        ensure_database(db_connection, db)
         result = db_connection.execute(
             text(f"SHOW KEYS FROM `{table}` WHERE Key_name = 'PRIMARY';")
         )
@@ -61,46 +75,293 @@ def get_primary_key(db_connection, db, table):
     except Exception as e:
         raise DbToolsError(f"Failed to get primary key for table {table} in db {db}: {e}")
 
-def compare_table_content(
-    src_conn, tgt_conn, source_db, target_db, table, 
-    source_where=None, target_where=None
+def pk_columns(pk):
+    """
+    Normalises a PK as returned by get_primary_key (str, list or None) into a list of column names.
+    """
+    if pk is None:
+        return []
+    return list(pk) if isinstance(pk, (list, tuple)) else [pk]
+
+def pk_condition(pk_cols, op, param_prefix):
+    """
+    Returns a SQL condition comparing the PK columns against bound parameters,
+    e.g. "(`a`, `b`) > (:last_0, :last_1)". Parameters are named f"{param_prefix}{i}".
+    """
+    if len(pk_cols) == 1:
+        return f"`{pk_cols[0]}` {op} :{param_prefix}0"
+    cols = ", ".join(f"`{c}`" for c in pk_cols)
+    params = ", ".join(f":{param_prefix}{i}" for i in range(len(pk_cols)))
+    return f"({cols}) {op} ({params})"
+
+def pk_params(key, param_prefix):
+    """
+    Returns the bound parameters for pk_condition from a PK value (scalar or tuple).
+    """
+    values = key if isinstance(key, tuple) else (key,)
+    return {f"{param_prefix}{i}": v for i, v in enumerate(values)}
+
+def pk_range_where(pk_cols, where_clause=None, lower=None, upper=None):
+    """
+    Builds a WHERE clause (including the keyword, or "" if empty) for the rows matching
+    where_clause with lower < pk <= upper. Either bound may be None for an open range.
+    Returns (sql, params).
+    """
+    conditions = []
+    params = {}
+    if where_clause and where_clause.strip():
+        conditions.append(f"({where_clause.strip()})")
+    if lower is not None:
+        conditions.append(pk_condition(pk_cols, ">", "lo_"))
+        params.update(pk_params(lower, "lo_"))
+    if upper is not None:
+        conditions.append(pk_condition(pk_cols, "<=", "hi_"))
+        params.update(pk_params(upper, "hi_"))
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+def iter_table_rows_by_pk(
+    db_connection, db, table, columns, pk, where_clause=None, chunk_size=DEFAULT_CHUNK_SIZE,
+    lower=None, upper=None
 ):
     """
-    Compare table content between source and target, using the actual PK from metadata.
-    Optional source_where and target_where clauses can be provided.
-    If PK is auto_increment, exclude it from content comparison.
+    Yields row tuples of the table ordered by PK, fetching chunk_size rows per query
+    using keyset pagination (WHERE pk > last_pk ORDER BY pk LIMIT n).
+    lower/upper optionally restrict the scan to the PK range lower < pk <= upper.
+    Uses fully qualified table names so several iterators can share one connection;
+    the session database is only switched (when needed) for a user WHERE clause,
+    which may refer to other tables unqualified.
     """
-    logging.info(f"Source WHERE: {source_where}, Target WHERE: {target_where}")
-    src_cols = get_table_columns(src_conn, source_db, table)
-    tgt_cols = get_table_columns(tgt_conn, target_db, table)
+    col_names = [col[0] for col in columns]
+    pk_cols = pk_columns(pk)
+    pk_idxs = [col_names.index(c) for c in pk_cols]
+    col_str = ", ".join(f"`{c}`" for c in col_names)
+    order_str = ", ".join(f"`{c}`" for c in pk_cols)
+    last_key = lower
+    while True:
+        where_sql, params = pk_range_where(pk_cols, where_clause, last_key, upper)
+        sql = f"SELECT {col_str} FROM `{db}`.`{table}`{where_sql}"
+        sql += f" ORDER BY {order_str} LIMIT {int(chunk_size)}"
+        logging.debug(f"Executing SQL: {sql} with parameters: {params}")
+        try:
+            with sub_phase(PHASE_FETCH):
+                if where_clause and where_clause.strip():
+                    ensure_database(db_connection, db)
+                rows = [tuple(row) for row in db_connection.execute(text(sql), params)]
+                record_rows(rows)
+        except Exception as e:
+            raise DbToolsError(f"Failed to get rows for table {table} in db {db}: {e}")
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_key = tuple(rows[-1][i] for i in pk_idxs)
+
+def fetch_rows_by_pk(db_connection, db, table, columns, pk, keys, where_clause=None, batch_size=DEFAULT_KEY_BATCH_SIZE):
+    """
+    Returns the row tuples of the table whose PK is in keys (PK values, or tuples for a
+    composite PK), fetched batch_size keys per query with WHERE pk IN (...).
+    """
+    col_names = [col[0] for col in columns]
+    pk_cols = pk_columns(pk)
+    col_str = ", ".join(f"`{c}`" for c in col_names)
+    if len(pk_cols) == 1:
+        key_str = f"`{pk_cols[0]}`"
+    else:
+        key_str = "(" + ", ".join(f"`{c}`" for c in pk_cols) + ")"
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), batch_size):
+        params = {}
+        placeholders = []
+        for i, key in enumerate(keys[start:start + batch_size]):
+            key_params = pk_params(key, f"k{i}_")
+            params.update(key_params)
+            names = ", ".join(f":{name}" for name in key_params)
+            placeholders.append(names if len(pk_cols) == 1 else f"({names})")
+        sql = f"SELECT {col_str} FROM `{db}`.`{table}` WHERE {key_str} IN ({', '.join(placeholders)})"
+        if where_clause and where_clause.strip():
+            sql += f" AND ({where_clause.strip()})"
+        try:
+            with sub_phase(PHASE_FETCH):
+                if where_clause and where_clause.strip():
+                    ensure_database(db_connection, db)
+                batch = [tuple(row) for row in db_connection.execute(text(sql), params)]
+                record_rows(batch)
+        except Exception as e:
+            raise DbToolsError(f"Failed to get rows by primary key for table {table} in db {db}: {e}")
+        rows.extend(batch)
+    return rows
+
+def merge_join_rows(src_rows, tgt_rows, col_names, pk, compare_cols=None):
+    """
+    Merge-joins two iterables of row tuples that are both sorted by PK.
+    Yields (kind, item) pairs where kind is "missing_in_target", "missing_in_source"
+    or "values_different", and item has the same shape as in compare_table_content.
+    Raises DbToolsError if a side is not in ascending PK order (e.g. a collation
+    that orders differently from Python), since the merge would be wrong.
+    """
+    pk_cols = pk_columns(pk)
+    pk_idxs = [col_names.index(c) for c in pk_cols]
+    compare_cols = col_names if compare_cols is None else compare_cols
+    cmp_idxs = [col_names.index(c) for c in compare_cols]
+
+    def key_of(row):
+        if len(pk_idxs) == 1:
+            return row[pk_idxs[0]]
+        return tuple(row[i] for i in pk_idxs)
+
+    def ordered(rows, side):
+        prev = None
+        for row in rows:
+            k = key_of(row)
+            if prev is not None and not prev < k:
+                raise DbToolsError(
+                    f"{side} rows are not in ascending primary key order ({prev!r} before {k!r})"
+                )
+            prev = k
+            yield k, row
+
+    src_iter = ordered(src_rows, "Source")
+    tgt_iter = ordered(tgt_rows, "Target")
+    src = next(src_iter, None)
+    tgt = next(tgt_iter, None)
+    while src is not None or tgt is not None:
+        if tgt is None or (src is not None and src[0] < tgt[0]):
+            yield "missing_in_target", dict(zip(col_names, src[1]))
+            src = next(src_iter, None)
+        elif src is None or tgt[0] < src[0]:
+            yield "missing_in_source", dict(zip(col_names, tgt[1]))
+            tgt = next(tgt_iter, None)
+        else:
+            src_row, tgt_row = src[1], tgt[1]
+            if any(src_row[i] != tgt_row[i] for i in cmp_idxs):
+                yield "values_different", {
+                    "pk": src[0],
+                    "source": dict(zip(col_names, src_row)),
+                    "target": dict(zip(col_names, tgt_row))
+                }
+            src = next(src_iter, None)
+            tgt = next(tgt_iter, None)
+
+def prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema=None, tgt_schema=None):
+    """
+    Loads and checks the metadata shared by the content compare modes.
+    If SchemaSnapshots are given, the metadata is read from them instead of the servers.
+    Returns (src_cols, tgt_cols, src_pk, col_names, compare_cols).
+    """
+    if src_schema is not None and tgt_schema is not None:
+        src_cols = src_schema.column_triples(table)
+        tgt_cols = tgt_schema.column_triples(table)
+    else:
+        src_cols = get_table_columns(src_conn, source_db, table)
+        tgt_cols = get_table_columns(tgt_conn, target_db, table)
 
     diff = DeepDiff(src_cols, tgt_cols, ignore_order=True)
     if diff:
         raise DbToolsError("Table structure is not identical")
 
-    # Get PK from metadata
-    src_pk = get_primary_key(src_conn, source_db, table)
+    if src_schema is not None:
+        src_pk = src_schema.primary_key(table)
+    else:
+        src_pk = get_primary_key(src_conn, source_db, table)
     if not src_pk:
         raise DbToolsError("No primary key found in table")
 
-    # Identify auto_increment columns
     auto_inc_cols = [col[0] for col in src_cols if "auto_increment" in col[2].lower()]
+    col_names = [col[0] for col in src_cols]
+    compare_cols = [c for c in col_names if c not in auto_inc_cols]
+    return src_cols, tgt_cols, src_pk, col_names, compare_cols
 
-    # Get rows (skip auto_increment columns for content comparison, but keep PK for mapping)
-    col_names, src_rows = get_table_rows(
-        src_conn, source_db, table, src_cols, where_clause=source_where
+def iter_table_content_diff(
+    src_conn, tgt_conn, source_db, target_db, table,
+    source_where=None, target_where=None, chunk_size=DEFAULT_CHUNK_SIZE, src_schema=None, tgt_schema=None
+):
+    """
+    Streaming variant of compare_table_content: reads both tables in PK order in
+    chunks of chunk_size rows and yields (kind, item) diffs as they are found
+    (see merge_join_rows). Memory is bounded by the chunk size, not the table size.
+    """
+    logging.info(f"Source WHERE: {source_where}, Target WHERE: {target_where}")
+    meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+    yield from _merge_table_content(
+        src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where, chunk_size
     )
-    _, tgt_rows = get_table_rows(
-        tgt_conn, target_db, table, tgt_cols, where_clause=target_where
+
+def _merge_table_content(src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where, chunk_size):
+    src_cols, _, src_pk, col_names, compare_cols = meta
+    src_rows = iter_table_rows_by_pk(
+        src_conn, source_db, table, src_cols, src_pk, where_clause=source_where, chunk_size=chunk_size
+    )
+    tgt_rows = iter_table_rows_by_pk(
+        tgt_conn, target_db, table, src_cols, src_pk, where_clause=target_where, chunk_size=chunk_size
     )
+    return merge_join_rows(src_rows, tgt_rows, col_names, src_pk, compare_cols)
 
+def compare_table_content(
+    src_conn, tgt_conn, source_db, target_db, table, 
+    source_where=None, target_where=None, chunk_size=None, src_schema=None, tgt_schema=None, report=None,
+    hash_only=False
+):
+    """
+    Compare table content between source and target, using the actual PK from metadata.
+    Optional source_where and target_where clauses can be provided.
+    If PK is auto_increment, exclude it from content comparison.
+    If chunk_size is given, both tables are streamed in PK order and merge-joined
+    (see iter_table_content_diff) instead of being loaded fully into memory.
+    With hash_only, only a PK and a digest per row are kept in memory and the full rows
+    of the differing keys are fetched afterwards (see compare_row_digests).
+    src_schema/tgt_schema (SchemaSnapshots) avoid re-reading the table metadata.
+    report (a CompareReport) records the metadata, fetch and diff phases.
+    """
+    logging.info(f"Source WHERE: {source_where}, Target WHERE: {target_where}")
+    with phase(report, table, PHASE_METADATA):
+        meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+    if hash_only:
+        with phase(report, table, PHASE_DIFF):
+            result = compare_row_digests(
+                src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where,
+                chunk_size or DEFAULT_CHUNK_SIZE
+            )
+        result["pk"] = meta[2]
+        result["col_names"] = meta[3]
+        return result
+    if chunk_size:
+        result = {"missing_in_target": [], "missing_in_source": [], "values_different": []}
+        # Row fetches inside the merge are timed as nested fetch phases
+        with phase(report, table, PHASE_DIFF):
+            for kind, item in _merge_table_content(
+                src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where, chunk_size
+            ):
+                result[kind].append(item)
+        result["pk"] = meta[2]
+        result["col_names"] = meta[3]
+        return result
+
+    src_cols, tgt_cols, src_pk, _, compare_cols = meta
+
+    # Get rows (skip auto_increment columns for content comparison, but keep PK for mapping)
+    with phase(report, table, PHASE_FETCH):
+        col_names, src_rows = get_table_rows(
+            src_conn, source_db, table, src_cols, where_clause=source_where
+        )
+        _, tgt_rows = get_table_rows(
+            tgt_conn, target_db, table, tgt_cols, where_clause=target_where
+        )
+    with phase(report, table, PHASE_DIFF):
+        result = _diff_loaded_rows(src_rows, tgt_rows, col_names, src_pk, compare_cols)
+    result["pk"] = src_pk
+    result["col_names"] = col_names
+    return result
+
+def _diff_loaded_rows(src_rows, tgt_rows, col_names, src_pk, compare_cols):
     # Support composite PKs
+    pk_idxs = [col_names.index(k) for k in pk_columns(src_pk)]
     def pk_tuple(row):
         if isinstance(src_pk, list):
-            idxs = [col_names.index(k) for k in src_pk]
-            return tuple(row[i] for i in idxs)
+            return tuple(row[i] for i in pk_idxs)
         else:
-            return row[col_names.index(src_pk)]
+            return row[pk_idxs[0]]
 
     src_dict = {pk_tuple(row): row for row in src_rows}
     tgt_dict = {pk_tuple(row): row for row in tgt_rows}
@@ -108,16 +369,15 @@ def compare_table_content(
     missing_in_target = [dict(zip(col_names, src_dict[k])) for k in src_dict if k not in tgt_dict]
     missing_in_source = [dict(zip(col_names, tgt_dict[k])) for k in tgt_dict if k not in src_dict]
     values_different = []
-    # Columns to compare (exclude auto_increment PK columns)
-    compare_cols = [c for c in col_names if c not in auto_inc_cols]
+    cmp_idxs = [col_names.index(c) for c in compare_cols]
 
     for k in src_dict:
         if k in tgt_dict:
             src_row = src_dict[k]
             tgt_row = tgt_dict[k]
             # Compare only non-auto_increment columns
-            src_comp = [src_row[col_names.index(c)] for c in compare_cols]
-            tgt_comp = [tgt_row[col_names.index(c)] for c in compare_cols]
+            src_comp = [src_row[i] for i in cmp_idxs]
+            tgt_comp = [tgt_row[i] for i in cmp_idxs]
             if src_comp != tgt_comp:
                 values_different.append({
                     "pk": k,
@@ -129,11 +389,306 @@ def compare_table_content(
         "missing_in_target": missing_in_target,
         "missing_in_source": missing_in_source,
         "values_different": values_different,
-        "pk": src_pk,
-        "col_names": col_names
     }
 
-def generate_content_sync_sql(col_names, missing_in_target, missing_in_source, table, values_different=None, pk=None, auto_inc_cols=None):
+def _digest_part(value):
+    """
+    Canonical bytes of one value for _row_digest: a type tag, the length and the encoding, so
+    values of different types or split differently across columns never encode alike. Integral
+    numbers encode as integers whatever their type, since 1, 1.0 and Decimal('1.0') compare equal.
+    """
+    if value is None:
+        return b"n"
+    if isinstance(value, int) or (
+        isinstance(value, float) and value.is_integer()
+    ) or (
+        isinstance(value, Decimal) and value.is_finite() and value == value.to_integral_value()
+    ):
+        data, tag = str(int(value)).encode(), b"i"
+    elif isinstance(value, Decimal):
+        data, tag = str(value.normalize()).encode(), b"d"
+    elif isinstance(value, float):
+        data, tag = repr(value).encode(), b"f"
+    elif isinstance(value, str):
+        data, tag = value.encode("utf-8", "surrogatepass"), b"s"
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data, tag = bytes(value), b"b"
+    else:
+        data, tag = repr(value).encode(), type(value).__name__.encode() + b":"
+    return tag + len(data).to_bytes(8, "little") + data
+
+def _row_digest(values):
+    """
+    64-bit BLAKE2b digest of a row's values (see _digest_part), as a signed integer so it fits
+    an array("q"). Equal digests mean equal rows up to a 2**-64 chance, and unlike hash() the
+    digest is the same in every process.
+    """
+    digest = hashlib.blake2b(b"".join(map(_digest_part, values)), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+def collect_row_digests(pairs, single_key, digest_typecode="q"):
+    """
+    Packs (key, digest) pairs into (keys, digests) sorted by key; keys is an array of 64-bit
+    integers when single_key and every key is such an integer (a list otherwise) and digests
+    is always an array, so a row costs 16 bytes instead of a tuple of all its values.
+    """
+    keys = array("q") if single_key else []
+    digests = array(digest_typecode)
+    for key, digest in pairs:
+        try:
+            keys.append(key)
+        except (TypeError, OverflowError):
+            # Not a (signed 64-bit) integer PK
+            keys = list(keys)
+            keys.append(key)
+        digests.append(digest)
+
+    # Rows come in the server's collation order; the merge needs Python's
+    if any(keys[i] >= keys[i + 1] for i in range(len(keys) - 1)):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        keys = array("q", (keys[i] for i in order)) if isinstance(keys, array) else [keys[i] for i in order]
+        digests = array(digest_typecode, (digests[i] for i in order))
+    return keys, digests
+
+def load_row_digests(db_connection, db, table, columns, pk, compare_cols, where_clause=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams the table and keeps only (PK, 64-bit digest of the compared columns) per row,
+    packed by collect_row_digests.
+    """
+    col_names = [col[0] for col in columns]
+    pk_idxs = [col_names.index(c) for c in pk_columns(pk)]
+    cmp_idxs = [col_names.index(c) for c in compare_cols]
+    rows = iter_table_rows_by_pk(db_connection, db, table, columns, pk, where_clause=where_clause, chunk_size=chunk_size)
+    return collect_row_digests(
+        (
+            (row[pk_idxs[0]] if len(pk_idxs) == 1 else tuple(row[i] for i in pk_idxs),
+             _row_digest(tuple(row[i] for i in cmp_idxs)))
+            for row in rows
+        ),
+        len(pk_idxs) == 1
+    )
+
+def diff_row_digests(src, tgt):
+    """
+    Merge-joins two (keys, digests) pairs from load_row_digests.
+    Returns (missing_in_target, missing_in_source, different) lists of keys.
+    """
+    src_keys, src_digests = src
+    tgt_keys, tgt_digests = tgt
+    missing_in_target, missing_in_source, different = [], [], []
+    i = j = 0
+    while i < len(src_keys) and j < len(tgt_keys):
+        if src_keys[i] < tgt_keys[j]:
+            missing_in_target.append(src_keys[i])
+            i += 1
+        elif tgt_keys[j] < src_keys[i]:
+            missing_in_source.append(tgt_keys[j])
+            j += 1
+        else:
+            if src_digests[i] != tgt_digests[j]:
+                different.append(src_keys[i])
+            i += 1
+            j += 1
+    missing_in_target.extend(src_keys[i:])
+    missing_in_source.extend(tgt_keys[j:])
+    return missing_in_target, missing_in_source, different
+
+def compare_row_digests(src_conn, tgt_conn, source_db, target_db, table, meta, source_where=None, target_where=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Hash-only content compare: a first pass keeps just (PK, digest) per row on both sides,
+    then the full rows are fetched by PK batch for the keys that are missing or whose digests
+    differ, and diffed as usual. Returns the dict of diff lists of compare_table_content.
+    """
+    src_cols, _, src_pk, col_names, compare_cols = meta
+    src = load_row_digests(src_conn, source_db, table, src_cols, src_pk, compare_cols, source_where, chunk_size)
+    tgt = load_row_digests(tgt_conn, target_db, table, src_cols, src_pk, compare_cols, target_where, chunk_size)
+    mismatches = diff_row_digests(src, tgt)
+    logging.info(f"Digest pass of {table}: {len(src[0])} source and {len(tgt[0])} target rows")
+    del src, tgt
+    return fetch_digest_mismatches(src_conn, tgt_conn, source_db, target_db, table, meta, mismatches, source_where, target_where)
+
+def fetch_digest_mismatches(src_conn, tgt_conn, source_db, target_db, table, meta, mismatches, source_where=None, target_where=None):
+    """
+    Second pass of the digest compares: fetches the full rows of the keys in mismatches
+    (as returned by diff_row_digests) by PK batch and diffs them.
+    Returns the dict of diff lists of compare_table_content.
+    """
+    src_cols, _, src_pk, col_names, compare_cols = meta
+    missing_in_target, missing_in_source, different = mismatches
+    logging.info(
+        f"Digest mismatches in {table}: {len(missing_in_target)} missing in target, "
+        f"{len(missing_in_source)} missing in source, {len(different)} different"
+    )
+    src_rows = fetch_rows_by_pk(src_conn, source_db, table, src_cols, src_pk, missing_in_target + different, source_where)
+    tgt_rows = fetch_rows_by_pk(tgt_conn, target_db, table, src_cols, src_pk, missing_in_source + different, target_where)
+    return _diff_loaded_rows(src_rows, tgt_rows, col_names, src_pk, compare_cols)
+
+def sql_literal(value):
+    """
+    Renders a value as a SQL literal the way the sync scripts always have: NULL or a quoted string.
+    """
+    if value is None:
+        return "NULL"
+    return "'" + str(value).replace("'", "\\'") + "'"
+
+def get_max_allowed_packet(db_connection):
+    try:
+        return int(db_connection.execute(text("SELECT @@max_allowed_packet")).scalar())
+    except Exception as e:
+        raise DbToolsError(f"Failed to get max_allowed_packet: {e}")
+
+def sync_batch_bytes(db_connection, fraction=DEFAULT_PACKET_FRACTION):
+    """
+    Byte budget for batched sync statements: a fraction of the target's max_allowed_packet,
+    leaving headroom for the protocol and multi-byte character expansion.
+    """
+    return int(get_max_allowed_packet(db_connection) * fraction)
+
+class _StatementBatch:
+    """
+    Joins SQL fragments into statements prefix + "item,item,..." + suffix, each at most
+    batch_bytes long (a single oversized item still gets its own statement), handing every
+    full statement to emit so only the current batch is held in memory.
+    """
+
+    def __init__(self, prefix, suffix, batch_bytes, emit):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.batch_bytes = batch_bytes
+        self.emit = emit
+        self.base_size = len(prefix.encode()) + len(suffix.encode())
+        self.batch = []
+        self.size = self.base_size
+
+    def add(self, item):
+        item_size = len(item.encode()) + 1
+        if self.batch and self.size + item_size > self.batch_bytes:
+            self.flush()
+        self.batch.append(item)
+        self.size += item_size
+
+    def flush(self):
+        if self.batch:
+            self.emit(self.prefix + ",".join(self.batch) + self.suffix)
+            self.batch = []
+            self.size = self.base_size
+
+class SyncSqlWriter:
+    """
+    Writes the content sync SQL (see generate_content_sync_sql) to the text file f as the diffs
+    are fed in with write(kind, item), kind being one of "missing_in_target", "missing_in_source"
+    and "values_different". Statements are separated by newlines; with batch_bytes only the
+    pending batch of each kind is held in memory. Batches are written when full, on flush() and
+    on close(), which writes "-- No content sync needed" if no statement was written.
+    Does not close f.
+    """
+
+    def __init__(self, f, col_names, table, pk=None, auto_inc_cols=None, batch_bytes=None, upsert_updates=False):
+        auto_inc_cols = auto_inc_cols or []
+        self.f = f
+        self.table = table
+        self.pk_cols = pk_columns(pk)
+        self.col_names = [c for c in col_names if c not in auto_inc_cols]
+        self.set_cols = [c for c in self.col_names if c not in self.pk_cols]
+        self.batch_bytes = batch_bytes
+        self.statements = 0
+        self._batches = {}
+        if batch_bytes:
+            self._init_batches(upsert_updates)
+
+    def _init_batches(self, upsert_updates):
+        table, pk_cols = self.table, self.pk_cols
+        cols = ", ".join(f"`{c}`" for c in self.col_names)
+        self._batches["missing_in_target"] = _StatementBatch(
+            f"INSERT INTO `{table}` ({cols}) VALUES ", ";", self.batch_bytes, self._emit
+        )
+        if pk_cols:
+            if len(pk_cols) == 1:
+                delete_prefix = f"DELETE FROM `{table}` WHERE `{pk_cols[0]}` IN ("
+            else:
+                delete_prefix = f"DELETE FROM `{table}` WHERE ({', '.join(f'`{c}`' for c in pk_cols)}) IN ("
+            self._batches["missing_in_source"] = _StatementBatch(delete_prefix, ");", self.batch_bytes, self._emit)
+        if upsert_updates and pk_cols and self.set_cols:
+            # PK columns must be listed for ON DUPLICATE KEY to match the rows, even if auto_increment
+            upsert_cols_str = ", ".join(f"`{c}`" for c in pk_cols + self.set_cols)
+            update_str = ", ".join(f"`{c}`=VALUES(`{c}`)" for c in self.set_cols)
+            self._batches["values_different"] = _StatementBatch(
+                f"INSERT INTO `{table}` ({upsert_cols_str}) VALUES ",
+                f" ON DUPLICATE KEY UPDATE {update_str};", self.batch_bytes, self._emit
+            )
+
+    def _emit(self, stmt):
+        if self.statements:
+            self.f.write("\n")
+        self.f.write(stmt)
+        self.statements += 1
+
+    def _values(self, row, columns):
+        return ", ".join(sql_literal(row[c]) for c in columns)
+
+    def _where(self, row):
+        return " AND ".join(f"`{c}`={sql_literal(row[c])}" for c in self.pk_cols)
+
+    def write(self, kind, item):
+        if kind == "missing_in_target":
+            if self.batch_bytes:
+                self._batches[kind].add(f"({self._values(item, self.col_names)})")
+            else:
+                cols = ", ".join(f"`{c}`" for c in self.col_names)
+                self._emit(f"INSERT INTO `{self.table}` ({cols}) VALUES ({self._values(item, self.col_names)});")
+        elif not self.pk_cols:
+            # Rows can only be deleted or updated by PK
+            return
+        elif kind == "missing_in_source":
+            if self.batch_bytes:
+                key = self._values(item, self.pk_cols)
+                self._batches[kind].add(key if len(self.pk_cols) == 1 else f"({key})")
+            else:
+                self._emit(f"DELETE FROM `{self.table}` WHERE {self._where(item)};")
+        elif kind == "values_different":
+            source = item["source"]
+            if kind in self._batches:
+                self._batches[kind].add(f"({self._values(source, self.pk_cols + self.set_cols)})")
+            else:
+                set_clause = ", ".join(f"`{c}`={sql_literal(source[c])}" for c in self.set_cols)
+                self._emit(f"UPDATE `{self.table}` SET {set_clause} WHERE {self._where(source)};")
+        else:
+            raise DbToolsError(f"Unknown diff kind: {kind}")
+
+    def flush(self):
+        """Writes out the pending batches."""
+        for batch in self._batches.values():
+            batch.flush()
+
+    def close(self):
+        self.flush()
+        if not self.statements:
+            self.f.write("-- No content sync needed")
+
+def write_content_sync_sql(
+    f, col_names, missing_in_target, missing_in_source, table, values_different=None, pk=None, auto_inc_cols=None,
+    batch_bytes=None, upsert_updates=False
+):
+    """
+    Writes the statements of generate_content_sync_sql to the text file f as they are built,
+    so a large script never has to fit in memory as one string.
+    """
+    writer = SyncSqlWriter(f, col_names, table, pk, auto_inc_cols, batch_bytes, upsert_updates)
+    for kind, items in (
+        ("missing_in_target", missing_in_target),
+        ("missing_in_source", missing_in_source),
+        ("values_different", values_different or []),
+    ):
+        for item in items:
+            writer.write(kind, item)
+        # Keep all statements of one kind together
+        writer.flush()
+    writer.close()
+
+def generate_content_sync_sql(
+    col_names, missing_in_target, missing_in_source, table, values_different=None, pk=None, auto_inc_cols=None,
+    batch_bytes=None, upsert_updates=False, report=None
+):
     """
     Generate SQL to sync content:
     - Insert missing_in_target into target
@@ -141,44 +696,20 @@ def generate_content_sync_sql(col_names, missing_in_target, missing_in_source, t
     - Update values_different in target
     Excludes auto-increment columns from INSERT/UPDATE.
     Supports composite primary keys.
+    If batch_bytes is given (see sync_batch_bytes), rows are grouped into multi-row
+    INSERT ... VALUES (...),(...) and DELETE ... WHERE pk IN (...) statements of at most
+    that many bytes; with upsert_updates, changed rows are batched the same way as
+    INSERT ... ON DUPLICATE KEY UPDATE instead of one UPDATE per row.
+    report (a CompareReport) records the time under the sql_generation phase.
+    To write a large script to a file instead, use write_content_sync_sql.
     """
-    auto_inc_cols = auto_inc_cols or []
-    filtered_col_names = [c for c in col_names if c not in auto_inc_cols]
-    stmts = []
-    # Insert statements
-    for row in missing_in_target:
-        cols = ", ".join(f"`{c}`" for c in filtered_col_names)
-        vals = ", ".join(f"'{str(row[c]).replace('\'', '\\\'')}'" if row[c] is not None else "NULL" for c in filtered_col_names)
-        stmts.append(f"INSERT INTO `{table}` ({cols}) VALUES ({vals});")
-    # Delete statements (use PK columns for WHERE)
-    for row in missing_in_source:
-        if isinstance(pk, list):
-            where = " AND ".join(
-                f"`{c}`={'NULL' if row[c] is None else f'\'{str(row[c]).replace('\'', '\\\'')}\''}" for c in pk
-            )
-        else:
-            where = f"`{pk}`={'NULL' if row[pk] is None else f'\'{str(row[pk]).replace('\'', '\\\'')}\''}"
-        stmts.append(f"DELETE FROM `{table}` WHERE {where};")
-    # Update statements for values_different
-    if values_different and pk:
-        for diff in values_different:
-            # Exclude PK columns from SET clause
-            if isinstance(pk, list):
-                set_clause = ", ".join(
-                    f"`{c}`={'NULL' if diff['source'][c] is None else f'\'{str(diff['source'][c]).replace('\'', '\\\'')}\''}"
-                    for c in filtered_col_names if c not in pk
-                )
-                where = " AND ".join(
-                    f"`{c}`={'NULL' if diff['source'][c] is None else f'\'{str(diff['source'][c]).replace('\'', '\\\'')}\''}" for c in pk
-                )
-            else:
-                set_clause = ", ".join(
-                    f"`{c}`={'NULL' if diff['source'][c] is None else f'\'{str(diff['source'][c]).replace('\'', '\\\'')}\''}"
-                    for c in filtered_col_names if c != pk
-                )
-                where = f"`{pk}`={'NULL' if diff['source'][pk] is None else f'\'{str(diff['source'][pk]).replace('\'', '\\\'')}\''}"
-            stmts.append(f"UPDATE `{table}` SET {set_clause} WHERE {where};")
-    return "\n".join(stmts) if stmts else "-- No content sync needed"
+    with phase(report, table, PHASE_SQL):
+        out = io.StringIO()
+        write_content_sync_sql(
+            out, col_names, missing_in_target, missing_in_source, table, values_different, pk, auto_inc_cols,
+            batch_bytes, upsert_updates
+        )
+        return out.getvalue()
 
 # Example usage:
 # diff = compare_table_content(db_connection, "src_db", "tgt_db", "mytable")
@@ -0,0 +1,213 @@
+import gzip
+import json
+import logging
+from .shared import DbToolsError
+from .compare_report import PHASE_DIFF, PHASE_SQL, phase
+from .content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    SyncSqlWriter,
+    _merge_table_content,
+    pk_columns,
+    prepare_content_compare,
+    write_content_sync_sql,
+)
+from .diff_view import DIFF_KINDS
+
+# Export formats, picked from the file name by export_format
+EXPORT_NDJSON = "ndjson"
+EXPORT_PARQUET = "parquet"
+EXPORT_SQL = "sql"
+EXPORT_FORMATS = [EXPORT_NDJSON, EXPORT_PARQUET, EXPORT_SQL]
+EXPORT_SUFFIXES = {
+    ".ndjson": EXPORT_NDJSON,
+    ".jsonl": EXPORT_NDJSON,
+    ".parquet": EXPORT_PARQUET,
+    ".sql": EXPORT_SQL,
+}
+
+# Diffs buffered per Parquet row group
+DEFAULT_PARQUET_BATCH_ROWS = 10000
+# Differing rows up to which the UIs show the sync SQL inline; larger scripts are only saved to a file
+INLINE_DIFF_LIMIT = 10000
+
+def export_format(path):
+    """Returns the export format of a file name by its suffix; NDJSON and SQL may be gzipped (.gz)."""
+    name = str(path).lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    for suffix, fmt in EXPORT_SUFFIXES.items():
+        if name.endswith(suffix) and not (compressed and fmt == EXPORT_PARQUET):
+            return fmt
+    raise DbToolsError(f"Unknown export format for {path}, expected one of {', '.join(EXPORT_SUFFIXES)} (optionally .gz)")
+
+def open_text_output(path):
+    """Opens path for writing text, gzip-compressed if it ends in .gz."""
+    if str(path).lower().endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+def _diff_key(kind, item, pk_cols):
+    if kind == "values_different":
+        return item["pk"]
+    key = tuple(item.get(c) for c in pk_cols)
+    return key[0] if len(key) == 1 else key
+
+def write_diffs_ndjson(diffs, f, pk=None):
+    """
+    Writes (kind, item) diffs to the text file f as they come, one JSON object per line with the
+    keys kind, key, source and target (source is null for missing_in_source rows, target for
+    missing_in_target rows). Values JSON cannot hold (dates, decimals, bytes) are written as strings.
+    Returns the number of diffs per kind.
+    """
+    pk_cols = pk_columns(pk)
+    counts = dict.fromkeys(DIFF_KINDS, 0)
+    for kind, item in diffs:
+        if kind == "values_different":
+            source, target = item["source"], item["target"]
+        else:
+            source = item if kind == "missing_in_target" else None
+            target = item if kind == "missing_in_source" else None
+        record = {"kind": kind, "key": _diff_key(kind, item, pk_cols), "source": source, "target": target}
+        f.write(json.dumps(record, default=str) + "\n")
+        counts[kind] += 1
+    return counts
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise DbToolsError("Parquet export needs the pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+def write_diffs_parquet(diffs, path, col_names, pk=None, batch_rows=DEFAULT_PARQUET_BATCH_ROWS):
+    """
+    Writes (kind, item) diffs to a Parquet file, one row group per batch_rows diffs, so only one
+    row group is held in memory. The columns are kind, key and source.<column> / target.<column>
+    for every table column, all as strings (null where the side has no row), since the two
+    servers may disagree on the column types. Needs pyarrow. Returns the number of diffs per kind.
+    """
+    pa = _import_pyarrow()
+    pk_cols = pk_columns(pk)
+    names = ["kind", "key"] + [f"source.{c}" for c in col_names] + [f"target.{c}" for c in col_names]
+    schema = pa.schema([(name, pa.string()) for name in names])
+    counts = dict.fromkeys(DIFF_KINDS, 0)
+    columns = {name: [] for name in names}
+
+    def add_side(side, row):
+        for c in col_names:
+            value = None if row is None else row.get(c)
+            columns[f"{side}.{c}"].append(None if value is None else str(value))
+
+    with pa.parquet.ParquetWriter(path, schema) as writer:
+        def write_batch():
+            writer.write_table(pa.table(columns, schema=schema))
+            for values in columns.values():
+                values.clear()
+
+        for kind, item in diffs:
+            if kind == "values_different":
+                source, target = item["source"], item["target"]
+            else:
+                source = item if kind == "missing_in_target" else None
+                target = item if kind == "missing_in_source" else None
+            columns["kind"].append(kind)
+            columns["key"].append(str(_diff_key(kind, item, pk_cols)))
+            add_side("source", source)
+            add_side("target", target)
+            counts[kind] += 1
+            if len(columns["kind"]) >= batch_rows:
+                write_batch()
+        if columns["kind"] or not any(counts.values()):
+            write_batch()
+    return counts
+
+def write_sync_sql(diffs, f, col_names, table, pk=None, auto_inc_cols=None, batch_bytes=None, upsert_updates=False):
+    """
+    Writes the sync SQL of (kind, item) diffs to the text file f with a SyncSqlWriter as they come.
+    Unlike generate_content_sync_sql, statements follow the order of the diffs, so inserts, deletes
+    and updates may interleave; each statement is still correct on its own.
+    Returns the number of diffs per kind.
+    """
+    counts = dict.fromkeys(DIFF_KINDS, 0)
+    writer = SyncSqlWriter(f, col_names, table, pk, auto_inc_cols, batch_bytes, upsert_updates)
+    for kind, item in diffs:
+        writer.write(kind, item)
+        counts[kind] += 1
+    writer.close()
+    f.write("\n")
+    return counts
+
+def upgrade_script_header(alter_sql=None, data_sync=True):
+    """The start of an upgrade script, up to where the data sync statements go."""
+    header = "-- Upgrade Script\n"
+    if alter_sql:
+        header += f"\n-- Structure Upgrade\n{alter_sql}\n"
+    if data_sync:
+        header += "\n-- Data Sync\n"
+    return header
+
+def write_upgrade_script(
+    path, table, alter_sql, diff=None, auto_inc_cols=None, batch_bytes=None, upsert_updates=False, report=None
+):
+    """
+    Writes an upgrade script (the layout of the UIs' script window) to path, gzipped if it ends
+    in .gz, streaming the data sync of diff (a compare_table_content result) into the file.
+    """
+    with open_text_output(path) as f:
+        f.write(upgrade_script_header(alter_sql, diff is not None))
+        if diff is not None:
+            with phase(report, table, PHASE_SQL):
+                write_content_sync_sql(
+                    f, diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], table,
+                    diff["values_different"], diff["pk"], auto_inc_cols, batch_bytes, upsert_updates
+                )
+            f.write("\n")
+
+def diff_size(diff):
+    """Number of differing rows in a compare_table_content result."""
+    return sum(len(diff[kind]) for kind in DIFF_KINDS)
+
+def export_diffs(diffs, path, col_names, table, pk=None, auto_inc_cols=None, batch_bytes=None, upsert_updates=False, header=None):
+    """
+    Streams (kind, item) diffs to path in the format of its suffix (see export_format): the diffs
+    themselves as NDJSON or Parquet, or the sync SQL. header (SQL only) is written before the
+    statements, e.g. the structure upgrade. Returns the number of diffs per kind.
+    """
+    fmt = export_format(path)
+    if fmt == EXPORT_PARQUET:
+        return write_diffs_parquet(diffs, path, col_names, pk)
+    with open_text_output(path) as f:
+        if fmt == EXPORT_NDJSON:
+            return write_diffs_ndjson(diffs, f, pk)
+        if header:
+            f.write(header)
+        return write_sync_sql(diffs, f, col_names, table, pk, auto_inc_cols, batch_bytes, upsert_updates)
+
+def export_table_diff(
+    src_conn, tgt_conn, source_db, target_db, table, path, source_where=None, target_where=None,
+    chunk_size=DEFAULT_CHUNK_SIZE, src_schema=None, tgt_schema=None, auto_inc_cols=None, batch_bytes=None,
+    upsert_updates=False, header=None, report=None
+):
+    """
+    Diffs the table content with a streaming merge and writes each diff to path as soon as it is
+    found (see export_diffs), so memory stays flat however many rows differ.
+    Returns the number of diffs per kind.
+    """
+    with phase(report, table, PHASE_DIFF):
+        meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+        pk, col_names = meta[2], meta[3]
+        diffs = _merge_table_content(
+            src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where, chunk_size
+        )
+        try:
+            counts = export_diffs(diffs, path, col_names, table, pk, auto_inc_cols, batch_bytes, upsert_updates, header)
+        except DbToolsError:
+            raise
+        except Exception as e:
+            raise DbToolsError(f"Failed to export the content diff of {table} to {path}: {e}")
+        finally:
+            diffs.close()
+    logging.info(f"Exported the content diff of {table} to {path}: {counts}")
+    return counts
@@ -0,0 +1,157 @@
+import logging
+import threading
+from .shared import DbToolsError
+from .compare_report import PHASE_DIFF, phase
+from .content_compare import DEFAULT_CHUNK_SIZE, _merge_table_content, pk_columns, prepare_content_compare
+
+DIFF_KINDS = ["missing_in_target", "missing_in_source", "values_different"]
+DIFF_KIND_LABELS = {
+    "missing_in_target": "Missing in target",
+    "missing_in_source": "Missing in source",
+    "values_different": "Values different",
+}
+# Rows per page of the diff viewers
+DEFAULT_PAGE_SIZE = 200
+
+def _format_values(row, columns):
+    return ", ".join(f"{c}={row[c]!r}" for c in columns)
+
+class DiffPager:
+    """
+    Collects content diffs as they arrive (add may be called from a producer thread while
+    the viewer reads pages) and serves them a page at a time, filtered by diff kind and by
+    differing column (which only values_different rows have). Filtered views are indexed
+    incrementally: each new diff is checked once per filter, so switching filters or pages
+    never re-runs the compare.
+    """
+
+    def __init__(self, pk=None, col_names=None):
+        self.pk = pk
+        self.col_names = list(col_names or [])
+        self.done = False
+        self.error = None
+        self._entries = []
+        self._filters = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_result(cls, diff):
+        """Wraps a finished compare_table_content result."""
+        pager = cls(diff["pk"], diff["col_names"])
+        for kind in DIFF_KINDS:
+            for item in diff[kind]:
+                pager.add(kind, item)
+        pager.finish()
+        return pager
+
+    def add(self, kind, item):
+        if kind == "values_different":
+            changed = tuple(c for c in self.col_names if item["source"].get(c) != item["target"].get(c))
+        else:
+            changed = ()
+        with self._lock:
+            self._entries.append((kind, item, changed))
+
+    def finish(self, error=None):
+        self.error = error
+        self.done = True
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _matches(self, entry, kinds, column):
+        kind, _, changed = entry
+        return kind in kinds and (column is None or column in changed)
+
+    def _filtered(self, kinds=None, column=None):
+        """Returns the entry indices matching the filter, extending its index with the new entries."""
+        kinds = frozenset(kinds or DIFF_KINDS)
+        with self._lock:
+            scanned, indices = self._filters.get((kinds, column), (0, []))
+            for i in range(scanned, len(self._entries)):
+                if self._matches(self._entries[i], kinds, column):
+                    indices.append(i)
+            self._filters[(kinds, column)] = (len(self._entries), indices)
+            return indices
+
+    def count(self, kinds=None, column=None):
+        return len(self._filtered(kinds, column))
+
+    def counts(self):
+        """Number of diffs so far per kind."""
+        return {kind: self.count([kind]) for kind in DIFF_KINDS}
+
+    def page(self, number, page_size=DEFAULT_PAGE_SIZE, kinds=None, column=None):
+        """
+        Returns the rows of page number (from 0) of the filtered diffs as dicts with the keys
+        Type, Key, Columns, Source and Target; values_different rows only show the changed columns.
+        """
+        indices = self._filtered(kinds, column)[number * page_size:(number + 1) * page_size]
+        with self._lock:
+            entries = [self._entries[i] for i in indices]
+        return [self.describe(*entry) for entry in entries]
+
+    def describe(self, kind, item, changed=()):
+        pk_cols = pk_columns(self.pk)
+        if kind == "values_different":
+            return {
+                "Type": DIFF_KIND_LABELS[kind],
+                "Key": str(item["pk"]),
+                "Columns": ", ".join(changed),
+                "Source": _format_values(item["source"], changed),
+                "Target": _format_values(item["target"], changed),
+            }
+        key = tuple(item.get(c) for c in pk_cols)
+        values = _format_values(item, [c for c in self.col_names if c not in pk_cols])
+        return {
+            "Type": DIFF_KIND_LABELS[kind],
+            "Key": str(key[0] if len(key) == 1 else key),
+            "Columns": "",
+            "Source": values if kind == "missing_in_target" else "",
+            "Target": values if kind == "missing_in_source" else "",
+        }
+
+def page_count(total, page_size=DEFAULT_PAGE_SIZE):
+    return max(1, -(-total // page_size))
+
+def stream_table_diff(
+    src_engine, tgt_engine, source_db, target_db, table, source_where=None, target_where=None,
+    chunk_size=DEFAULT_CHUNK_SIZE, src_schema=None, tgt_schema=None, report=None
+):
+    """
+    Starts diffing the table content on a background thread, on new connections from the
+    engines, and returns at once a DiffPager that fills up as the diffs are found (its pk and
+    col_names are set once the metadata is loaded). The thread stops early when the pager is
+    cancelled; pager.error holds the message if the compare failed.
+    """
+    pager = DiffPager()
+
+    def run():
+        try:
+            with src_engine.connect() as src_conn, tgt_engine.connect() as tgt_conn, phase(report, table, PHASE_DIFF):
+                meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+                pager.pk, pager.col_names = meta[2], meta[3]
+                diffs = _merge_table_content(
+                    src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where, chunk_size
+                )
+                try:
+                    for kind, item in diffs:
+                        if pager.cancelled:
+                            break
+                        pager.add(kind, item)
+                finally:
+                    diffs.close()
+            pager.finish()
+        except DbToolsError as e:
+            pager.finish(str(e))
+        except Exception as e:
+            logging.exception(f"Streaming the content diff of {table} failed")
+            pager.finish(str(e))
+
+    threading.Thread(target=run, daemon=True, name=f"diff-{table}").start()
+    return pager
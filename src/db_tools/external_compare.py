@@ -0,0 +1,210 @@
+from sqlalchemy import text
+from operator import itemgetter
+import heapq
+import logging
+import os
+import pickle
+import tempfile
+from .shared import DbToolsError
+from .session import ensure_database
+from .compare_report import PHASE_DIFF, PHASE_FETCH, PHASE_METADATA, phase, record_rows
+from .content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    _row_digest,
+    pk_columns,
+    prepare_content_compare,
+)
+
+# Bytes of sort buffer per side before a sorted run is written to disk
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Rough in-memory size of one (key, digest, offset) entry in the sort buffer
+ENTRY_BYTES = 200
+# Entries pickled together in a run file
+RUN_BLOCK_SIZE = 1000
+
+class SpilledSide:
+    """
+    One side of an external-memory compare: every row pickled to a row file, and the
+    (key, digest, row offset) entries in sorted run files of at most run_size entries.
+    """
+
+    def __init__(self, work_dir, name, run_size):
+        self.work_dir = work_dir
+        self.name = name
+        self.run_size = run_size
+        self.rows = 0
+        self.run_paths = []
+        self._buffer = []
+        self._row_file = open(os.path.join(work_dir, f"{name}.rows"), "w+b")
+
+    def add(self, key, digest, row):
+        offset = self._row_file.tell()
+        pickle.dump(row, self._row_file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._buffer.append((key, digest, offset))
+        self.rows += 1
+        if len(self._buffer) >= self.run_size:
+            self._write_run()
+
+    def _write_run(self):
+        if not self._buffer:
+            return
+        self._buffer.sort(key=itemgetter(0))
+        path = os.path.join(self.work_dir, f"{self.name}.run{len(self.run_paths)}")
+        with open(path, "wb") as f:
+            for start in range(0, len(self._buffer), RUN_BLOCK_SIZE):
+                pickle.dump(self._buffer[start:start + RUN_BLOCK_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.run_paths.append(path)
+        self._buffer = []
+
+    def finish(self):
+        self._write_run()
+        self._row_file.flush()
+        logging.debug(f"Spilled {self.rows} {self.name} rows into {len(self.run_paths)} sorted runs")
+
+    def _iter_run(self, path):
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+    def iter_sorted(self):
+        """Yields the (key, digest, offset) entries of all runs in key order (k-way merge)."""
+        return heapq.merge(*(self._iter_run(path) for path in self.run_paths), key=itemgetter(0))
+
+    def read_row(self, offset):
+        self._row_file.seek(offset)
+        return pickle.load(self._row_file)
+
+    def close(self):
+        self._row_file.close()
+
+def spill_table_rows(
+    db_connection, db, table, columns, pk, compare_cols, side, where_clause=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    Streams the (possibly unordered) rows of the table into side, a SpilledSide.
+    The rows are read with one streaming query, so no ORDER BY is needed on the server.
+    """
+    col_names = [col[0] for col in columns]
+    pk_idxs = [col_names.index(c) for c in pk_columns(pk)]
+    cmp_idxs = [col_names.index(c) for c in compare_cols]
+    col_str = ", ".join(f"`{c}`" for c in col_names)
+    sql = f"SELECT {col_str} FROM `{db}`.`{table}`"
+    if where_clause and where_clause.strip():
+        sql += f" WHERE {where_clause.strip()}"
+    logging.debug(f"Executing SQL: {sql}")
+    try:
+        if where_clause and where_clause.strip():
+            ensure_database(db_connection, db)
+        result = db_connection.execute(text(sql).execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            rows = [tuple(row) for row in rows]
+            record_rows(rows)
+            for row in rows:
+                key = row[pk_idxs[0]] if len(pk_idxs) == 1 else tuple(row[i] for i in pk_idxs)
+                side.add(key, _row_digest(tuple(row[i] for i in cmp_idxs)), row)
+    except DbToolsError:
+        raise
+    except Exception as e:
+        raise DbToolsError(f"Failed to get rows for table {table} in db {db}: {e}")
+    side.finish()
+
+def merge_spilled_sides(src, tgt, col_names, cmp_idxs=None):
+    """
+    Merge-joins the sorted entries of two SpilledSides, reading back the full rows
+    only for keys that are missing on one side or whose digests differ. Rows with
+    different digests are only reported if their values at cmp_idxs (all columns by
+    default) differ too, as values of different types can compare equal.
+    Yields (kind, item) pairs like merge_join_rows.
+    """
+    if cmp_idxs is None:
+        cmp_idxs = range(len(col_names))
+    src_iter = src.iter_sorted()
+    tgt_iter = tgt.iter_sorted()
+    s = next(src_iter, None)
+    t = next(tgt_iter, None)
+    while s is not None or t is not None:
+        if t is None or (s is not None and s[0] < t[0]):
+            yield "missing_in_target", dict(zip(col_names, src.read_row(s[2])))
+            s = next(src_iter, None)
+        elif s is None or t[0] < s[0]:
+            yield "missing_in_source", dict(zip(col_names, tgt.read_row(t[2])))
+            t = next(tgt_iter, None)
+        else:
+            if s[1] != t[1]:
+                src_row, tgt_row = src.read_row(s[2]), tgt.read_row(t[2])
+                if [src_row[i] for i in cmp_idxs] != [tgt_row[i] for i in cmp_idxs]:
+                    yield "values_different", {
+                        "pk": s[0],
+                        "source": dict(zip(col_names, src_row)),
+                        "target": dict(zip(col_names, tgt_row))
+                    }
+            s = next(src_iter, None)
+            t = next(tgt_iter, None)
+
+def _spill_and_merge(
+    src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where,
+    memory_budget, temp_dir, chunk_size, report=None
+):
+    src_cols, _, pk, col_names, compare_cols = meta
+    run_size = max(RUN_BLOCK_SIZE, memory_budget // ENTRY_BYTES)
+    with tempfile.TemporaryDirectory(prefix="db_tools_spill_", dir=temp_dir) as work_dir:
+        src = SpilledSide(work_dir, "source", run_size)
+        tgt = SpilledSide(work_dir, "target", run_size)
+        try:
+            with phase(report, table, PHASE_FETCH):
+                spill_table_rows(src_conn, source_db, table, src_cols, pk, compare_cols, src, source_where, chunk_size)
+                spill_table_rows(tgt_conn, target_db, table, src_cols, pk, compare_cols, tgt, target_where, chunk_size)
+            logging.info(
+                f"Spilled {table}: {src.rows} source rows in {len(src.run_paths)} runs, "
+                f"{tgt.rows} target rows in {len(tgt.run_paths)} runs"
+            )
+            yield from merge_spilled_sides(src, tgt, col_names, [col_names.index(c) for c in compare_cols])
+        finally:
+            src.close()
+            tgt.close()
+
+def iter_table_content_diff_external(
+    src_conn, tgt_conn, source_db, target_db, table, source_where=None, target_where=None,
+    memory_budget=DEFAULT_MEMORY_BUDGET, temp_dir=None, chunk_size=DEFAULT_CHUNK_SIZE,
+    src_schema=None, tgt_schema=None
+):
+    """
+    External-memory variant of iter_table_content_diff for tables larger than RAM, or whose
+    rows can't be read in the same PK order on both servers (collations, unordered WHERE
+    results): each side is written to temporary files under temp_dir as sorted runs of
+    (pk, digest, row offset) using at most memory_budget bytes of sort buffer, and the runs
+    are k-way merged. Sorting happens in Python, so server ordering doesn't matter.
+    Yields (kind, item) diffs; the temporary files are removed once the generator is done.
+    """
+    meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+    yield from _spill_and_merge(
+        src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where,
+        memory_budget, temp_dir, chunk_size
+    )
+
+def compare_table_content_external(
+    src_conn, tgt_conn, source_db, target_db, table, source_where=None, target_where=None,
+    memory_budget=DEFAULT_MEMORY_BUDGET, temp_dir=None, chunk_size=DEFAULT_CHUNK_SIZE,
+    src_schema=None, tgt_schema=None, report=None
+):
+    """
+    compare_table_content using the external-memory sort-merge of iter_table_content_diff_external.
+    Returns the same dict as compare_table_content.
+    """
+    with phase(report, table, PHASE_METADATA):
+        meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+    result = {"missing_in_target": [], "missing_in_source": [], "values_different": []}
+    # Spilling is timed as a nested fetch phase
+    with phase(report, table, PHASE_DIFF):
+        for kind, item in _spill_and_merge(
+            src_conn, tgt_conn, source_db, target_db, table, meta, source_where, target_where,
+            memory_budget, temp_dir, chunk_size, report
+        ):
+            result[kind].append(item)
+    result["pk"] = meta[2]
+    result["col_names"] = meta[3]
+    return result
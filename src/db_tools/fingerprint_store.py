@@ -0,0 +1,137 @@
+import os
+import json
+import pickle
+import sqlite3
+import logging
+import threading
+import time
+
+DEFAULT_FINGERPRINT_PATH = os.path.expanduser("~/.db_tools_fingerprints.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS compares (
+    key TEXT PRIMARY KEY,
+    boundaries BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS range_fingerprints (
+    key TEXT NOT NULL,
+    range_index INTEGER NOT NULL,
+    src_count INTEGER,
+    src_sum TEXT,
+    tgt_count INTEGER,
+    tgt_sum TEXT,
+    mismatches BLOB,
+    PRIMARY KEY (key, range_index)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    key TEXT PRIMARY KEY,
+    watermark BLOB,
+    pending BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+def fingerprint_key(**parts):
+    """Builds a store key from everything that has to match for earlier range checksums to be comparable."""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+class FingerprintStore:
+    """
+    Local SQLite file holding, per compared table, the PK range boundaries of the last
+    checksum compare and each range's (count, checksum) on both sides together with the
+    bounds and row counts of the sub-ranges its differences were narrowed down to. A range
+    whose checksums are unchanged since then differs in the same sub-ranges, so only their
+    rows are fetched again, without bisecting. No row contents are stored, only PKs.
+    It also keeps the high-water marks of incremental compares (see incremental_compare).
+    The file is readable by its owner only. Values are pickled; only open stores you wrote yourself.
+    """
+
+    def __init__(self, path=DEFAULT_FINGERPRINT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        os.chmod(path, 0o600)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        if self._db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ranges'").fetchone():
+            # Stores from before range_fingerprints held the differing rows themselves; wipe them from the file
+            self._db.execute("DROP TABLE ranges")
+            self._db.execute("VACUUM")
+
+    def load(self, key):
+        """Returns {"boundaries": [...], "ranges": {index: (fingerprint, mismatches)}} or None."""
+        with self._lock:
+            row = self._db.execute("SELECT boundaries FROM compares WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            ranges = {}
+            for index, src_count, src_sum, tgt_count, tgt_sum, mismatches in self._db.execute(
+                "SELECT range_index, src_count, src_sum, tgt_count, tgt_sum, mismatches FROM range_fingerprints WHERE key = ?",
+                (key,)
+            ):
+                if src_sum is None:
+                    continue
+                ranges[index] = ((src_count, int(src_sum), tgt_count, int(tgt_sum)), pickle.loads(mismatches))
+        return {"boundaries": pickle.loads(row[0]), "ranges": ranges}
+
+    def save(self, key, boundaries, ranges):
+        """
+        Replaces what is stored for key. ranges holds a (fingerprint, mismatches) pair per range,
+        fingerprint being (src_count, src_sum, tgt_count, tgt_sum) and mismatches a list of
+        (lower, upper, src_count, tgt_count) sub-ranges that differed, or None for a range not checked yet.
+        """
+        rows = []
+        for index, entry in enumerate(ranges):
+            if entry is None:
+                continue
+            (src_count, src_sum, tgt_count, tgt_sum), mismatches = entry
+            rows.append((key, index, src_count, str(src_sum), tgt_count, str(tgt_sum), pickle.dumps(mismatches)))
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM range_fingerprints WHERE key = ?", (key,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO compares (key, boundaries, updated_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(boundaries), time.time())
+            )
+            self._db.executemany("INSERT INTO range_fingerprints VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        logging.debug(f"Stored {len(rows)} range fingerprints in {self.path}")
+
+    def load_watermark(self, key):
+        """Returns (watermark, pending_keys) stored for key, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT watermark, pending FROM watermarks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), pickle.loads(row[1])
+
+    def save_watermark(self, key, watermark, pending_keys):
+        """Stores the high-water mark for key and the PKs that still differed, to be re-checked next time."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO watermarks (key, watermark, pending, updated_at) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(watermark), pickle.dumps(list(pending_keys)), time.time())
+            )
+
+    def forget(self, key=None):
+        """Drops the entries for key, or everything when key is None."""
+        with self._lock, self._db:
+            if key is None:
+                self._db.execute("DELETE FROM range_fingerprints")
+                self._db.execute("DELETE FROM compares")
+                self._db.execute("DELETE FROM watermarks")
+            else:
+                self._db.execute("DELETE FROM range_fingerprints WHERE key = ?", (key,))
+                self._db.execute("DELETE FROM compares WHERE key = ?", (key,))
+                self._db.execute("DELETE FROM watermarks WHERE key = ?", (key,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
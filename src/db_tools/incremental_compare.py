@@ -0,0 +1,135 @@
+from sqlalchemy import text
+import logging
+from .shared import DbToolsError
+from .fingerprint_store import fingerprint_key
+from .metadata_cache import server_key
+from .content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    _diff_loaded_rows,
+    fetch_rows_by_pk,
+    iter_table_rows_by_pk,
+    merge_join_rows,
+    pk_columns,
+    prepare_content_compare,
+)
+
+# Columns picked as the watermark when none is given, in order of preference
+WATERMARK_COLUMN_NAMES = ["updated_at", "modified_at", "last_modified", "last_update", "updated"]
+
+def detect_watermark_column(src_cols):
+    """
+    Picks the column whose value grows whenever a row changes: an updated_at-style column
+    if there is one, else the auto_increment column (which only reveals inserted rows).
+    Returns None if the table has neither.
+    """
+    names = {col[0].lower(): col[0] for col in src_cols}
+    for candidate in WATERMARK_COLUMN_NAMES:
+        if candidate in names:
+            return names[candidate]
+    for col in src_cols:
+        if "auto_increment" in str(col[2]).lower():
+            return col[0]
+    return None
+
+def _and_where(where_clause, condition):
+    if where_clause and where_clause.strip():
+        return f"({where_clause.strip()}) AND {condition}"
+    return condition
+
+def get_max_watermark(db_connection, db, table, column, where_clause=None):
+    sql = f"SELECT MAX(`{column}`) FROM `{db}`.`{table}`"
+    if where_clause and where_clause.strip():
+        sql += f" WHERE {where_clause.strip()}"
+    try:
+        return db_connection.execute(text(sql)).scalar()
+    except Exception as e:
+        raise DbToolsError(f"Failed to get the watermark of table {table} in db {db}: {e}")
+
+def get_changed_keys(db_connection, db, table, pk, column, watermark, where_clause=None):
+    """Returns the PKs of the rows whose watermark column is at or above watermark."""
+    pk_cols = pk_columns(pk)
+    pk_str = ", ".join(f"`{c}`" for c in pk_cols)
+    sql = f"SELECT {pk_str} FROM `{db}`.`{table}` WHERE " + _and_where(where_clause, f"`{column}` >= :watermark")
+    try:
+        rows = db_connection.execute(text(sql), {"watermark": watermark})
+        return [row[0] if len(pk_cols) == 1 else tuple(row) for row in rows]
+    except Exception as e:
+        raise DbToolsError(f"Failed to get changed rows of table {table} in db {db}: {e}")
+
+def find_missing_keys(src_conn, tgt_conn, source_db, target_db, table, pk, source_where=None, target_where=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    PK-only pass over both tables (an index-only scan): returns the PKs present on one side only,
+    which catches deleted rows and rows inserted without moving the watermark.
+    """
+    pk_cols = pk_columns(pk)
+    pk_triples = [(c, None, None) for c in pk_cols]
+    src_keys = iter_table_rows_by_pk(src_conn, source_db, table, pk_triples, pk, where_clause=source_where, chunk_size=chunk_size)
+    tgt_keys = iter_table_rows_by_pk(tgt_conn, target_db, table, pk_triples, pk, where_clause=target_where, chunk_size=chunk_size)
+    missing = []
+    for _, item in merge_join_rows(src_keys, tgt_keys, pk_cols, pk, compare_cols=[]):
+        missing.append(item[pk_cols[0]] if len(pk_cols) == 1 else tuple(item[c] for c in pk_cols))
+    return missing
+
+def compare_table_incremental(
+    src_conn, tgt_conn, source_db, target_db, table, store, watermark_column=None,
+    source_where=None, target_where=None, chunk_size=DEFAULT_CHUNK_SIZE, src_schema=None, tgt_schema=None
+):
+    """
+    Incremental compare_table_content: remembers in store (a FingerprintStore) the source's
+    high-water mark of watermark_column per (source, target, table) and only compares the rows
+    at or above it on either side, plus the rows that still differed last time. Deleted rows
+    are found by a PK-only pass over both tables.
+    The first run (no stored mark) compares everything. The mark only advances once a run
+    has finished, so a failed run is simply repeated from the old mark next time.
+    Returns the same dict as compare_table_content plus "incremental_stats".
+    """
+    src_cols, _, pk, col_names, compare_cols = prepare_content_compare(
+        src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema
+    )
+    column = watermark_column or detect_watermark_column(src_cols)
+    if column is None:
+        raise DbToolsError(f"Table {table} has no updated_at or auto_increment column to use as a watermark")
+    if column not in col_names:
+        raise DbToolsError(f"Watermark column {column} not found in table {table}")
+    key = fingerprint_key(
+        source=server_key(src_conn), source_db=source_db, target=server_key(tgt_conn), target_db=target_db,
+        table=table, source_where=source_where, target_where=target_where, watermark_column=column
+    )
+    stored = store.load_watermark(key)
+    # Read before comparing, so rows changed during the run are compared again next time
+    new_watermark = get_max_watermark(src_conn, source_db, table, column, source_where)
+    full = stored is None or stored[0] is None
+    stats = {"watermark_column": column, "watermark": None, "new_watermark": new_watermark, "full": full}
+
+    if full:
+        result = {"missing_in_target": [], "missing_in_source": [], "values_different": []}
+        src_rows = iter_table_rows_by_pk(src_conn, source_db, table, src_cols, pk, where_clause=source_where, chunk_size=chunk_size)
+        tgt_rows = iter_table_rows_by_pk(tgt_conn, target_db, table, src_cols, pk, where_clause=target_where, chunk_size=chunk_size)
+        for kind, item in merge_join_rows(src_rows, tgt_rows, col_names, pk, compare_cols):
+            result[kind].append(item)
+    else:
+        watermark, pending = stored
+        stats["watermark"] = watermark
+        keys = set(pending)
+        keys.update(get_changed_keys(src_conn, source_db, table, pk, column, watermark, source_where))
+        keys.update(get_changed_keys(tgt_conn, target_db, table, pk, column, watermark, target_where))
+        stats["changed_rows"] = len(keys)
+        missing = find_missing_keys(src_conn, tgt_conn, source_db, target_db, table, pk, source_where, target_where, chunk_size)
+        stats["missing_rows"] = len(missing)
+        keys.update(missing)
+        src_rows = fetch_rows_by_pk(src_conn, source_db, table, src_cols, pk, keys, where_clause=source_where)
+        tgt_rows = fetch_rows_by_pk(tgt_conn, target_db, table, src_cols, pk, keys, where_clause=target_where)
+        result = _diff_loaded_rows(src_rows, tgt_rows, col_names, pk, compare_cols)
+
+    pk_cols = pk_columns(pk)
+    def key_of(row):
+        return row[pk_cols[0]] if len(pk_cols) == 1 else tuple(row[c] for c in pk_cols)
+    # Rows that still differ may sit below the new mark; keep them so they are re-checked until in sync
+    pending = [key_of(row) for row in result["missing_in_target"] + result["missing_in_source"]]
+    pending += [diff["pk"] for diff in result["values_different"]]
+    store.save_watermark(key, new_watermark, pending)
+    logging.info(f"Incremental compare of {table}: {stats}")
+    result["pk"] = pk
+    result["col_names"] = col_names
+    result["incremental_stats"] = stats
+    return result
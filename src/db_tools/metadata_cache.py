@@ -0,0 +1,137 @@
+from sqlalchemy import text, bindparam
+from collections import OrderedDict
+import logging
+import threading
+import time
+from .shared import DbToolsError
+from .schema_snapshot import load_schema_snapshot, merge_schema_snapshots
+
+# Seconds a cached entry is trusted at most, even if its version still matches.
+# This bounds staleness for DDL that leaves CREATE_TIME untouched (e.g. INSTANT ALTERs).
+DEFAULT_TTL = 600
+# Seconds a cached table list is reused without asking the server
+DEFAULT_TABLE_LIST_TTL = 60
+DEFAULT_MAX_ENTRIES = 4096
+
+class MetadataCache:
+    """
+    Thread-safe LRU cache with TTL for schema metadata, keyed by (server, db, table)
+    tuples; longer keys starting with (server, db, table) hold other per-table data.
+    Entries carry an optional version (e.g. CREATE_TIME from information_schema.TABLES);
+    a lookup with a different version is a miss.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, stored_version, value = entry
+                if time.monotonic() - stored_at <= ttl and stored_version == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, server=None, db=None, table=None):
+        """Drops all entries matching the given key parts (None matches anything)."""
+        with self._lock:
+            for key in list(self._entries):
+                if (server is None or key[0] == server) and \
+                   (db is None or key[1] == db) and \
+                   (table is None or key[2] == table):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Process-wide cache shared by the GUI and all web sessions
+metadata_cache = MetadataCache()
+
+def server_key(db_connection):
+    """Identifies the server (and user, since privileges shape metadata) behind a connection."""
+    url = db_connection.engine.url
+    return f"{url.username}@{url.host}:{url.port}"
+
+def get_table_versions(db_connection, db, tables=None):
+    """
+    Returns {table: (create_time, update_time)} from information_schema.TABLES in one query.
+    """
+    sql = "SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME FROM information_schema.TABLES WHERE TABLE_SCHEMA = :db"
+    params = {"db": db}
+    if tables is not None:
+        if not tables:
+            return {}
+        sql += " AND TABLE_NAME IN :tables"
+        params["tables"] = list(tables)
+    stmt = text(sql)
+    if tables is not None:
+        stmt = stmt.bindparams(bindparam("tables", expanding=True))
+    try:
+        return {row[0]: (row[1], row[2]) for row in db_connection.execute(stmt, params)}
+    except Exception as e:
+        raise DbToolsError(f"Failed to get table versions for db {db}: {e}")
+
+def cached_schema_snapshot(db_connection, db, tables=None, cache=metadata_cache):
+    """
+    Cached load_schema_snapshot: one information_schema.TABLES query checks CREATE_TIME
+    of the requested tables, and only tables that are new, changed or expired are reloaded.
+    """
+    server = server_key(db_connection)
+    versions = get_table_versions(db_connection, db, tables)
+    cached = []
+    stale = []
+    for table, (create_time, _) in versions.items():
+        snapshot = cache.get((server, db, table), version=create_time)
+        if snapshot is None:
+            stale.append(table)
+        else:
+            cached.append(snapshot)
+    if stale:
+        loaded = load_schema_snapshot(db_connection, db, stale)
+        for table in stale:
+            if loaded.has_table(table):
+                table_snapshot = loaded.table_snapshot(table)
+                cache.put((server, db, table), table_snapshot, version=versions[table][0])
+                cached.append(table_snapshot)
+    logging.debug(f"Schema cache for {server}/{db}: {len(versions) - len(stale)} hits, {len(stale)} reloaded")
+    return merge_schema_snapshots(db, cached)
+
+def cached_tables(db_connection, db, cache=metadata_cache, ttl=DEFAULT_TABLE_LIST_TTL):
+    """
+    Cached get_tables: the table list of a database is reused for ttl seconds.
+    Call cache.invalidate(db=...) to force a refresh.
+    """
+    # Imported here because submit_handler itself uses this cache
+    from .submit_handler import get_tables
+
+    key = (server_key(db_connection), db, None)
+    tables = cache.get(key, ttl=ttl)
+    if tables is None:
+        tables = get_tables(db_connection, db)
+        cache.put(key, tables)
+    return list(tables)
+
+def cached_compare_snapshots(src_connection, tgt_connection, source_db, target_db, selected_tables, cache=metadata_cache):
+    """Cached submit_handler.load_compare_snapshots."""
+    src_schema = cached_schema_snapshot(src_connection, source_db, selected_tables, cache)
+    tgt_schema = cached_schema_snapshot(tgt_connection, target_db, selected_tables, cache)
+    return src_schema, tgt_schema
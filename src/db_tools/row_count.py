@@ -0,0 +1,140 @@
+from sqlalchemy import text
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import logging
+import threading
+import weakref
+from .shared import DbToolsError
+from .session import ensure_database
+from .content_compare import pk_columns
+from .metadata_cache import metadata_cache, server_key, get_table_versions
+
+# Row count strategies
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_EXACT_PARALLEL = "exact_parallel"
+COUNT_CACHED = "cached"
+COUNT_STRATEGIES = [COUNT_EXACT, COUNT_ESTIMATED, COUNT_EXACT_PARALLEL, COUNT_CACHED]
+
+# Labels shown next to counts in the result views
+COUNT_LABELS = {
+    COUNT_EXACT: "exact",
+    COUNT_ESTIMATED: "estimated",
+    COUNT_EXACT_PARALLEL: "exact",
+    COUNT_CACHED: "cached",
+}
+
+DEFAULT_COUNT_WORKERS = 4
+# Seconds an exact count is reused by the cached strategy
+DEFAULT_COUNT_TTL = 3600
+
+def get_estimated_count(db_connection, db, table, where_clause=None, schema=None):
+    """
+    Returns an instant row count estimate: TABLE_ROWS from information_schema.TABLES
+    (taken from schema, a SchemaSnapshot, if given), or the optimizer's EXPLAIN
+    estimate when a WHERE clause is set.
+    """
+    try:
+        if where_clause and where_clause.strip():
+            ensure_database(db_connection, db)
+            result = db_connection.execute(
+                text(f"EXPLAIN SELECT * FROM `{db}`.`{table}` WHERE {where_clause.strip()}")
+            )
+            row = result.mappings().first()
+            if row is None:
+                return 0
+            filtered = float(row.get("filtered") or 100)
+            return int((row.get("rows") or 0) * filtered / 100)
+        if schema is not None and schema.has_table(table):
+            return int(schema.table_info(table)["rows"] or 0)
+        result = db_connection.execute(
+            text("SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = :db AND TABLE_NAME = :table"),
+            {"db": db, "table": table}
+        )
+        return int(result.scalar() or 0)
+    except Exception as e:
+        raise DbToolsError(f"Failed to estimate row count for {table}: {e}")
+
+# Extra connections per engine shared by all concurrent get_exact_count_parallel calls
+_count_slots = weakref.WeakKeyDictionary()
+_count_slots_lock = threading.Lock()
+
+def count_slots(engine):
+    """
+    The semaphore bounding the count connections get_exact_count_parallel opens on engine to
+    DEFAULT_COUNT_WORKERS at a time, however many tables are counted at once, so they fit in the
+    small overflow of submit_handler.engine_pool_options instead of multiplying the workers.
+    """
+    with _count_slots_lock:
+        slots = _count_slots.get(engine)
+        if slots is None:
+            slots = _count_slots[engine] = threading.BoundedSemaphore(DEFAULT_COUNT_WORKERS)
+        return slots
+
+def get_exact_count_parallel(engine, db, table, pk, where_clause=None, max_workers=DEFAULT_COUNT_WORKERS):
+    """
+    Exact COUNT(*) split into max_workers ranges of the first PK column, counted concurrently
+    on separate connections. Each range is an index range scan on the PK. The connections are
+    taken from the count_slots of the engine, so concurrent counts queue for them.
+    Returns None if the first PK column is not an integer, so the caller can fall back.
+    """
+    first_col = pk_columns(pk)[0]
+    user_where = where_clause.strip() if where_clause and where_clause.strip() else None
+    slots = count_slots(engine)
+    try:
+        with slots, engine.connect() as conn:
+            sql = f"SELECT MIN(`{first_col}`), MAX(`{first_col}`) FROM `{db}`.`{table}`"
+            if user_where:
+                ensure_database(conn, db)
+                sql += f" WHERE {user_where}"
+            row = conn.execute(text(sql)).first()
+    except Exception as e:
+        raise DbToolsError(f"Failed to get PK bounds for {table}: {e}")
+    low, high = row[0], row[1]
+    if low is None:
+        return 0
+    if isinstance(low, bool) or not isinstance(low, (int, Decimal)) or low != int(low):
+        return None
+    low, high = int(low), int(high)
+    step = max((high - low + 1) // max_workers, 1)
+    ranges = []
+    start = low
+    range_where = f"({user_where}) AND " if user_where else ""
+    while start <= high:
+        end = min(start + step - 1, high)
+        ranges.append((start, end))
+        start = end + 1
+
+    def count_range(bounds):
+        with slots, engine.connect() as conn:
+            if user_where:
+                ensure_database(conn, db)
+            return conn.execute(
+                text(
+                    f"SELECT COUNT(*) FROM `{db}`.`{table}` "
+                    f"WHERE {range_where}`{first_col}` BETWEEN :lo AND :hi"
+                ),
+                {"lo": bounds[0], "hi": bounds[1]}
+            ).scalar()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="count") as executor:
+            return sum(executor.map(count_range, ranges))
+    except Exception as e:
+        raise DbToolsError(f"Failed to get table count for {table}: {e}")
+
+def get_count_cached(db_connection, db, table, count_func, where_clause=None, cache=metadata_cache, ttl=DEFAULT_COUNT_TTL):
+    """
+    Returns (count, from_cache). Reuses a count stored by a recent run unless it is older than
+    ttl or information_schema.TABLES.UPDATE_TIME of the table moved since; otherwise calls
+    count_func() and stores the result.
+    """
+    key = (server_key(db_connection), db, table, "count", (where_clause or "").strip())
+    version = get_table_versions(db_connection, db, [table]).get(table, (None, None))[1]
+    count = cache.get(key, version=version, ttl=ttl)
+    if count is not None:
+        return count, True
+    count = count_func()
+    cache.put(key, count, version=version)
+    logging.debug(f"Cached row count of {db}.{table}: {count}")
+    return count, False
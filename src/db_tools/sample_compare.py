@@ -0,0 +1,253 @@
+from sqlalchemy import text
+from decimal import Decimal
+from statistics import NormalDist
+import logging
+import math
+import random
+from .shared import DbToolsError
+from .session import ensure_database
+from .compare_report import PHASE_DIFF, PHASE_FETCH, PHASE_METADATA, phase, record_rows, sub_phase
+from .content_compare import fetch_rows_by_pk, pk_columns, prepare_content_compare
+from .row_count import get_estimated_count
+
+# Sampling methods
+# random: a uniform sample of the whole table
+SAMPLE_RANDOM = "random"
+# stratified: the integer PK space is split into ranges of equal width and each range is sampled equally,
+# so drift confined to one key range (e.g. recent inserts) is not missed by chance
+SAMPLE_STRATIFIED = "stratified"
+SAMPLE_METHODS = [SAMPLE_STRATIFIED, SAMPLE_RANDOM]
+
+# Rows sampled per side
+DEFAULT_SAMPLE_SIZE = 1000
+# PK ranges sampled by SAMPLE_STRATIFIED
+DEFAULT_STRATA = 10
+# Key lookups sent per query when probing an integer PK
+DEFAULT_PROBE_BATCH_SIZE = 1000
+# Probes per expected hit on top of the estimated key density, as the estimate is rough
+PROBE_MARGIN = 1.25
+# Integer PKs denser than this (keys per value between MIN and MAX) are probed; sparser ones
+# would need too many lookups per sampled row and are sampled with sample_table_keys
+MIN_PROBE_DENSITY = 0.05
+# Rows kept by the RAND() predicate of sample_table_keys per row sampled
+SAMPLE_OVERSAMPLING = 2
+DEFAULT_CONFIDENCE = 0.95
+# With no mismatch found, a full compare is still advised while the upper bound
+# of the mismatch rate is above this
+DEFAULT_TOLERANCE = 0.01
+
+# Recommendations of compare_table_sample
+RECOMMEND_NONE = "none"
+RECOMMEND_LARGER_SAMPLE = "larger_sample"
+RECOMMEND_FULL_COMPARE = "full_compare"
+
+def get_integer_pk_bounds(db_connection, db, table, pk, where_clause=None):
+    """
+    Returns (MIN, MAX) of a single-column integer PK, read from the ends of the PK index, or
+    None if the PK is composite or not an integer (or the table is empty).
+    """
+    pk_cols = pk_columns(pk)
+    if len(pk_cols) != 1:
+        return None
+    sql = f"SELECT MIN(`{pk_cols[0]}`), MAX(`{pk_cols[0]}`) FROM `{db}`.`{table}`"
+    if where_clause and where_clause.strip():
+        sql += f" WHERE {where_clause.strip()}"
+    try:
+        if where_clause and where_clause.strip():
+            ensure_database(db_connection, db)
+        low, high = db_connection.execute(text(sql)).first()
+    except Exception as e:
+        raise DbToolsError(f"Failed to get PK bounds of table {table} in db {db}: {e}")
+    if low is None or isinstance(low, bool) or not isinstance(low, (int, Decimal)) or low != int(low):
+        return None
+    return int(low), int(high)
+
+def probe_table_keys(db_connection, db, table, pk, probes, where_clause=None, batch_size=DEFAULT_PROBE_BATCH_SIZE):
+    """
+    Returns the probes (integer values) that are keys of rows matching where_clause. Every key is
+    as likely to be probed as any other, so the keys found are a uniform sample of the rows, unlike
+    taking the next key after each probe, which favours keys after gaps. batch_size probes are
+    looked up per query with an IN list on the PK index, and only the PK column is read.
+    """
+    col = f"`{pk_columns(pk)[0]}`"
+    where_sql = f" AND ({where_clause.strip()})" if where_clause and where_clause.strip() else ""
+    keys = []
+    for start in range(0, len(probes), batch_size):
+        batch = probes[start:start + batch_size]
+        placeholders = ", ".join(f":p{i}" for i in range(len(batch)))
+        params = {f"p{i}": probe for i, probe in enumerate(batch)}
+        try:
+            with sub_phase(PHASE_FETCH):
+                if where_sql:
+                    ensure_database(db_connection, db)
+                rows = db_connection.execute(
+                    text(f"SELECT {col} FROM `{db}`.`{table}` WHERE {col} IN ({placeholders}){where_sql}"), params
+                ).fetchall()
+                record_rows(rows)
+        except Exception as e:
+            raise DbToolsError(f"Failed to sample keys of table {table} in db {db}: {e}")
+        keys.extend(row[0] for row in rows)
+    return keys
+
+def sample_table_keys(db_connection, db, table, pk, size, where_clause=None, schema=None):
+    """
+    Returns up to size PKs picked at random among the rows matching where_clause. Only the PK
+    columns are read: a RAND() predicate keeps about twice size rows of the scan, and only those
+    are sorted to pick size of them.
+    """
+    pk_cols = pk_columns(pk)
+    pk_str = ", ".join(f"`{c}`" for c in pk_cols)
+    rows = get_estimated_count(db_connection, db, table, where_clause=where_clause, schema=schema)
+    fraction = min(1.0, SAMPLE_OVERSAMPLING * size / rows) if rows > 0 else 1.0
+    where_sql = f"({where_clause.strip()}) AND " if where_clause and where_clause.strip() else ""
+    sql = f"SELECT {pk_str} FROM `{db}`.`{table}` WHERE {where_sql}RAND() < :fraction ORDER BY RAND() LIMIT {int(size)}"
+    logging.debug(f"Executing SQL: {sql} with fraction {fraction}")
+    try:
+        with sub_phase(PHASE_FETCH):
+            if where_sql:
+                ensure_database(db_connection, db)
+            keys = [tuple(row) for row in db_connection.execute(text(sql), {"fraction": fraction})]
+            record_rows(keys)
+    except Exception as e:
+        raise DbToolsError(f"Failed to sample keys of table {table} in db {db}: {e}")
+    return [key[0] for key in keys] if len(pk_cols) == 1 else keys
+
+def sample_side(db_connection, db, table, columns, pk, size, method, where_clause=None, schema=None, strata=DEFAULT_STRATA):
+    """
+    Samples about size rows of one side with the given method (see SAMPLE_METHODS) and returns
+    them; every row is equally likely to be sampled. Only keys are sampled: an integer PK that is
+    dense enough is probed at distinct random values between its MIN and MAX, as many as needed to
+    hit about size keys (split into strata equal-width ranges probed equally by SAMPLE_STRATIFIED),
+    other PKs are sampled with sample_table_keys. The full rows of the sampled keys are then
+    fetched by PK, so the server neither scans nor sorts full rows.
+    """
+    if method not in SAMPLE_METHODS:
+        raise DbToolsError(f"Unknown sampling method: {method}")
+    bounds = get_integer_pk_bounds(db_connection, db, table, pk, where_clause)
+    density = 0.0
+    if bounds is not None:
+        low, high = bounds
+        rows = get_estimated_count(db_connection, db, table, where_clause=where_clause, schema=schema)
+        density = min(1.0, rows / (high - low + 1))
+    if density < MIN_PROBE_DENSITY:
+        keys = sample_table_keys(db_connection, db, table, pk, size, where_clause, schema)
+    else:
+        strata = max(1, min(strata, size, high - low + 1)) if method == SAMPLE_STRATIFIED else 1
+        starts = [low + (high - low + 1) * i // strata for i in range(strata + 1)]
+        per_stratum = math.ceil(size * PROBE_MARGIN / density / strata)
+        probes = [
+            probe for i in range(strata)
+            for probe in random.sample(range(starts[i], starts[i + 1]), min(per_stratum, starts[i + 1] - starts[i]))
+        ]
+        keys = probe_table_keys(db_connection, db, table, pk, probes, where_clause)
+        if len(keys) > size:
+            keys = random.sample(keys, size)
+    return fetch_rows_by_pk(db_connection, db, table, columns, pk, keys, where_clause)
+
+def wilson_interval(mismatches, sampled, confidence=DEFAULT_CONFIDENCE):
+    """
+    Wilson score interval of a proportion; unlike the normal approximation it stays
+    inside [0, 1] and gives a useful upper bound when no mismatch was seen.
+    """
+    if sampled == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    p = mismatches / sampled
+    denominator = 1 + z * z / sampled
+    center = (p + z * z / (2 * sampled)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / sampled + z * z / (4 * sampled * sampled)) / denominator
+    # The bounds are exactly 0 and 1 at the ends; keep float rounding from blurring them
+    low = 0.0 if mismatches == 0 else max(0.0, center - margin)
+    high = 1.0 if mismatches == sampled else min(1.0, center + margin)
+    return low, high
+
+def _key_getter(col_names, pk):
+    pk_idxs = [col_names.index(c) for c in pk_columns(pk)]
+    if len(pk_idxs) == 1:
+        return lambda row: row[pk_idxs[0]]
+    return lambda row: tuple(row[i] for i in pk_idxs)
+
+def _check_sample(rows, other_rows, col_names, pk, compare_cols):
+    """Returns the keys of the sampled rows that are missing in other_rows, and of those whose values differ."""
+    key_of = _key_getter(col_names, pk)
+    cmp_idxs = [col_names.index(c) for c in compare_cols]
+    others = {key_of(row): row for row in other_rows}
+    missing, different = [], []
+    for row in rows:
+        other = others.get(key_of(row))
+        if other is None:
+            missing.append(key_of(row))
+        elif any(row[i] != other[i] for i in cmp_idxs):
+            different.append(key_of(row))
+    return missing, different
+
+def compare_table_sample(
+    src_conn, tgt_conn, source_db, target_db, table, source_where=None, target_where=None,
+    sample_size=DEFAULT_SAMPLE_SIZE, method=SAMPLE_STRATIFIED, confidence=DEFAULT_CONFIDENCE,
+    tolerance=DEFAULT_TOLERANCE, src_schema=None, tgt_schema=None, report=None
+):
+    """
+    Quick content check: samples sample_size rows on each side, looks each one up by PK on
+    the other side and estimates the share of rows without an identical counterpart, with a
+    Wilson confidence interval. Unlike a row count this also catches value drift, at the cost
+    of a few PK lookups on each server (see sample_side) instead of a full diff.
+    Returns a dict with the per-kind mismatch counts, the mismatching keys, "mismatch_rate",
+    its bounds "rate_low"/"rate_high", "estimated_rows" and a "recommendation":
+    RECOMMEND_FULL_COMPARE when a mismatch was found, RECOMMEND_LARGER_SAMPLE when none was
+    but the upper bound is still above tolerance, else RECOMMEND_NONE.
+    """
+    with phase(report, table, PHASE_METADATA):
+        src_cols, _, pk, col_names, compare_cols = prepare_content_compare(
+            src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema
+        )
+    with phase(report, table, PHASE_DIFF):
+        src_rows = sample_side(src_conn, source_db, table, src_cols, pk, sample_size, method, source_where, src_schema)
+        tgt_rows = sample_side(tgt_conn, target_db, table, src_cols, pk, sample_size, method, target_where, tgt_schema)
+        key_of = _key_getter(col_names, pk)
+        tgt_matches = fetch_rows_by_pk(tgt_conn, target_db, table, src_cols, pk, map(key_of, src_rows), target_where)
+        src_matches = fetch_rows_by_pk(src_conn, source_db, table, src_cols, pk, map(key_of, tgt_rows), source_where)
+        missing_in_target, src_different = _check_sample(src_rows, tgt_matches, col_names, pk, compare_cols)
+        missing_in_source, tgt_different = _check_sample(tgt_rows, src_matches, col_names, pk, compare_cols)
+    values_different = list(dict.fromkeys(src_different + tgt_different))
+    sampled = len(src_rows) + len(tgt_rows)
+    mismatches = len(missing_in_target) + len(missing_in_source) + len(src_different) + len(tgt_different)
+    rate_low, rate_high = wilson_interval(mismatches, sampled, confidence)
+    estimated_rows = max(
+        get_estimated_count(src_conn, source_db, table, where_clause=source_where, schema=src_schema),
+        get_estimated_count(tgt_conn, target_db, table, where_clause=target_where, schema=tgt_schema),
+        len(src_rows), len(tgt_rows)
+    )
+    if mismatches:
+        recommendation = RECOMMEND_FULL_COMPARE
+    elif rate_high > tolerance:
+        recommendation = RECOMMEND_LARGER_SAMPLE
+    else:
+        recommendation = RECOMMEND_NONE
+    logging.info(f"Sampled {sampled} rows of {table}: {mismatches} mismatches, recommendation {recommendation}")
+    return {
+        "method": method,
+        "sampled": sampled,
+        "mismatches": mismatches,
+        "missing_in_target": missing_in_target,
+        "missing_in_source": missing_in_source,
+        "values_different": values_different,
+        "mismatch_rate": mismatches / sampled if sampled else 0.0,
+        "rate_low": rate_low,
+        "rate_high": rate_high,
+        "confidence": confidence,
+        "estimated_rows": estimated_rows,
+        "recommendation": recommendation,
+    }
+
+def format_sample_result(result):
+    """One-line summary of a compare_table_sample result for the result views."""
+    bounds = f"{result['rate_low']:.2%}–{result['rate_high']:.2%} at {result['confidence']:.0%} confidence"
+    if result["recommendation"] == RECOMMEND_FULL_COMPARE:
+        estimate = round(result["mismatch_rate"] * result["estimated_rows"])
+        return (
+            f"⚠️ Different in sample: {result['mismatches']} of {result['sampled']} rows "
+            f"({bounds}, ~{estimate} rows) - run a full compare"
+        )
+    if result["recommendation"] == RECOMMEND_LARGER_SAMPLE:
+        return f"❔ Same in sample of {result['sampled']} rows ({bounds}) - sample more rows or run a full compare"
+    return f"✅ Same in sample of {result['sampled']} rows ({bounds})"
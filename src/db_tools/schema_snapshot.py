@@ -0,0 +1,150 @@
+from sqlalchemy import text, bindparam
+import logging
+from .shared import DbToolsError
+
+class SchemaSnapshot:
+    """
+    In-memory metadata of one database, loaded in a few information_schema queries
+    by load_schema_snapshot. The accessors return the same shapes as the per-table
+    SHOW helpers in submit_handler and content_compare, so callers can switch freely.
+    """
+
+    def __init__(self, db, tables, columns, indexes):
+        self.db = db
+        # table -> dict(type, engine, rows, create_time, update_time)
+        self._tables = tables
+        # table -> [(name, type, null, key, default, extra), ...] in ordinal order
+        self._columns = columns
+        # table -> {index_name: (non_unique, [column, ...])} in SEQ_IN_INDEX order
+        self._indexes = indexes
+
+    def tables(self):
+        """Table names, sorted like SHOW TABLES."""
+        return sorted(self._tables)
+
+    def has_table(self, table):
+        return table in self._tables
+
+    def table_info(self, table):
+        """information_schema.TABLES details: type, engine, rows (estimate), create_time, update_time."""
+        self._check(table)
+        return self._tables[table]
+
+    def columns(self, table):
+        """Same as submit_handler.get_table_columns: (name, type, null, key, default, extra) tuples."""
+        self._check(table)
+        return list(self._columns.get(table, []))
+
+    def column_triples(self, table):
+        """Same as content_compare.get_table_columns: (name, type, extra) tuples."""
+        return [(col[0], col[1], col[5]) for col in self.columns(table)]
+
+    def primary_key(self, table):
+        """Same as content_compare.get_primary_key: str, list for composite PKs, or None."""
+        self._check(table)
+        pk = self._indexes.get(table, {}).get("PRIMARY")
+        if not pk:
+            return None
+        return pk[1][0] if len(pk[1]) == 1 else list(pk[1])
+
+    def constraints(self, table):
+        """Same as submit_handler.get_table_constraints_and_indices."""
+        self._check(table)
+        unique = {}
+        indices = {}
+        pk = []
+        for name, (non_unique, cols) in self._indexes.get(table, {}).items():
+            if name == "PRIMARY":
+                pk = list(cols)
+            elif non_unique:
+                indices[name] = list(cols)
+            else:
+                unique[name] = list(cols)
+        return {
+            "primary_key": pk,
+            "unique_keys": unique,
+            "indices": indices
+        }
+
+    def table_snapshot(self, table):
+        """Returns a SchemaSnapshot holding only the given table."""
+        self._check(table)
+        return SchemaSnapshot(
+            self.db,
+            {table: self._tables[table]},
+            {table: self._columns.get(table, [])},
+            {table: self._indexes.get(table, {})}
+        )
+
+    def _check(self, table):
+        if table not in self._tables:
+            raise DbToolsError(f"Table {table} not found in db {self.db}")
+
+def merge_schema_snapshots(db, snapshots):
+    """Combines snapshots of disjoint table sets of the same database into one SchemaSnapshot."""
+    tables, columns, indexes = {}, {}, {}
+    for snapshot in snapshots:
+        tables.update(snapshot._tables)
+        columns.update(snapshot._columns)
+        indexes.update(snapshot._indexes)
+    return SchemaSnapshot(db, tables, columns, indexes)
+
+def load_schema_snapshot(db_connection, db, tables=None):
+    """
+    Loads tables, columns and indexes of a database with one query each against
+    information_schema TABLES, COLUMNS and STATISTICS. If tables is given, only those
+    tables are loaded. Returns a SchemaSnapshot.
+    """
+    params = {"db": db}
+    table_filter = ""
+    if tables is not None:
+        if not tables:
+            return SchemaSnapshot(db, {}, {}, {})
+        table_filter = " AND TABLE_NAME IN :tables"
+        params["tables"] = list(tables)
+
+    def query(sql):
+        stmt = text(sql)
+        if tables is not None:
+            stmt = stmt.bindparams(bindparam("tables", expanding=True))
+        return db_connection.execute(stmt, params)
+
+    try:
+        table_rows = query(
+            "SELECT TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_ROWS, CREATE_TIME, UPDATE_TIME "
+            f"FROM information_schema.TABLES WHERE TABLE_SCHEMA = :db{table_filter}"
+        )
+        table_info = {
+            row[0]: {
+                "type": row[1],
+                "engine": row[2],
+                "rows": row[3],
+                "create_time": row[4],
+                "update_time": row[5],
+            }
+            for row in table_rows
+        }
+
+        column_rows = query(
+            "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA "
+            "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = :db"
+            f"{table_filter} ORDER BY TABLE_NAME, ORDINAL_POSITION"
+        )
+        columns = {}
+        for row in column_rows:
+            columns.setdefault(row[0], []).append((row[1], row[2], row[3], row[4], row[5], row[6]))
+
+        index_rows = query(
+            "SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME "
+            "FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = :db"
+            f"{table_filter} ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+        )
+        indexes = {}
+        for row in index_rows:
+            table_indexes = indexes.setdefault(row[0], {})
+            table_indexes.setdefault(row[1], (bool(int(row[2])), []))[1].append(row[3])
+    except Exception as e:
+        raise DbToolsError(f"Failed to load schema metadata for db {db}: {e}")
+
+    logging.debug(f"Loaded schema snapshot of {db}: {len(table_info)} tables")
+    return SchemaSnapshot(db, table_info, columns, indexes)
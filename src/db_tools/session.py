@@ -0,0 +1,53 @@
+from sqlalchemy import text
+import logging
+import threading
+
+# Key in Connection.info under which the session's current database is remembered.
+# Connection.info follows the DBAPI connection through the pool and is cleared
+# when SQLAlchemy invalidates or reconnects it, so the tracking can't go stale that way.
+CURRENT_DB_KEY = "db_tools.current_db"
+
+_stats_lock = threading.Lock()
+_stats = {"use_issued": 0, "use_skipped": 0}
+
+def ensure_database(db_connection, db):
+    """
+    Makes db the session's current database, issuing USE only if the connection
+    is not already on it. Helpers call this instead of running USE unconditionally.
+    """
+    if db_connection.info.get(CURRENT_DB_KEY) == db:
+        with _stats_lock:
+            _stats["use_skipped"] += 1
+        return
+    db_connection.execute(text(f"USE `{db}`;"))
+    db_connection.info[CURRENT_DB_KEY] = db
+    with _stats_lock:
+        _stats["use_issued"] += 1
+
+def forget_current_database(db_connection):
+    """Call after running a USE (or anything that may change the database) outside ensure_database."""
+    db_connection.info.pop(CURRENT_DB_KEY, None)
+
+def get_round_trip_stats():
+    """
+    Returns {"use_issued": n, "use_skipped": m} since the last reset;
+    use_skipped is the number of round trips saved.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+def reset_round_trip_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+def log_round_trips_saved(label, since=None):
+    """Logs the USE statements issued and skipped since the stats snapshot `since` (or the last reset)."""
+    stats = get_round_trip_stats()
+    if since:
+        stats = {key: stats[key] - since.get(key, 0) for key in stats}
+    logging.info(
+        f"{label}: {stats['use_issued']} USE statements issued, "
+        f"{stats['use_skipped']} round trips saved"
+    )
+    return stats
@@ -0,0 +1,186 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+import logging
+import math
+import multiprocessing
+import os
+from .shared import DbToolsError
+from .checksum_compare import get_pk_boundaries, split_pk_ranges
+from .row_count import get_estimated_count
+from .submit_handler import get_table_count
+from .snapshot import SNAPSHOT_LOCKED, SNAPSHOT_MODES, SNAPSHOT_TIMEOUT, global_read_lock, start_snapshot
+from .content_compare import (
+    DEFAULT_CHUNK_SIZE,
+    iter_table_rows_by_pk,
+    merge_join_rows,
+    prepare_content_compare,
+)
+
+# Engines of the current worker process, created once by _init_worker
+_worker_engines = None
+# Snapshot connections of the current worker process, when the compare uses a snapshot
+_worker_connections = None
+
+def engine_factory(engine):
+    """
+    Returns a picklable callable that creates an engine like engine in another process
+    (with the password, and without a connection pool since each worker holds one connection).
+    """
+    return partial(create_engine, engine.url.render_as_string(hide_password=False), poolclass=NullPool)
+
+def _start_worker_snapshots(connections, barrier):
+    """
+    Worker side of the snapshot handshake, in three rounds of barrier: all workers are connected;
+    the parent has taken the global read lock (SNAPSHOT_LOCKED), so the snapshots start now; all
+    snapshots are started, so the parent can release the lock. A failure aborts the barrier,
+    which makes everyone else's wait fail at once.
+    """
+    try:
+        barrier.wait(SNAPSHOT_TIMEOUT)
+        barrier.wait(SNAPSHOT_TIMEOUT)
+        for connection in connections:
+            start_snapshot(connection)
+        barrier.wait(SNAPSHOT_TIMEOUT)
+    except Exception:
+        barrier.abort()
+        raise
+
+def _await_worker_snapshots(barrier, engines, locked):
+    """
+    Parent side of _start_worker_snapshots: waits until every worker is connected, and only then
+    takes the global read lock (if locked) for as long as the workers take to start their snapshots.
+    Process start-up and connecting therefore happen before the lock, which only covers the handshake.
+    """
+    try:
+        barrier.wait(SNAPSHOT_TIMEOUT)
+        with global_read_lock(engines, enabled=locked):
+            barrier.wait(SNAPSHOT_TIMEOUT)
+            barrier.wait(SNAPSHOT_TIMEOUT)
+    except Exception:
+        barrier.abort()
+        raise
+
+def _init_worker(src_factory, tgt_factory, snapshot_barrier=None):
+    """
+    Creates the worker's engines. With snapshot_barrier, also opens one connection per side
+    and starts a consistent snapshot on each together with the other workers
+    (see _start_worker_snapshots).
+    """
+    global _worker_engines, _worker_connections
+    _worker_engines = (src_factory(), tgt_factory())
+    if snapshot_barrier is not None:
+        try:
+            _worker_connections = tuple(engine.connect() for engine in _worker_engines)
+        except Exception:
+            snapshot_barrier.abort()
+            raise
+        _start_worker_snapshots(_worker_connections, snapshot_barrier)
+
+def _merge_shard(src_conn, tgt_conn, source_db, target_db, table, meta, lower, upper, source_where, target_where, chunk_size):
+    src_cols, _, pk, col_names, compare_cols = meta
+    src_rows = iter_table_rows_by_pk(
+        src_conn, source_db, table, src_cols, pk, where_clause=source_where, chunk_size=chunk_size,
+        lower=lower, upper=upper
+    )
+    tgt_rows = iter_table_rows_by_pk(
+        tgt_conn, target_db, table, src_cols, pk, where_clause=target_where, chunk_size=chunk_size,
+        lower=lower, upper=upper
+    )
+    return list(merge_join_rows(src_rows, tgt_rows, col_names, pk, compare_cols))
+
+def _compare_shard(source_db, target_db, table, meta, lower, upper, source_where, target_where, chunk_size):
+    """Runs in a worker process: merge-joins the rows with lower < pk <= upper on its own connections."""
+    args = (source_db, target_db, table, meta, lower, upper, source_where, target_where, chunk_size)
+    if _worker_connections is not None:
+        # The snapshot connections stay open for the worker's lifetime
+        return _merge_shard(*_worker_connections, *args)
+    src_engine, tgt_engine = _worker_engines
+    with src_engine.connect() as src_conn, tgt_engine.connect() as tgt_conn:
+        return _merge_shard(src_conn, tgt_conn, *args)
+
+def plan_shards(src_conn, source_db, table, pk, shards, where_clause=None, schema=None):
+    """
+    Splits the PK space of the source table into about shards ranges of equal row counts.
+    Returns (lower, upper) ranges as split_pk_ranges does.
+    """
+    rows = get_estimated_count(src_conn, source_db, table, where_clause=where_clause, schema=schema)
+    if rows <= 0:
+        rows = get_table_count(src_conn, source_db, table, where_clause=where_clause)
+    range_size = max(1, math.ceil(rows / shards))
+    boundaries = get_pk_boundaries(src_conn, source_db, table, pk, range_size, where_clause=where_clause)
+    # The estimate may be off; never hand out more than shards ranges
+    return split_pk_ranges(boundaries[:shards - 1])
+
+def compare_table_sharded(
+    src_engine, tgt_engine, source_db, target_db, table, source_where=None, target_where=None,
+    workers=None, shards=None, chunk_size=DEFAULT_CHUNK_SIZE, src_schema=None, tgt_schema=None,
+    engine_factories=None, snapshot=None
+):
+    """
+    compare_table_content on several cores: splits the PK space into shards ranges (default:
+    one per worker) and merge-joins each range in one of workers processes (default: one per
+    CPU), each with its own source and target connections. The partial results are merged
+    in PK order into the usual dict.
+    engine_factories is a (source, target) pair of picklable callables creating the engines
+    in the workers; by default they are made from the engines' URLs (see engine_factory).
+    With snapshot (SNAPSHOT_CONSISTENT or SNAPSHOT_LOCKED) every worker starts a consistent
+    snapshot when it starts, and no shard is read before all workers have theirs; in
+    SNAPSHOT_LOCKED mode the global read lock is held only while the connected workers start
+    their snapshots.
+    """
+    if snapshot and snapshot not in SNAPSHOT_MODES:
+        raise DbToolsError(f"Unknown snapshot mode: {snapshot}")
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    with src_engine.connect() as src_conn, tgt_engine.connect() as tgt_conn:
+        meta = prepare_content_compare(src_conn, tgt_conn, source_db, target_db, table, src_schema, tgt_schema)
+        ranges = plan_shards(src_conn, source_db, table, meta[2], shards, source_where, src_schema)
+    logging.info(f"Comparing {table} in {len(ranges)} shards on {workers} processes")
+
+    if engine_factories is None:
+        engine_factories = (engine_factory(src_engine), engine_factory(tgt_engine))
+    partials = [None] * len(ranges)
+    workers = min(workers, len(ranges))
+    # spawn: forked copies of live connections (or of a GUI's threads) are not safe to use
+    mp_context = multiprocessing.get_context("spawn")
+    # The workers and this process go through the snapshot handshake on the barrier
+    barrier = mp_context.Barrier(workers + 1) if snapshot else None
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=mp_context,
+        initializer=_init_worker, initargs=(*engine_factories, barrier)
+    ) as executor:
+        # Workers are started by submit; their shards wait in the queue until the handshake is done
+        futures = {
+            executor.submit(
+                _compare_shard, source_db, target_db, table, meta, lower, upper,
+                source_where, target_where, chunk_size
+            ): i
+            for i, (lower, upper) in enumerate(ranges)
+        }
+        if barrier is not None:
+            try:
+                _await_worker_snapshots(barrier, (src_engine, tgt_engine), snapshot == SNAPSHOT_LOCKED)
+            except Exception as e:
+                for future in futures:
+                    future.cancel()
+                raise DbToolsError(f"Failed to start the snapshots of {table}: {e}")
+        try:
+            for future in as_completed(futures):
+                partials[futures[future]] = future.result()
+        except DbToolsError:
+            raise
+        except Exception as e:
+            raise DbToolsError(f"Sharded compare of {table} failed: {e}")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    result = {"missing_in_target": [], "missing_in_source": [], "values_different": []}
+    for diffs in partials:
+        for kind, item in diffs:
+            result[kind].append(item)
+    result["pk"] = meta[2]
+    result["col_names"] = meta[3]
+    return result
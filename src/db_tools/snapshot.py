@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+import logging
+from .shared import DbToolsError
+
+# Snapshot modes for parallel compares
+# consistent: every worker session starts a consistent-snapshot transaction, all at once
+SNAPSHOT_CONSISTENT = "consistent"
+# locked: as consistent, but under FLUSH TABLES WITH READ LOCK, so no commit lands between the snapshots
+SNAPSHOT_LOCKED = "locked"
+SNAPSHOT_MODES = [SNAPSHOT_CONSISTENT, SNAPSHOT_LOCKED]
+
+# Seconds to wait for all workers to take their snapshots
+SNAPSHOT_TIMEOUT = 60
+
+def start_snapshot(db_connection):
+    """
+    Ends any open transaction on db_connection and starts a read-only REPEATABLE READ
+    transaction WITH CONSISTENT SNAPSHOT, so all its later reads see one point in time.
+    The snapshot lasts until the connection rolls back or is closed.
+    """
+    try:
+        db_connection.rollback()
+        db_connection.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        db_connection.exec_driver_sql("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+    except Exception as e:
+        raise DbToolsError(f"Failed to start a consistent snapshot: {e}")
+
+def end_snapshots(connections):
+    for connection in connections:
+        try:
+            connection.rollback()
+        except Exception as e:
+            logging.warning(f"Failed to end snapshot: {e}")
+
+@contextmanager
+def global_read_lock(engines, enabled=True):
+    """
+    Holds FLUSH TABLES WITH READ LOCK on every distinct server behind engines for the block
+    (needs the RELOAD privilege), on separate connections. Writes wait meanwhile, so keep it short.
+    Does nothing when enabled is false.
+    """
+    lock_connections = []
+    try:
+        if enabled:
+            # One lock per server, even when several engines (source and target) point at it
+            servers = {}
+            for engine in engines:
+                servers.setdefault((engine.url.host, engine.url.port), engine)
+            for engine in servers.values():
+                connection = engine.connect()
+                lock_connections.append(connection)
+                connection.exec_driver_sql("FLUSH TABLES WITH READ LOCK")
+            logging.debug(f"Holding the global read lock on {len(lock_connections)} servers")
+    except Exception as e:
+        for connection in lock_connections:
+            connection.close()
+        raise DbToolsError(f"Failed to take the global read lock: {e}")
+    try:
+        yield
+    finally:
+        for connection in lock_connections:
+            try:
+                connection.exec_driver_sql("UNLOCK TABLES")
+            except Exception as e:
+                logging.warning(f"Failed to release the global read lock: {e}")
+            finally:
+                connection.close()
+
+def start_consistent_snapshots(connections, mode=SNAPSHOT_CONSISTENT):
+    """
+    Starts a snapshot (see start_snapshot) on every connection, back to back, so parallel
+    workers reading through them see the same data. In SNAPSHOT_LOCKED mode this happens under
+    global_read_lock, so even busy servers commit nothing in between.
+    """
+    if mode not in SNAPSHOT_MODES:
+        raise DbToolsError(f"Unknown snapshot mode: {mode}")
+    with global_read_lock({connection.engine for connection in connections}, enabled=mode == SNAPSHOT_LOCKED):
+        for connection in connections:
+            start_snapshot(connection)
+    logging.info(f"Started {mode} snapshots on {len(connections)} connections")
@@ -1,11 +1,56 @@
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from deepdiff import DeepDiff
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .shared import DbToolsError
+from .session import ensure_database, get_round_trip_stats, log_round_trips_saved
+from .schema_snapshot import load_schema_snapshot
+from .compare_report import ALL_TABLES, PHASE_COUNT, PHASE_DIFF, PHASE_METADATA, phase
+from .content_compare import get_primary_key
+from .snapshot import end_snapshots, start_consistent_snapshots
+from .row_count import (
+    COUNT_EXACT,
+    COUNT_ESTIMATED,
+    COUNT_EXACT_PARALLEL,
+    COUNT_CACHED,
+    COUNT_LABELS,
+    DEFAULT_COUNT_WORKERS,
+    get_estimated_count,
+    get_exact_count_parallel,
+    get_count_cached,
+)
+
+# Default number of tables compared concurrently by compare_tables_parallel
+DEFAULT_MAX_WORKERS = 4
+# Most tables the GUIs let compare concurrently; their engines' pools are sized for it
+MAX_WORKERS = 16
+
+def engine_pool_options(max_workers=MAX_WORKERS, shared=True):
+    """
+    create_engine pool arguments for compares on up to max_workers workers. Each worker holds one
+    connection per side, both from the same pool when source and target share the engine (shared),
+    and the caller keeps one of its own. COUNT_EXACT_PARALLEL counts share DEFAULT_COUNT_WORKERS
+    extra connections per engine (see row_count.count_slots), which is all the overflow allows,
+    so a server never sees more than about max_workers * sides + 1 connections.
+    """
+    sides = 2 if shared else 1
+    return {"pool_size": max_workers * sides + 1, "max_overflow": DEFAULT_COUNT_WORKERS}
+
+def connect(engine):
+    """engine.connect(), with a pool exhausted by too many workers reported as a DbToolsError."""
+    try:
+        return engine.connect()
+    except PoolTimeoutError as e:
+        raise DbToolsError(
+            f"No free connection to {engine.url.host} in time; compare fewer tables at once: {e}"
+        )
 
 def get_tables(db_connection, db):
     try:
-        db_connection.execute(text(f"USE `{db}`;"))
+        ensure_database(db_connection, db)
         result = db_connection.execute(text("SHOW TABLES;"))
         tables = [row[0] for row in result]
         return tables
@@ -14,7 +59,7 @@ def get_tables(db_connection, db):
 
 def get_table_columns(db_connection, db, table):
     try:
-        db_connection.execute(text(f"USE `{db}`;"))
+        ensure_database(db_connection, db)
         result = db_connection.execute(text(f"SHOW COLUMNS FROM `{table}`;"))
         columns = [(row[0], row[1], row[2], row[3], row[4],row[5]) for row in result]  # (name, type, extra)
         return columns
@@ -23,7 +68,7 @@ def get_table_columns(db_connection, db, table):
 
 def get_table_count(db_connection, db, table, where_clause=None):
     try:
-        db_connection.execute(text(f"USE `{db}`;"))
+        ensure_database(db_connection, db)
         sql = f"SELECT COUNT(*) FROM `{table}`"
         logging.debug(f"Executing SQL: {sql} with parameters: {where_clause}")
         if where_clause and where_clause.strip():
@@ -33,6 +78,35 @@ def get_table_count(db_connection, db, table, where_clause=None):
     except Exception as e:
         raise DbToolsError(f"Failed to get table count for {table}: {e}")
     
+def get_row_count(db_connection, db, table, where_clause=None, strategy=COUNT_EXACT, schema=None):
+    """
+    Counts the rows of a table with the given strategy (see row_count.COUNT_STRATEGIES).
+    Returns (count, label) where label says which kind of number it is: "exact",
+    "estimated" or "cached". schema (a SchemaSnapshot) saves the metadata lookups.
+    """
+    if strategy == COUNT_EXACT:
+        return get_table_count(db_connection, db, table, where_clause=where_clause), COUNT_LABELS[COUNT_EXACT]
+    if strategy == COUNT_ESTIMATED:
+        count = get_estimated_count(db_connection, db, table, where_clause=where_clause, schema=schema)
+        return count, COUNT_LABELS[COUNT_ESTIMATED]
+    if strategy == COUNT_EXACT_PARALLEL:
+        pk = schema.primary_key(table) if schema is not None else get_primary_key(db_connection, db, table)
+        count = None
+        if pk:
+            count = get_exact_count_parallel(db_connection.engine, db, table, pk, where_clause=where_clause)
+        if count is None:
+            logging.debug(f"No integer PK on {table}, falling back to a single COUNT(*)")
+            count = get_table_count(db_connection, db, table, where_clause=where_clause)
+        return count, COUNT_LABELS[COUNT_EXACT_PARALLEL]
+    if strategy == COUNT_CACHED:
+        count, from_cache = get_count_cached(
+            db_connection, db, table,
+            lambda: get_table_count(db_connection, db, table, where_clause=where_clause),
+            where_clause=where_clause
+        )
+        return count, COUNT_LABELS[COUNT_CACHED] if from_cache else COUNT_LABELS[COUNT_EXACT]
+    raise DbToolsError(f"Unknown row count strategy: {strategy}")
+
 def compare_table_structure(src_cols, tgt_cols, src_constraints=None, tgt_constraints=None):
     """
     Compare table structure including columns, primary key, unique keys, and indices.
@@ -85,41 +159,207 @@ def compare_table_structure(src_cols, tgt_cols, src_constraints=None, tgt_constr
     is_same = len(details) == 0
     return is_same, details
 
-def compare_tables_handler(src_connection, tgt_connection, source_db, target_db, selected_tables, table_where_clauses=None):
-    tgt_tables = get_tables(tgt_connection, target_db)
-    result_rows = []
-    table_where_clauses = table_where_clauses or {}
-    for table in selected_tables:
-        exists = table in tgt_tables if isinstance(tgt_tables, list) else False
-        where_clause = table_where_clauses.get(table, None)
-        logging.debug(f"Comparing table: {table}, Exists in target: {exists}, WHERE clause: {where_clause}")
-        if not exists:
-            row = (table, "❌ No", "-", "-")
+def compare_table_row(
+    src_connection, tgt_connection, source_db, target_db, table, tgt_tables, where_clause=None,
+    src_schema=None, tgt_schema=None, count_strategy=COUNT_EXACT, report=None
+):
+    """
+    Compares a single table and returns its result row:
+    (table, exists_in_target, structure_status, row_count_status).
+    If SchemaSnapshots are given, structure metadata is read from them instead of the servers.
+    Counts not from an exact count are labelled in row_count_status, e.g. "[estimated]".
+    report (a CompareReport) records the metadata, diff and count phases of the table.
+    """
+    exists = table in tgt_tables if isinstance(tgt_tables, list) else False
+    logging.debug(f"Comparing table: {table}, Exists in target: {exists}, WHERE clause: {where_clause}")
+    if not exists:
+        return (table, "❌ No", "-", "-")
+    with phase(report, table, PHASE_METADATA):
+        if src_schema is not None and tgt_schema is not None:
+            src_cols = src_schema.columns(table)
+            tgt_cols = tgt_schema.columns(table)
+            src_constraints = src_schema.constraints(table)
+            tgt_constraints = tgt_schema.constraints(table)
         else:
             src_cols = get_table_columns(src_connection, source_db, table)
             tgt_cols = get_table_columns(tgt_connection, target_db, table)
             src_constraints = get_table_constraints_and_indices(src_connection, source_db, table)
             tgt_constraints = get_table_constraints_and_indices(tgt_connection, target_db, table)
 
-            if isinstance(src_cols, str) or isinstance(tgt_cols, str):
-                struct = "⚠️ Error"
-            else:
-                is_same, diff_details = compare_table_structure(src_cols, tgt_cols, src_constraints, tgt_constraints)
-                struct = "✅ Same" if is_same else "⚠️ Different"
-            src_count = get_table_count(src_connection, source_db, table, where_clause=where_clause)
-            tgt_count = get_table_count(tgt_connection, target_db, table, where_clause=where_clause)
-            if isinstance(src_count, str) or isinstance(tgt_count, str):
-                row_count = "⚠️ Error"
-            else:
-                row_count = (
-                    f"✅ Same ({src_count})"
-                    if src_count == tgt_count
-                    else f"⚠️ Different (src: {src_count}, tgt: {tgt_count})"
+    if isinstance(src_cols, str) or isinstance(tgt_cols, str):
+        struct = "⚠️ Error"
+    else:
+        with phase(report, table, PHASE_DIFF):
+            is_same, diff_details = compare_table_structure(src_cols, tgt_cols, src_constraints, tgt_constraints)
+        struct = "✅ Same" if is_same else "⚠️ Different"
+    with phase(report, table, PHASE_COUNT):
+        src_count, src_label = get_row_count(
+            src_connection, source_db, table, where_clause=where_clause, strategy=count_strategy, schema=src_schema
+        )
+        tgt_count, tgt_label = get_row_count(
+            tgt_connection, target_db, table, where_clause=where_clause, strategy=count_strategy, schema=tgt_schema
+        )
+    if isinstance(src_count, str) or isinstance(tgt_count, str):
+        row_count = "⚠️ Error"
+    else:
+        row_count = (
+            f"✅ Same ({src_count})"
+            if src_count == tgt_count
+            else f"⚠️ Different (src: {src_count}, tgt: {tgt_count})"
+        )
+        labels = sorted({src_label, tgt_label} - {COUNT_LABELS[COUNT_EXACT]})
+        if labels:
+            row_count += f" [{', '.join(labels)}]"
+    return (table, "✅ Yes", struct, row_count)
+
+def load_compare_snapshots(src_connection, tgt_connection, source_db, target_db, selected_tables):
+    """
+    Loads the structure metadata of the selected tables on both sides in bulk.
+    Returns (src_schema, tgt_schema) SchemaSnapshots.
+    """
+    src_schema = load_schema_snapshot(src_connection, source_db, selected_tables)
+    tgt_schema = load_schema_snapshot(tgt_connection, target_db, selected_tables)
+    return src_schema, tgt_schema
+
+def compare_tables_handler(
+    src_connection, tgt_connection, source_db, target_db, selected_tables, table_where_clauses=None,
+    max_workers=1, src_schema=None, tgt_schema=None, count_strategy=COUNT_EXACT, report=None,
+    progress_callback=None, snapshot=None
+):
+    """
+    Compares the selected tables and returns one result row per table, in order.
+    Structure metadata comes from src_schema/tgt_schema, which are bulk-loaded from
+    information_schema when not given. count_strategy selects how rows are counted
+    (see get_row_count).
+    With max_workers > 1 the tables are compared concurrently (see compare_tables_parallel)
+    on new connections from the engines behind src_connection and tgt_connection.
+    report (a CompareReport) collects per-table phase timings and query counts;
+    the bulk metadata load is recorded under the table name ALL_TABLES.
+    progress_callback(table, row, done, total) is called as each table finishes.
+    snapshot (SNAPSHOT_CONSISTENT or SNAPSHOT_LOCKED, see start_consistent_snapshots) makes
+    all tables be read from one consistent snapshot per side; the count strategy
+    COUNT_EXACT_PARALLEL opens its own connections and reads outside of it.
+    """
+    stats_before = get_round_trip_stats()
+    if src_schema is None or tgt_schema is None:
+        with phase(report, ALL_TABLES, PHASE_METADATA):
+            src_schema, tgt_schema = load_compare_snapshots(
+                src_connection, tgt_connection, source_db, target_db, selected_tables
+            )
+    if max_workers > 1 and len(selected_tables) > 1:
+        result_rows = compare_tables_parallel(
+            src_connection.engine, tgt_connection.engine, source_db, target_db,
+            selected_tables, table_where_clauses, max_workers=max_workers,
+            src_schema=src_schema, tgt_schema=tgt_schema, count_strategy=count_strategy, report=report,
+            progress_callback=progress_callback, snapshot=snapshot
+        )
+    else:
+        tgt_tables = tgt_schema.tables()
+        result_rows = []
+        table_where_clauses = table_where_clauses or {}
+        if snapshot:
+            start_consistent_snapshots([src_connection, tgt_connection], snapshot)
+        try:
+            for table in selected_tables:
+                where_clause = table_where_clauses.get(table, None)
+                row = compare_table_row(
+                    src_connection, tgt_connection, source_db, target_db, table, tgt_tables, where_clause,
+                    src_schema=src_schema, tgt_schema=tgt_schema, count_strategy=count_strategy, report=report
                 )
-            row = (table, "✅ Yes", struct, row_count)
-        result_rows.append(row)
+                result_rows.append(row)
+                if progress_callback:
+                    progress_callback(table, row, len(result_rows), len(selected_tables))
+        finally:
+            if snapshot:
+                end_snapshots([src_connection, tgt_connection])
+    log_round_trips_saved(f"Compared {len(selected_tables)} tables", since=stats_before)
     return result_rows
 
+def compare_tables_parallel(
+    src_engine, tgt_engine, source_db, target_db, selected_tables, table_where_clauses=None,
+    max_workers=DEFAULT_MAX_WORKERS, src_schema=None, tgt_schema=None, count_strategy=COUNT_EXACT, report=None,
+    progress_callback=None, snapshot=None
+):
+    """
+    Parallel compare_tables_handler: compares tables on a pool of max_workers threads.
+    Each worker holds at most one connection per side, so no more than max_workers
+    connections are opened against either server. Result rows keep the order of selected_tables.
+    """
+    table_where_clauses = table_where_clauses or {}
+    if src_schema is None or tgt_schema is None:
+        with phase(report, ALL_TABLES, PHASE_METADATA), \
+                connect(src_engine) as src_connection, connect(tgt_engine) as tgt_connection:
+            src_schema, tgt_schema = load_compare_snapshots(
+                src_connection, tgt_connection, source_db, target_db, selected_tables
+            )
+    tgt_tables = tgt_schema.tables()
+
+    def compare_one(src_connection, tgt_connection, table):
+        return compare_table_row(
+            src_connection, tgt_connection, source_db, target_db, table,
+            tgt_tables, table_where_clauses.get(table, None),
+            src_schema=src_schema, tgt_schema=tgt_schema, count_strategy=count_strategy, report=report
+        )
+
+    results = {}
+    for table, row in iter_tables_parallel(
+        src_engine, tgt_engine, selected_tables, compare_one, max_workers, snapshot=snapshot
+    ):
+        results[table] = row
+        if progress_callback:
+            progress_callback(table, row, len(results), len(selected_tables))
+    return [results[table] for table in selected_tables]
+
+def iter_tables_parallel(
+    src_engine, tgt_engine, tables, compare_one, max_workers=DEFAULT_MAX_WORKERS, snapshot=None
+):
+    """
+    Runs compare_one(src_connection, tgt_connection, table) for every table on a pool of
+    max_workers threads and yields (table, result) pairs as they finish, in completion order.
+    Each worker holds at most one connection per side, so no more than max_workers
+    connections are opened against either server; all are closed at the end.
+    With snapshot (see start_consistent_snapshots) the worker connections are opened up front
+    and all start their snapshots together, so every worker reads the same point in time.
+    """
+    local = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
+    ready = queue.SimpleQueue()
+    if snapshot:
+        try:
+            for _ in range(min(max_workers, len(tables))):
+                pair = (connect(src_engine), connect(tgt_engine))
+                opened.extend(pair)
+                ready.put(pair)
+            start_consistent_snapshots(opened, snapshot)
+        except Exception:
+            for connection in opened:
+                connection.close()
+            raise
+
+    def worker_connections():
+        if not hasattr(local, "connections"):
+            if snapshot:
+                local.connections = ready.get_nowait()
+            else:
+                local.connections = (connect(src_engine), connect(tgt_engine))
+                with opened_lock:
+                    opened.extend(local.connections)
+        return local.connections
+
+    def run(table):
+        src_connection, tgt_connection = worker_connections()
+        return compare_one(src_connection, tgt_connection, table)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compare") as executor:
+            futures = {executor.submit(run, table): table for table in tables}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    finally:
+        for connection in opened:
+            connection.close()
+
 def generate_alter_table_sql(src_cols, tgt_cols, table):
     """
     Generate SQL statements to alter the target table to match the source table structure.
@@ -0,0 +1,185 @@
+from sqlalchemy import text
+import os
+import re
+import json
+import bisect
+import logging
+import datetime
+from .shared import DbToolsError
+from .content_compare import pk_columns
+from .metadata_cache import server_key
+
+CHECKPOINT_DIR = os.path.expanduser("~/.db_tools_checkpoints")
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_COMMIT_EVERY = 10000
+
+# Deletes run first so re-inserted unique values can't collide with rows about to go
+APPLY_PHASES = ["delete", "update", "insert"]
+
+def default_checkpoint_path(tgt_conn, target_db, table):
+    """
+    Checkpoint file for applying to target_db.table on the server behind tgt_conn, so servers
+    with the same database and table names never resume from each other's checkpoints.
+    """
+    server = re.sub(r"[^\w.@-]", "_", server_key(tgt_conn))
+    return os.path.join(CHECKPOINT_DIR, f"{server}.{target_db}.{table}.json")
+
+def load_checkpoint(checkpoint_path):
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, "r") as f:
+        return json.load(f)
+
+def _save_checkpoint(checkpoint_path, checkpoint):
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2, default=str)
+    os.replace(tmp_path, checkpoint_path)
+
+def _pk_value_json(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+def _pk_json(key):
+    return json.loads(json.dumps(list(key), default=_pk_value_json))
+
+def _pk_from_json(values, like):
+    """Turns a checkpointed PK back into the value types of the PK tuple like, so the two compare."""
+    key = []
+    for value, sample in zip(values, like):
+        if isinstance(sample, (bytes, bytearray)):
+            value = bytes.fromhex(value)
+        elif isinstance(sample, (datetime.date, datetime.time)):
+            value = type(sample).fromisoformat(value)
+        elif value is not None and not isinstance(sample, bool) and sample is not None:
+            value = type(sample)(value)
+        key.append(value)
+    return tuple(key)
+
+def _apply_plan(diff, pk_cols, auto_inc_cols):
+    """
+    Returns {phase: (sql, [(pk_tuple, params), ...])} with rows sorted by PK,
+    so that a checkpointed PK splits every diff of the table into applied and pending rows.
+    """
+    col_names = diff["col_names"]
+    insert_cols = [c for c in col_names if c not in auto_inc_cols]
+    set_cols = [c for c in insert_cols if c not in pk_cols]
+    pk_where = " AND ".join(f"`{c}` = :p{i}" for i, c in enumerate(pk_cols))
+
+    def key_of(row):
+        return tuple(row[c] for c in pk_cols)
+
+    def pk_params(row):
+        return {f"p{i}": row[c] for i, c in enumerate(pk_cols)}
+
+    deletes = sorted(((key_of(row), pk_params(row)) for row in diff["missing_in_source"]), key=lambda op: op[0])
+    updates = sorted(
+        (
+            (key_of(d["source"]), {**pk_params(d["source"]), **{f"v{i}": d["source"][c] for i, c in enumerate(set_cols)}})
+            for d in diff["values_different"]
+        ),
+        key=lambda op: op[0]
+    ) if set_cols else []
+    inserts = sorted(
+        ((key_of(row), {f"v{i}": row[c] for i, c in enumerate(insert_cols)}) for row in diff["missing_in_target"]),
+        key=lambda op: op[0]
+    )
+    return {
+        "delete": ("DELETE FROM {table} WHERE " + pk_where, deletes),
+        "update": (
+            "UPDATE {table} SET " + ", ".join(f"`{c}` = :v{i}" for i, c in enumerate(set_cols)) + " WHERE " + pk_where,
+            updates
+        ),
+        "insert": (
+            "INSERT INTO {table} (" + ", ".join(f"`{c}`" for c in insert_cols) + ") VALUES ("
+            + ", ".join(f":v{i}" for i in range(len(insert_cols))) + ")",
+            inserts
+        ),
+    }
+
+def apply_content_diff(
+    tgt_conn, target_db, table, diff, auto_inc_cols=None, batch_size=DEFAULT_BATCH_SIZE,
+    commit_every=DEFAULT_COMMIT_EVERY, checkpoint_path=None, progress_callback=None
+):
+    """
+    Applies a compare_table_content result directly to the target table:
+    deletes rows missing in source, updates changed rows and inserts missing rows,
+    each phase in PK order with parameterised executemany batches of batch_size rows.
+    Commits every commit_every rows and records the last committed phase/PK in
+    checkpoint_path, so running it again, with the same diff or one recomputed since,
+    skips the phases before that one and the rows up to that PK.
+    The checkpoint is removed once everything is applied.
+    Returns {"delete": n, "update": n, "insert": n, "commits": n, "resumed": bool}.
+    """
+    pk_cols = pk_columns(diff["pk"])
+    if not pk_cols:
+        raise DbToolsError("No primary key found in table")
+    plan = _apply_plan(diff, pk_cols, auto_inc_cols or [])
+    qualified = f"`{target_db}`.`{table}`"
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    start_phase, start_pos = 0, 0
+    if checkpoint:
+        if checkpoint.get("table") != qualified or checkpoint.get("phase") not in APPLY_PHASES:
+            raise DbToolsError(f"Checkpoint {checkpoint_path} does not belong to {qualified}")
+        start_phase = APPLY_PHASES.index(checkpoint["phase"])
+        ops = plan[checkpoint["phase"]][1]
+        if ops:
+            try:
+                last_pk = _pk_from_json(checkpoint["last_pk"], ops[0][0])
+                start_pos = bisect.bisect_right([key for key, _ in ops], last_pk)
+            except (KeyError, TypeError, ValueError) as e:
+                raise DbToolsError(f"Checkpoint {checkpoint_path} does not match this diff; delete it to start over: {e}")
+        logging.info(f"Resuming apply on {qualified} at {checkpoint['phase']} after PK {checkpoint['last_pk']}")
+
+    stats = {phase: 0 for phase in APPLY_PHASES}
+    stats["commits"] = 0
+    stats["resumed"] = checkpoint is not None
+    uncommitted = 0
+
+    def commit(phase, last_key):
+        nonlocal uncommitted
+        tgt_conn.commit()
+        stats["commits"] += 1
+        uncommitted = 0
+        if checkpoint_path:
+            _save_checkpoint(checkpoint_path, {"table": qualified, "phase": phase, "last_pk": _pk_json(last_key)})
+
+    try:
+        for phase_idx, phase in enumerate(APPLY_PHASES):
+            if phase_idx < start_phase:
+                continue
+            sql, ops = plan[phase]
+            position = start_pos if phase_idx == start_phase else 0
+            stmt = text(sql.format(table=qualified))
+            while position < len(ops):
+                batch = ops[position:position + batch_size]
+                tgt_conn.execute(stmt, [params for _, params in batch])
+                position += len(batch)
+                stats[phase] += len(batch)
+                uncommitted += len(batch)
+                if uncommitted >= commit_every:
+                    commit(phase, ops[position - 1][0])
+                if progress_callback:
+                    progress_callback(phase, position, len(ops))
+            if uncommitted:
+                commit(phase, ops[position - 1][0])
+    except Exception as e:
+        # A dead or killed connection can fail the rollback too; keep the original error
+        try:
+            tgt_conn.rollback()
+        except Exception as rollback_error:
+            logging.warning(f"Rollback after failed apply on {qualified} failed: {rollback_error}")
+        raise DbToolsError(
+            f"Failed to apply sync to {qualified} ({stats}); "
+            f"re-run with the same diff to resume from the last commit: {e}"
+        )
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logging.info(f"Applied sync to {qualified}: {stats}")
+    return stats
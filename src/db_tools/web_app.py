@@ -2,22 +2,42 @@ import streamlit as st
 import pandas as pd
 import json
 import os
+import hmac
+import hashlib
+import secrets
+import tempfile
 from sqlalchemy import create_engine, text
 from db_tools.submit_handler import (
-    get_tables,
-    get_table_columns,
-    get_table_constraints_and_indices,
     compare_table_structure,
     generate_alter_table_sql,
-    get_table_count,
+    get_row_count,
+    get_tables,
 )
+from db_tools.row_count import COUNT_STRATEGIES
 from db_tools.content_compare import (
     compare_table_content,
     generate_content_sync_sql,
+    sync_batch_bytes,
+)
+from db_tools.diff_view import DIFF_KIND_LABELS, page_count, stream_table_diff
+from db_tools.diff_export import INLINE_DIFF_LIMIT, export_table_diff, upgrade_script_header
+from db_tools.sample_compare import DEFAULT_SAMPLE_SIZE, SAMPLE_METHODS, compare_table_sample, format_sample_result
+from db_tools.metadata_cache import DEFAULT_TABLE_LIST_TTL, DEFAULT_TTL, metadata_cache
+from db_tools.schema_snapshot import load_schema_snapshot
+from db_tools.sync_apply import apply_content_diff, default_checkpoint_path
+from db_tools.compare_report import (
+    ALL_TABLES,
+    PHASE_COUNT,
+    PHASE_DIFF,
+    PHASE_METADATA,
+    CompareReport,
+    append_to_report_log,
+    phase,
 )
 from db_tools.shared import (
     load_connections,
     save_connections,
+    DbToolsError,
 )
 
 st.set_page_config(page_title="DB Tools Web", layout="wide")
@@ -25,6 +45,131 @@ st.title("DB Tools - Web Edition")
 
 connections = load_connections()
 
+# Cached data is keyed by the login profile ("user@host:port" plus a credential fingerprint),
+# database and a generation number; bumping the generation (Refresh Metadata, applying a sync)
+# makes it stale. The caches are shared by every session on the server, so only a session that
+# logged in with the same password reuses another's data.
+@st.cache_resource(show_spinner=False)
+def get_engine(host, port, username, password):
+    """One engine, and so one connection pool, per server login, shared by all sessions and reruns."""
+    return create_engine(f"mysql+pymysql://{username}:{password}@{host}:{port}/")
+
+@st.cache_resource(show_spinner=False)
+def fingerprint_secret():
+    """Random key of this server process, so the credential fingerprints can't be reversed offline."""
+    return secrets.token_bytes(32)
+
+def login_profile(host, port, username, password):
+    """The cache key of a server login: user@host:port and a keyed hash of the password."""
+    fingerprint = hmac.new(fingerprint_secret(), password.encode(), hashlib.sha256).hexdigest()[:16]
+    return f"{username}@{host}:{port}#{fingerprint}"
+
+def log_in(engine):
+    """Checks the login on the server before any cached data is used."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+@st.cache_resource(show_spinner=False)
+def cache_generations():
+    return {}
+
+def generation(profile, db):
+    return cache_generations().get((profile, db), 0)
+
+def invalidate_database(profile, db):
+    """Drops everything cached for db on the profile's server: table lists, structure, counts and diffs."""
+    cache_generations()[(profile, db)] = generation(profile, db) + 1
+    metadata_cache.invalidate(db=db)
+
+@st.cache_data(ttl=DEFAULT_TABLE_LIST_TTL, show_spinner=False)
+def load_databases(profile, _engine):
+    with _engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SHOW DATABASES;"))]
+
+@st.cache_data(ttl=DEFAULT_TABLE_LIST_TTL, show_spinner=False)
+def load_tables(profile, db, gen, _engine):
+    with _engine.connect() as conn:
+        return get_tables(conn, db)
+
+@st.cache_data(ttl=DEFAULT_TTL, show_spinner=False, max_entries=256)
+def load_snapshot(profile, db, tables, gen, _engine):
+    with _engine.connect() as conn:
+        return load_schema_snapshot(conn, db, list(tables))
+
+@st.cache_data(ttl=DEFAULT_TTL, show_spinner=False, max_entries=1024)
+def load_row_count(profile, db, table, where_clause, strategy, gen, _engine, _schema):
+    with _engine.connect() as conn:
+        return get_row_count(conn, db, table, where_clause=where_clause, strategy=strategy, schema=_schema)
+
+@st.cache_data(show_spinner="Comparing content...", max_entries=32)
+def load_content_diff(
+    src_profile, tgt_profile, source_db, target_db, table, where_clause, src_gen, tgt_gen,
+    _engine, _target_engine, _src_schema, _tgt_schema, _report
+):
+    with _engine.connect() as src_conn, _target_engine.connect() as tgt_conn:
+        return compare_table_content(
+            src_conn, tgt_conn, source_db, target_db, table,
+            source_where=where_clause, target_where=where_clause,
+            src_schema=_src_schema, tgt_schema=_tgt_schema, report=_report
+        )
+
+@st.cache_data(show_spinner="Sampling content...", max_entries=256)
+def load_sample_check(
+    src_profile, tgt_profile, source_db, target_db, table, where_clause, method, sample_size, src_gen, tgt_gen,
+    _engine, _target_engine, _src_schema, _tgt_schema, _report
+):
+    with _engine.connect() as src_conn, _target_engine.connect() as tgt_conn:
+        return compare_table_sample(
+            src_conn, tgt_conn, source_db, target_db, table, source_where=where_clause, target_where=where_clause,
+            sample_size=sample_size, method=method, src_schema=_src_schema, tgt_schema=_tgt_schema, report=_report
+        )
+
+# Download formats of the content differences: label -> file suffix (see diff_export.export_format)
+EXPORT_CHOICES = {
+    "Differences (gzipped JSON Lines)": ".ndjson.gz",
+    "Differences (Parquet)": ".parquet",
+    "Sync SQL (gzipped)": ".sql.gz",
+}
+
+def export_path(name):
+    """A path for a file to offer for download, in a temporary directory kept per session."""
+    if "export_dir" not in st.session_state:
+        st.session_state["export_dir"] = tempfile.mkdtemp(prefix="db_tools_export_")
+    return os.path.join(st.session_state["export_dir"], name)
+
+def download_file(label, path, key):
+    with open(path, "rb") as f:
+        st.download_button(label, f, file_name=os.path.basename(path), key=key)
+
+def render_diff_pager(table, pager, streaming):
+    """
+    Shows one page of a DiffPager with type and column filters. Run as a fragment that
+    reruns every second while streaming, so new diffs show up without rerunning the page.
+    """
+    kind_labels = {"All": None, **{label: [kind] for kind, label in DIFF_KIND_LABELS.items()}}
+    filter_cols = st.columns(2)
+    kinds = kind_labels[filter_cols[0].selectbox("Difference type", list(kind_labels), key=f"diff_kind_{table}")]
+    column = filter_cols[1].selectbox("Changed column", ["Any"] + pager.col_names, key=f"diff_column_{table}")
+    column = None if column == "Any" else column
+    total = pager.count(kinds, column)
+    pages = page_count(total)
+    page_key = f"diff_page_{table}"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    number = st.number_input(f"Page (of {pages}, {total} rows)", min_value=1, max_value=pages, key=page_key)
+    summary = ", ".join(f"{DIFF_KIND_LABELS[kind]}: {n}" for kind, n in pager.counts().items())
+    if pager.error:
+        st.error(pager.error)
+    st.caption(summary if pager.done else f"Comparing... {summary}")
+    st.dataframe(
+        pd.DataFrame(pager.page(int(number) - 1, kinds=kinds, column=column),
+                     columns=["Type", "Key", "Columns", "Source", "Target"]),
+        use_container_width=True, hide_index=True
+    )
+    if streaming and pager.done:
+        # A full rerun recreates the fragment without the refresh timer
+        st.rerun()
+
 # --- Sidebar: Connection ---
 st.sidebar.header("Source Database Connection")
 
@@ -80,20 +225,25 @@ if use_different_target:
 
 if st.sidebar.button("Connect"):
     try:
-        engine = create_engine(f"mysql+pymysql://{username}:{password}@{host}:{port}/")
-        with engine.connect() as conn:
-            dbs = [row[0] for row in conn.execute(text("SHOW DATABASES;"))]
+        engine = get_engine(host, port, username, password)
+        log_in(engine)
+        source_profile = login_profile(host, port, username, password)
+        dbs = load_databases(source_profile, engine)
         st.session_state['engine'] = engine
+        st.session_state['source_profile'] = source_profile
         st.session_state['dbs'] = dbs
         
         if use_different_target:
-            target_engine = create_engine(f"mysql+pymysql://{target_username}:{target_password}@{target_host}:{target_port}/")
-            with target_engine.connect() as conn:
-                target_dbs = [row[0] for row in conn.execute(text("SHOW DATABASES;"))]
+            target_engine = get_engine(target_host, target_port, target_username, target_password)
+            log_in(target_engine)
+            target_profile_key = login_profile(target_host, target_port, target_username, target_password)
+            target_dbs = load_databases(target_profile_key, target_engine)
             st.session_state['target_engine'] = target_engine
+            st.session_state['target_profile_key'] = target_profile_key
             st.session_state['target_dbs'] = target_dbs
         else:
             st.session_state['target_engine'] = engine
+            st.session_state['target_profile_key'] = source_profile
             st.session_state['target_dbs'] = dbs
             
         st.success("Connected!")
@@ -103,6 +253,8 @@ if st.sidebar.button("Connect"):
 if 'engine' in st.session_state:
     engine = st.session_state['engine']
     target_engine = st.session_state['target_engine']
+    source_profile = st.session_state['source_profile']
+    target_profile_key = st.session_state['target_profile_key']
     dbs = st.session_state['dbs']
     target_dbs = st.session_state['target_dbs']
 
@@ -110,11 +262,12 @@ if 'engine' in st.session_state:
     st.sidebar.header("Database Selection")
     source_db = st.sidebar.selectbox("Source Database", dbs, key="src_db")
     target_db = st.sidebar.selectbox("Target Database", target_dbs, key="tgt_db")
+    if st.sidebar.button("Refresh Metadata", help="Re-read table lists, structure, row counts and diffs from the servers"):
+        invalidate_database(source_profile, source_db)
+        invalidate_database(target_profile_key, target_db)
 
     # --- Table Selection ---
-    with engine.connect() as src_conn, target_engine.connect() as tgt_conn:
-        src_tables = get_tables(src_conn, source_db)
-        tgt_tables = get_tables(tgt_conn, target_db)
+    src_tables = load_tables(source_profile, source_db, generation(source_profile, source_db), engine)
     selected_tables = st.multiselect("Select Tables to Compare", src_tables)
 
     # --- WHERE Clauses ---
@@ -122,40 +275,92 @@ if 'engine' in st.session_state:
     for table in selected_tables:
         where_clauses[table] = st.text_area(f"WHERE clause for `{table}` (optional)", key=f"where_{table}")
 
+    count_strategy = st.selectbox(
+        "Row count", COUNT_STRATEGIES,
+        help="estimated: instant from table statistics; exact_parallel: exact COUNT(*) split over PK ranges; "
+             "cached: reuse counts from a recent run if the table hasn't changed"
+    )
+
+    sample_method = st.selectbox(
+        "Quick content check by sampling", ["off"] + SAMPLE_METHODS,
+        help="Compares a random (or stratified by PK range) sample of rows per table and estimates the share of "
+             "differing rows; unlike row counts it also catches changed values"
+    )
+    sample_size = DEFAULT_SAMPLE_SIZE
+    if sample_method != "off":
+        sample_size = int(st.number_input("Sampled rows per side", min_value=100, value=DEFAULT_SAMPLE_SIZE, step=100))
+
     # --- Compare Button ---
     if st.button("Compare"):
-        with engine.connect() as src_conn, target_engine.connect() as tgt_conn:
-            results = []
-            for table in selected_tables:
-                src_cols = get_table_columns(src_conn, source_db, table)
-                tgt_cols = get_table_columns(tgt_conn, target_db, table)
-                src_constraints = get_table_constraints_and_indices(src_conn, source_db, table)
-                tgt_constraints = get_table_constraints_and_indices(tgt_conn, target_db, table)
+        report = CompareReport(f"{source_db} -> {target_db}")
+        src_gen = generation(source_profile, source_db)
+        tgt_gen = generation(target_profile_key, target_db)
+        with phase(report, ALL_TABLES, PHASE_METADATA):
+            src_schema = load_snapshot(source_profile, source_db, tuple(selected_tables), src_gen, engine)
+            tgt_schema = load_snapshot(target_profile_key, target_db, tuple(selected_tables), tgt_gen, target_engine)
+        results = []
+        for table in selected_tables:
+            with phase(report, table, PHASE_METADATA):
+                src_cols = src_schema.columns(table)
+                tgt_cols = tgt_schema.columns(table)
+                src_constraints = src_schema.constraints(table)
+                tgt_constraints = tgt_schema.constraints(table)
+            with phase(report, table, PHASE_DIFF):
                 is_same, struct_diff = compare_table_structure(src_cols, tgt_cols, src_constraints, tgt_constraints)
-                where_clause = where_clauses.get(table, None)
-                src_count = get_table_count(src_conn, source_db, table, where_clause=where_clause)
-                tgt_count = get_table_count(tgt_conn, target_db, table, where_clause=where_clause)
-                content_status = (
-                    f"✅ Same ({src_count})" if src_count == tgt_count else f"⚠️ Different (src: {src_count}, tgt: {tgt_count})"
+            where_clause = where_clauses.get(table, "").strip() or None
+            with phase(report, table, PHASE_COUNT):
+                src_count, src_label = load_row_count(
+                    source_profile, source_db, table, where_clause, count_strategy, src_gen, engine, src_schema
                 )
-                results.append({
-                    "table": table,
-                    "structure": "✅ Same" if is_same else "⚠️ Different",
-                    "structure_diff": struct_diff,
-                    "content": content_status,
-                    "src_cols": src_cols,
-                    "tgt_cols": tgt_cols,
-                    "src_constraints": src_constraints,
-                    "tgt_constraints": tgt_constraints,
-                })
+                tgt_count, tgt_label = load_row_count(
+                    target_profile_key, target_db, table, where_clause, count_strategy, tgt_gen, target_engine, tgt_schema
+                )
+            content_status = (
+                f"✅ Same ({src_count})" if src_count == tgt_count else f"⚠️ Different (src: {src_count}, tgt: {tgt_count})"
+            )
+            content_status += f" ({src_label} / {tgt_label} count)" if src_label != tgt_label else f" ({src_label} count)"
+            sample_status = None
+            if sample_method != "off" and is_same:
+                try:
+                    sample_status = format_sample_result(load_sample_check(
+                        source_profile, target_profile_key, source_db, target_db, table, where_clause,
+                        sample_method, sample_size, src_gen, tgt_gen, engine, target_engine, src_schema, tgt_schema, report
+                    ))
+                except DbToolsError as e:
+                    sample_status = f"Error: {e}"
+            results.append({
+                "table": table,
+                "structure": "✅ Same" if is_same else "⚠️ Different",
+                "structure_diff": struct_diff,
+                "content": content_status,
+                "sample": sample_status,
+                "src_cols": src_cols,
+                "tgt_cols": tgt_cols,
+                "src_constraints": src_constraints,
+                "tgt_constraints": tgt_constraints,
+            })
         st.session_state['results'] = results
         st.session_state['source_db'] = source_db
         st.session_state['target_db'] = target_db
         st.session_state['where_clauses'] = where_clauses
+        st.session_state['schemas'] = (src_schema, tgt_schema)
+        st.session_state['report'] = report
+        # Diffs shown for the previous results are stale now
+        for key in [key for key in st.session_state if key.startswith("diff_pager_")]:
+            st.session_state.pop(key).cancel()
+        for key in [key for key in st.session_state if key.startswith("diff_export_")]:
+            del st.session_state[key]
+        append_to_report_log(report)
 
     # --- Results Table ---
     if 'results' in st.session_state:
         st.subheader("Comparison Results")
+        report = st.session_state['report']
+        batch_sync = st.checkbox(
+            "Batch sync SQL into multi-row statements",
+            help="Groups rows into multi-row INSERT/DELETE and INSERT ... ON DUPLICATE KEY UPDATE statements "
+                 "sized to the target's max_allowed_packet"
+        )
         for res in st.session_state['results']:
             st.markdown(f"### Table: `{res['table']}`")
             st.write("**Structure:**", res["structure"])
@@ -190,22 +395,129 @@ if 'engine' in st.session_state:
                     styled_df = df.style.apply(highlight_diff, axis=1)
                     st.dataframe(styled_df, use_container_width=True)
             st.write("**Content:**", res["content"])
-            if st.button(f"Generate Upgrade Script for `{res['table']}`", key=f"upgrade_{res['table']}"):
-                with engine.connect() as src_conn, target_engine.connect() as tgt_conn:
-                    auto_inc_cols = [col[0] for col in res["src_cols"] if "auto_increment" in str(col[5]).lower()]
-                    alter_sql = generate_alter_table_sql(res["src_cols"], res["tgt_cols"], res["table"])
-                    
-                    # Use a single connection for content comparison (source connection with cross-database queries)
-                    diff = compare_table_content(
-                        src_conn, tgt_conn, st.session_state['source_db'], st.session_state['target_db'], res["table"],
-                        source_where=st.session_state['where_clauses'].get(res["table"]),
-                        target_where=st.session_state['where_clauses'].get(res["table"])
+            if res.get("sample"):
+                st.write("**Sample:**", res["sample"])
+            if res["structure"] == "✅ Same":
+                pager_key = f"diff_pager_{res['table']}"
+                if st.button(f"Show Content Differences for `{res['table']}`", key=f"show_diff_{res['table']}"):
+                    if pager_key in st.session_state:
+                        st.session_state[pager_key].cancel()
+                    where_clause = st.session_state['where_clauses'].get(res["table"], "").strip() or None
+                    st.session_state[pager_key] = stream_table_diff(
+                        engine, target_engine, st.session_state['source_db'], st.session_state['target_db'], res["table"],
+                        source_where=where_clause, target_where=where_clause,
+                        src_schema=st.session_state['schemas'][0], tgt_schema=st.session_state['schemas'][1], report=report
                     )
-                    if isinstance(diff, dict) and "error" not in diff:
-                        data_sql = generate_content_sync_sql(
-                            diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], 
-                            res["table"], diff["values_different"], diff["pk"], auto_inc_cols=auto_inc_cols
+                if pager_key in st.session_state:
+                    pager = st.session_state[pager_key]
+                    with st.expander("Content Differences", expanded=True):
+                        st.fragment(render_diff_pager, run_every=None if pager.done else 1.0)(
+                            res["table"], pager, not pager.done
+                        )
+                        # Exports re-run the diff streaming into a file, so memory stays flat however many rows differ
+                        export_key = f"diff_export_{res['table']}"
+                        export_cols = st.columns(2)
+                        choice = export_cols[0].selectbox("Save as", list(EXPORT_CHOICES), key=f"export_format_{res['table']}")
+                        if export_cols[1].button("Prepare Download", key=f"export_{res['table']}"):
+                            where_clause = st.session_state['where_clauses'].get(res["table"], "").strip() or None
+                            path = export_path(f"{st.session_state['target_db']}.{res['table']}{EXPORT_CHOICES[choice]}")
+                            auto_inc_cols = [col[0] for col in res["src_cols"] if "auto_increment" in str(col[5]).lower()]
+                            try:
+                                with st.spinner("Exporting content differences..."), \
+                                        engine.connect() as src_conn, target_engine.connect() as tgt_conn:
+                                    export_table_diff(
+                                        src_conn, tgt_conn, st.session_state['source_db'], st.session_state['target_db'],
+                                        res["table"], path, source_where=where_clause, target_where=where_clause,
+                                        src_schema=st.session_state['schemas'][0], tgt_schema=st.session_state['schemas'][1],
+                                        auto_inc_cols=auto_inc_cols,
+                                        batch_bytes=sync_batch_bytes(tgt_conn) if batch_sync else None,
+                                        upsert_updates=batch_sync, report=report
+                                    )
+                                st.session_state[export_key] = path
+                            except DbToolsError as e:
+                                st.error(str(e))
+                        if export_key in st.session_state:
+                            download_file(
+                                f"Download {os.path.basename(st.session_state[export_key])}",
+                                st.session_state[export_key], key=f"download_{export_key}"
+                            )
+            st.write("**Timing:**", report.summary(res["table"]))
+            with st.expander("Show Timing Breakdown"):
+                st.dataframe(
+                    pd.DataFrame.from_dict(report.table_phases(res["table"]), orient="index"),
+                    use_container_width=True
+                )
+            if st.button(f"Generate Upgrade Script for `{res['table']}`", key=f"upgrade_{res['table']}"):
+                auto_inc_cols = [col[0] for col in res["src_cols"] if "auto_increment" in str(col[5]).lower()]
+                alter_sql = generate_alter_table_sql(res["src_cols"], res["tgt_cols"], res["table"])
+                src_db_name, tgt_db_name = st.session_state['source_db'], st.session_state['target_db']
+                where_clause = st.session_state['where_clauses'].get(res["table"], "").strip() or None
+                try:
+                    with engine.connect() as src_conn, target_engine.connect() as tgt_conn:
+                        batch_bytes = sync_batch_bytes(tgt_conn) if batch_sync else None
+                        # Stream the script into a gzipped file first, so a large diff is never held in memory
+                        path = export_path(f"{tgt_db_name}.{res['table']}.sql.gz")
+                        with st.spinner("Comparing content..."):
+                            counts = export_table_diff(
+                                src_conn, tgt_conn, src_db_name, tgt_db_name, res["table"], path,
+                                source_where=where_clause, target_where=where_clause,
+                                src_schema=st.session_state['schemas'][0], tgt_schema=st.session_state['schemas'][1],
+                                auto_inc_cols=auto_inc_cols, batch_bytes=batch_bytes, upsert_updates=batch_sync,
+                                header=upgrade_script_header(alter_sql), report=report
+                            )
+                        if sum(counts.values()) > INLINE_DIFF_LIMIT:
+                            # Too large to show or keep; applying compares again (see below)
+                            st.session_state[f"sync_diff_{res['table']}"] = (None, auto_inc_cols)
+                            st.info(f"{sum(counts.values())} rows differ, too many to show the upgrade script here.")
+                            download_file("Download Upgrade Script", path, key=f"download_script_{res['table']}")
+                        else:
+                            # Memoised per (profile, db, table, where), so regenerating the script doesn't re-run the diff
+                            diff = load_content_diff(
+                                source_profile, target_profile_key, src_db_name, tgt_db_name, res["table"], where_clause,
+                                generation(source_profile, src_db_name), generation(target_profile_key, tgt_db_name),
+                                engine, target_engine, st.session_state['schemas'][0], st.session_state['schemas'][1], report
+                            )
+                            data_sql = generate_content_sync_sql(
+                                diff["col_names"], diff["missing_in_target"], diff["missing_in_source"],
+                                res["table"], diff["values_different"], diff["pk"], auto_inc_cols=auto_inc_cols,
+                                batch_bytes=batch_bytes, upsert_updates=batch_sync, report=report
+                            )
+                            st.session_state[f"sync_diff_{res['table']}"] = (diff, auto_inc_cols)
+                            st.code(f"-- Structure Upgrade\n{alter_sql}\n\n-- Data Sync\n{data_sql}", language="sql")
+                except DbToolsError as e:
+                    st.code(f"-- Structure Upgrade\n{alter_sql}\n\n-- Data Sync\n-- Error: {e}", language="sql")
+            if f"sync_diff_{res['table']}" in st.session_state:
+                confirm = st.checkbox(
+                    f"Write the data sync for `{res['table']}` to the target database (structure changes are not applied)",
+                    key=f"confirm_apply_{res['table']}"
+                )
+                if st.button(f"Apply Data Sync to Target for `{res['table']}`", key=f"apply_{res['table']}", disabled=not confirm):
+                    diff, auto_inc_cols = st.session_state[f"sync_diff_{res['table']}"]
+                    target_db_name = st.session_state['target_db']
+                    try:
+                        with target_engine.connect() as tgt_conn:
+                            if diff is None:
+                                # Large diffs aren't kept between reruns; the checkpoint skips rows already applied
+                                where_clause = st.session_state['where_clauses'].get(res["table"], "").strip() or None
+                                with st.spinner("Comparing content..."), engine.connect() as src_conn:
+                                    diff = compare_table_content(
+                                        src_conn, tgt_conn, st.session_state['source_db'], target_db_name, res["table"],
+                                        source_where=where_clause, target_where=where_clause,
+                                        src_schema=st.session_state['schemas'][0], tgt_schema=st.session_state['schemas'][1]
+                                    )
+                            stats = apply_content_diff(
+                                tgt_conn, target_db_name, res["table"], diff, auto_inc_cols=auto_inc_cols,
+                                checkpoint_path=default_checkpoint_path(tgt_conn, target_db_name, res["table"])
+                            )
+                        del st.session_state[f"sync_diff_{res['table']}"]
+                        invalidate_database(target_profile_key, target_db_name)
+                        st.success(
+                            f"Deleted {stats['delete']}, updated {stats['update']}, inserted {stats['insert']} rows "
+                            f"in {stats['commits']} commits" + (" (resumed from checkpoint)" if stats["resumed"] else "")
                         )
-                    else:
-                        data_sql = "-- Error: Cannot compare content across different connections"
-                    st.code(f"-- Structure Upgrade\n{alter_sql}\n\n-- Data Sync\n{data_sql}", language="sql")
\ No newline at end of file
+                    except DbToolsError as e:
+                        st.error(str(e))
+        st.download_button(
+            "Download Timing Report (JSON Lines)", report.to_jsonl(),
+            file_name="compare_report.jsonl", mime="application/x-ndjson"
+        )
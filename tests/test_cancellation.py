@@ -0,0 +1,36 @@
+import unittest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, text
+from db_tools.cancellation import QueryCanceller, QueryCancelled
+
+class TestQueryCanceller(unittest.TestCase):
+
+    def test_cancel_blocks_further_queries_until_unwatched(self):
+        engine = create_engine("sqlite://")
+        canceller = QueryCanceller().watch(engine)
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT 1")).scalar(), 1)
+            canceller.cancel()
+            with self.assertRaises(QueryCancelled):
+                conn.execute(text("SELECT 1"))
+            canceller.unwatch()
+            self.assertEqual(conn.execute(text("SELECT 1")).scalar(), 1)
+
+    def test_cancel_kills_running_queries_on_side_connection(self):
+        engine = MagicMock()
+        conn = MagicMock()
+        conn.engine = engine
+        conn.connection.dbapi_connection.thread_id.return_value = 42
+        cursor = object()
+        canceller = QueryCanceller()
+
+        canceller._before_execute(conn, cursor, "SELECT SLEEP(60)", {}, None, False)
+        killed = canceller.cancel()
+
+        self.assertEqual(killed, 1)
+        side_cursor = engine.raw_connection.return_value.cursor.return_value
+        side_cursor.execute.assert_called_once_with("KILL QUERY 42")
+        engine.raw_connection.return_value.close.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
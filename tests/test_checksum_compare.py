@@ -0,0 +1,127 @@
+import hashlib
+import unittest
+from functools import reduce
+from unittest.mock import MagicMock, patch
+from db_tools.checksum_compare import (
+    checksum_cols,
+    compare_table_checksums,
+    compare_table_server_digests,
+    get_pk_boundaries,
+    get_range_checksum,
+    get_range_midpoint,
+    iter_server_row_digests,
+    split_pk_ranges,
+)
+
+def fake_server(tables):
+    """
+    Side effects for get_range_checksum and iter_table_rows_by_pk over tables
+    ({db: {id: name}}), hashing the given columns of each row and combining them by XOR like the server.
+    """
+    def checksum(conn, db, table, hash_cols, pk, lower, upper, where, algorithm):
+        rows = [{'id': k, 'name': v} for k, v in tables[db].items()]
+        hashes = [int(hashlib.md5(repr([row[c] for c in hash_cols]).encode()).hexdigest()[:16], 16) for row in rows]
+        return len(rows), reduce(lambda a, b: a ^ b, hashes, 0)
+
+    def rows(conn, db, table, columns, pk, where_clause=None, lower=None, upper=None):
+        return iter(sorted(tables[db].items()))
+    return checksum, rows
+
+# auto_increment id: prepare_content_compare leaves it out of the compared columns
+AUTO_INC_META = ([('id', 'int', 'auto_increment'), ('name', 'varchar(10)', '')],) * 2 + ('id', ['id', 'name'], ['name'])
+
+class TestChecksumCompare(unittest.TestCase):
+
+    def test_split_pk_ranges(self):
+        self.assertEqual(split_pk_ranges([]), [(None, None)])
+        self.assertEqual(split_pk_ranges([10, 20]), [(None, 10), (10, 20), (20, None)])
+
+    def test_where_clause_runs_in_the_compared_database(self):
+        where = "id IN (SELECT id FROM live_ids)"
+        for query, first_row in (
+            (lambda conn: get_pk_boundaries(conn, 'db', 't', 'id', where_clause=where), None),
+            (lambda conn: get_range_checksum(conn, 'db', 't', ['id'], 'id', 1, 9, where_clause=where), (0, 0)),
+            (lambda conn: get_range_midpoint(conn, 'db', 't', 'id', 10, 1, 9, where_clause=where), None),
+        ):
+            conn = MagicMock()
+            conn.info = {}
+            conn.execute.return_value.first.return_value = first_row
+            query(conn)
+            self.assertEqual(str(conn.execute.call_args_list[0].args[0]), "USE `db`;")
+
+    @patch('db_tools.checksum_compare.iter_table_rows_by_pk')
+    @patch('db_tools.checksum_compare.get_range_checksum')
+    @patch('db_tools.checksum_compare.get_pk_boundaries')
+    @patch('db_tools.checksum_compare.prepare_content_compare')
+    def test_only_mismatching_ranges_are_fetched(self, mock_prepare, mock_boundaries, mock_checksum, mock_rows):
+        cols = [('id', 'int', ''), ('name', 'varchar(10)', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'name'], ['id', 'name'])
+        mock_boundaries.return_value = [10]
+
+        def checksum(conn, db, table, compare_cols, pk, lower, upper, where, algorithm):
+            if lower is None:
+                return 10, 1234
+            return 5, (111 if db == 'src' else 222)
+        mock_checksum.side_effect = checksum
+
+        def rows(conn, db, table, columns, pk, where_clause=None, lower=None, upper=None):
+            return iter([(11, 'x')] if db == 'src' else [(11, 'y')])
+        mock_rows.side_effect = rows
+
+        result = compare_table_checksums(MagicMock(), MagicMock(), 'src', 'tgt', 't')
+
+        self.assertEqual(result["checksum_stats"], {"ranges_checked": 2, "ranges_fetched": 1, "rows_fetched": 10})
+        self.assertEqual(result["missing_in_target"], [])
+        self.assertEqual(result["missing_in_source"], [])
+        self.assertEqual([d["pk"] for d in result["values_different"]], [11])
+        for call in mock_rows.call_args_list:
+            self.assertEqual((call.kwargs['lower'], call.kwargs['upper']), (10, None))
+
+    @patch('db_tools.checksum_compare.iter_table_rows_by_pk')
+    @patch('db_tools.checksum_compare.get_range_checksum')
+    @patch('db_tools.checksum_compare.get_pk_boundaries', return_value=[])
+    @patch('db_tools.checksum_compare.prepare_content_compare', return_value=AUTO_INC_META)
+    def test_auto_increment_pk_is_hashed(self, mock_prepare, mock_boundaries, mock_checksum, mock_rows):
+        self.assertEqual(checksum_cols('id', ['name']), ['id', 'name'])
+        # Values swapped between keys, and identical rows that would cancel out under BIT_XOR
+        for tables in ({'src': {1: 'x', 2: 'y'}, 'tgt': {1: 'y', 2: 'x'}}, {'src': {1: 'x', 2: 'x'}, 'tgt': {1: 'z', 2: 'z'}}):
+            mock_checksum.side_effect, mock_rows.side_effect = fake_server(tables)
+
+            result = compare_table_checksums(MagicMock(), MagicMock(), 'src', 'tgt', 't')
+
+            self.assertEqual(result["checksum_stats"]["ranges_fetched"], 1)
+            self.assertEqual([d["pk"] for d in result["values_different"]], [1, 2])
+
+    def test_iter_server_row_digests_pages_by_keyset(self):
+        conn = MagicMock()
+        conn.execute.side_effect = [[(1, 11), (2, 22)], [(3, 33)]]
+
+        digests = list(iter_server_row_digests(conn, 'db', 't', 'id', ['id', 'body'], chunk_size=2))
+
+        self.assertEqual(digests, [(1, 11), (2, 22), (3, 33)])
+        first_sql, second_sql = (str(call.args[0]) for call in conn.execute.call_args_list)
+        self.assertIn("SELECT `id`, CAST(CONV(SUBSTRING(MD5(", first_sql)
+        self.assertNotIn("`body` FROM", first_sql)
+        self.assertIn("WHERE `id` > :lo_0 ORDER BY `id` LIMIT 2", second_sql)
+        self.assertEqual(conn.execute.call_args_list[1].args[1], {'lo_0': 2})
+
+    @patch('db_tools.content_compare.fetch_rows_by_pk')
+    @patch('db_tools.checksum_compare.iter_server_row_digests')
+    @patch('db_tools.checksum_compare.prepare_content_compare')
+    def test_server_digests_fetch_only_mismatching_rows(self, mock_prepare, mock_digests, mock_fetch):
+        cols = [('id', 'int', ''), ('body', 'longtext', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'body'], ['id', 'body'])
+        digests = {'src': [(1, 2**64 - 1), (2, 5), (3, 7)], 'tgt': [(2, 5), (3, 8), (4, 9)]}
+        mock_digests.side_effect = lambda conn, db, *args: iter(digests[db])
+        rows = {'src': {1: (1, 'a'), 3: (3, 'c')}, 'tgt': {3: (3, 'C'), 4: (4, 'd')}}
+        mock_fetch.side_effect = lambda conn, db, table, columns, pk, keys, where: [rows[db][k] for k in keys]
+
+        result = compare_table_server_digests(MagicMock(), MagicMock(), 'src', 'tgt', 't')
+
+        self.assertEqual([call.args[5] for call in mock_fetch.call_args_list], [[1, 3], [4, 3]])
+        self.assertEqual(result["missing_in_target"], [{'id': 1, 'body': 'a'}])
+        self.assertEqual(result["missing_in_source"], [{'id': 4, 'body': 'd'}])
+        self.assertEqual([d["pk"] for d in result["values_different"]], [3])
+
+if __name__ == '__main__':
+    unittest.main()
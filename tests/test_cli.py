@@ -0,0 +1,46 @@
+import sys
+import subprocess
+import unittest
+from unittest.mock import MagicMock, patch
+from db_tools.cli import main, match_names, resolve_database_pairs, where_for, parse_where_clauses
+from db_tools.shared import DbToolsError
+
+class TestCli(unittest.TestCase):
+
+    def test_match_names_with_exclude(self):
+        names = ['orders', 'order_items', 'users', 'tmp_orders']
+        self.assertEqual(match_names(names, ['order*', 'users'], exclude=['*_items']), ['orders', 'users'])
+
+    @patch('db_tools.cli.get_databases')
+    def test_resolve_database_pairs(self, mock_databases):
+        mock_databases.return_value = ['shop_eu', 'shop_us', 'mysql', 'crm']
+
+        pairs = resolve_database_pairs(MagicMock(), ['shop_*', 'crm:crm_copy'])
+
+        self.assertEqual(pairs, [('shop_eu', 'shop_eu'), ('shop_us', 'shop_us'), ('crm', 'crm_copy')])
+        with self.assertRaises(DbToolsError):
+            resolve_database_pairs(MagicMock(), ['shop_*:other'])
+
+    def test_where_clause_globs(self):
+        clauses = parse_where_clauses(['log_*=created_at > NOW() - INTERVAL 1 DAY'])
+        self.assertEqual(where_for('log_2024', clauses), 'created_at > NOW() - INTERVAL 1 DAY')
+        self.assertIsNone(where_for('users', clauses))
+
+    @patch('db_tools.cli.resolve_database_pairs', return_value=[])
+    @patch('db_tools.cli.create_profile_engine')
+    @patch('db_tools.cli.load_connections', return_value={'prod': {'host': 'db1'}})
+    def test_shared_profile_pool_holds_both_sides(self, mock_connections, mock_create_engine, mock_pairs):
+        with patch('sys.stdout'):
+            main(['--source', 'prod', '--workers', '12', 'shop'])
+
+        mock_create_engine.assert_called_once()
+        pool_options = mock_create_engine.call_args.kwargs
+        self.assertGreaterEqual(pool_options['pool_size'], 12 * 2 + 1)
+
+    def test_startup_does_not_import_gui_toolkits(self):
+        code = "import sys, db_tools.cli; print('tkinter' in sys.modules or 'streamlit' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+if __name__ == '__main__':
+    unittest.main()
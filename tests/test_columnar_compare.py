@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from db_tools.columnar_compare import compare_table_content_columnar, iter_aligned_chunks
+from db_tools.content_compare import merge_join_rows
+
+class TestColumnarCompare(unittest.TestCase):
+
+    @patch('db_tools.columnar_compare.iter_aligned_chunks')
+    @patch('db_tools.columnar_compare.prepare_content_compare')
+    def test_matches_row_based_compare(self, mock_prepare, mock_chunks):
+        col_names = ['a', 'b', 'name', 'qty']
+        cols = [(c, 'varchar(10)', '') for c in col_names]
+        mock_prepare.return_value = (cols, cols, ['a', 'b'], col_names, col_names)
+        src_rows = [(1, 1, 'x', 1), (1, 2, 'y', None), (2, 1, 'z', 3)]
+        tgt_rows = [(1, 1, 'x', 1), (1, 2, 'y', 5), (3, 1, 'w', None)]
+        mock_chunks.return_value = iter([(src_rows[:2], tgt_rows[:2]), (src_rows[2:], tgt_rows[2:])])
+
+        result = compare_table_content_columnar(MagicMock(), MagicMock(), 'src', 'tgt', 't')
+
+        expected = {"missing_in_target": [], "missing_in_source": [], "values_different": []}
+        for kind, item in merge_join_rows(src_rows, tgt_rows, col_names, ['a', 'b']):
+            expected[kind].append(item)
+        for kind in expected:
+            self.assertEqual(result[kind], expected[kind])
+        self.assertEqual(result["values_different"][0]["source"]["qty"], None)
+        self.assertEqual(result["changed_mask"].loc[(1, 2)].to_dict(), {'a': False, 'b': False, 'name': False, 'qty': True})
+
+    @patch('db_tools.columnar_compare.iter_table_rows_by_pk')
+    def test_target_tail_is_paged(self, mock_rows):
+        tables = {'src': [(1, 'a'), (2, 'b'), (3, 'c')], 'tgt': [(2, 'b')] + [(i, 'x') for i in range(3, 10)]}
+
+        def rows(conn, db, table, columns, pk, where_clause=None, chunk_size=None, lower=None, upper=None):
+            return iter([row for row in tables[db] if (lower is None or row[0] > lower) and (upper is None or row[0] <= upper)])
+        mock_rows.side_effect = rows
+        cols = [('id', 'int', ''), ('name', 'varchar(10)', '')]
+
+        chunks = list(iter_aligned_chunks(MagicMock(), MagicMock(), 'src', 'tgt', 't', cols, 'id', chunk_size=2))
+
+        self.assertEqual([([r[0] for r in s], [r[0] for r in t]) for s, t in chunks], [
+            ([1, 2], [2]), ([3], [3]), ([], [4, 5]), ([], [6, 7]), ([], [8, 9]),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import json
+import unittest
+from unittest.mock import patch
+from db_tools.compare_report import CompareReport, phase, record_rows, sub_phase
+
+class TestCompareReport(unittest.TestCase):
+
+    @patch('db_tools.compare_report.time.perf_counter')
+    def test_nested_phase_pauses_outer_clock(self, mock_clock):
+        mock_clock.side_effect = [0.0, 1.0, 4.0, 5.0]
+        report = CompareReport("run")
+
+        with phase(report, 't', 'diff'):
+            with sub_phase('fetch'):
+                record_rows([(1, 'abc'), (2, None)])
+
+        phases = report.table_phases('t')
+        self.assertEqual(phases['diff']['wall_time_s'], 2.0)
+        self.assertEqual(phases['fetch'], {"wall_time_s": 3.0, "queries": 0, "rows": 2, "bytes": 5})
+        self.assertEqual(list(phases), ['fetch', 'diff'])
+
+    def test_no_report_records_nothing(self):
+        with phase(None, 't', 'fetch') as stats:
+            record_rows([(1,)])
+        self.assertIsNone(stats)
+
+    def test_jsonl_has_one_record_per_table_and_phase(self):
+        report = CompareReport("run")
+        with phase(report, 'a', 'count'):
+            pass
+        with phase(report, 'b', 'metadata'):
+            pass
+
+        records = [json.loads(line) for line in report.to_jsonl().splitlines()]
+        self.assertEqual([(r["table"], r["phase"]) for r in records], [('a', 'count'), ('b', 'metadata')])
+        self.assertEqual(records[0]["report"], "run")
+
+if __name__ == '__main__':
+    unittest.main()
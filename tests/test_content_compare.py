@@ -0,0 +1,134 @@
+import unittest
+from array import array
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from db_tools.content_compare import (
+    _row_digest,
+    compare_row_digests,
+    generate_content_sync_sql,
+    iter_table_rows_by_pk,
+    load_row_digests,
+    merge_join_rows,
+)
+from db_tools.shared import DbToolsError
+
+class TestContentCompare(unittest.TestCase):
+
+    def test_merge_join_rows(self):
+        col_names = ['id', 'name']
+        src_rows = [(1, 'a'), (2, 'b'), (4, 'd')]
+        tgt_rows = [(2, 'B'), (3, 'c'), (4, 'd')]
+
+        diffs = list(merge_join_rows(src_rows, tgt_rows, col_names, 'id'))
+
+        self.assertEqual(diffs, [
+            ("missing_in_target", {'id': 1, 'name': 'a'}),
+            ("values_different", {
+                "pk": 2,
+                "source": {'id': 2, 'name': 'b'},
+                "target": {'id': 2, 'name': 'B'}
+            }),
+            ("missing_in_source", {'id': 3, 'name': 'c'}),
+        ])
+
+    def test_merge_join_rows_composite_pk_and_compare_cols(self):
+        col_names = ['a', 'b', 'seq']
+        src_rows = [(1, 1, 10), (1, 2, 11)]
+        tgt_rows = [(1, 1, 99), (1, 2, 11)]
+
+        diffs = list(merge_join_rows(src_rows, tgt_rows, col_names, ['a', 'b'], compare_cols=['a', 'b']))
+
+        self.assertEqual(diffs, [])
+
+    def test_merge_join_rows_rejects_unordered_input(self):
+        with self.assertRaises(DbToolsError):
+            list(merge_join_rows([(2,), (1,)], [], ['id'], 'id'))
+
+    def test_iter_table_rows_by_pk_pages_with_keyset(self):
+        mock_connection = MagicMock()
+        mock_connection.execute.side_effect = [
+            [(1, 'a'), (2, 'b')],
+            [(3, 'c')],
+        ]
+        columns = [('id', 'int', ''), ('name', 'varchar(10)', '')]
+
+        rows = list(iter_table_rows_by_pk(mock_connection, 'db', 't', columns, 'id', chunk_size=2))
+
+        self.assertEqual(rows, [(1, 'a'), (2, 'b'), (3, 'c')])
+        first_sql, first_params = mock_connection.execute.call_args_list[0].args
+        second_sql, second_params = mock_connection.execute.call_args_list[1].args
+        self.assertIn("ORDER BY `id` LIMIT 2", str(first_sql))
+        self.assertEqual(first_params, {})
+        self.assertIn("`id` > :lo_0", str(second_sql))
+        self.assertEqual(second_params, {'lo_0': 2})
+
+    @patch('db_tools.content_compare.iter_table_rows_by_pk')
+    def test_load_row_digests_keeps_compact_sorted_arrays(self, mock_rows):
+        cols = [('id', 'int', ''), ('n', 'int', '')]
+        mock_rows.return_value = iter([(3, -1), (1, 5), (2, -2)])
+
+        keys, digests = load_row_digests(MagicMock(), 'db', 't', cols, 'id', ['n'])
+
+        self.assertEqual(keys, array('q', [1, 2, 3]))
+        self.assertIsInstance(digests, array)
+        self.assertEqual(len(set(digests)), 3)
+
+    def test_row_digest_tells_rows_apart(self):
+        # hash() wraps integers around every 2**61 - 1 and hashes -1 like -2
+        self.assertNotEqual(_row_digest((7, 'a', 5)), _row_digest((7, 'a', 5 + 2**61 - 1)))
+        self.assertNotEqual(_row_digest((-1,)), _row_digest((-2,)))
+        self.assertNotEqual(_row_digest(('ab', 'c')), _row_digest(('a', 'bc')))
+        self.assertNotEqual(_row_digest((None,)), _row_digest(('',)))
+        self.assertNotEqual(_row_digest((b'1',)), _row_digest(('1',)))
+        # Values that compare equal digest alike
+        self.assertEqual(_row_digest((1, Decimal('2.50'))), _row_digest((1.0, Decimal('2.5'))))
+
+    @patch('db_tools.content_compare.fetch_rows_by_pk')
+    @patch('db_tools.content_compare.iter_table_rows_by_pk')
+    def test_compare_row_digests_fetches_only_differing_keys(self, mock_rows, mock_fetch):
+        cols = [('code', 'varchar(5)', ''), ('n', 'int', '')]
+        meta = (cols, cols, 'code', ['code', 'n'], ['code', 'n'])
+        sides = {
+            'src': [('a', 1), ('b', 2), ('c', 3)],
+            'tgt': [('b', 2), ('c', 30), ('d', 4)],
+        }
+        mock_rows.side_effect = lambda conn, db, *args, **kwargs: iter(sides[db])
+        mock_fetch.side_effect = lambda conn, db, table, columns, pk, keys, where: [r for r in sides[db] if r[0] in keys]
+
+        result = compare_row_digests(MagicMock(), MagicMock(), 'src', 'tgt', 't', meta)
+
+        self.assertEqual(sorted(mock_fetch.call_args_list[0].args[5]), ['a', 'c'])
+        self.assertEqual(sorted(mock_fetch.call_args_list[1].args[5]), ['c', 'd'])
+        self.assertEqual(result["missing_in_target"], [{'code': 'a', 'n': 1}])
+        self.assertEqual(result["missing_in_source"], [{'code': 'd', 'n': 4}])
+        self.assertEqual([d["pk"] for d in result["values_different"]], ['c'])
+
+    def test_generate_content_sync_sql_batched(self):
+        col_names = ['id', 'name']
+        missing_in_target = [{'id': i, 'name': f"n{i}"} for i in range(1, 4)]
+        missing_in_source = [{'id': 7, 'name': 'x'}, {'id': 8, 'name': 'y'}]
+        values_different = [{"pk": 5, "source": {'id': 5, 'name': "it's"}, "target": {'id': 5, 'name': 'old'}}]
+
+        sql = generate_content_sync_sql(
+            col_names, missing_in_target, missing_in_source, 't', values_different, 'id',
+            auto_inc_cols=['id'], batch_bytes=60, upsert_updates=True
+        )
+
+        self.assertEqual(sql.split("\n"), [
+            "INSERT INTO `t` (`name`) VALUES ('n1'),('n2'),('n3');",
+            "DELETE FROM `t` WHERE `id` IN ('7','8');",
+            "INSERT INTO `t` (`id`, `name`) VALUES ('5', 'it\\'s') ON DUPLICATE KEY UPDATE `name`=VALUES(`name`);",
+        ])
+
+    def test_generate_content_sync_sql_respects_batch_bytes(self):
+        missing_in_source = [{'a': i, 'b': i} for i in range(10)]
+
+        sql = generate_content_sync_sql(['a', 'b'], [], missing_in_source, 't', pk=['a', 'b'], batch_bytes=80)
+
+        stmts = sql.split("\n")
+        self.assertGreater(len(stmts), 1)
+        self.assertTrue(all(len(stmt) <= 80 for stmt in stmts))
+        self.assertTrue(stmts[0].startswith("DELETE FROM `t` WHERE (`a`, `b`) IN (('0', '0'),"))
+
+if __name__ == '__main__':
+    unittest.main()
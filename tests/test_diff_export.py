@@ -0,0 +1,76 @@
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from db_tools.shared import DbToolsError
+from db_tools.content_compare import SyncSqlWriter, generate_content_sync_sql
+from db_tools.diff_export import export_diffs, export_format, write_diffs_ndjson, write_upgrade_script
+
+def sample_diffs():
+    return [
+        ("missing_in_target", {'id': 1, 'name': "o'neil", 'day': datetime.date(2024, 1, 2)}),
+        ("values_different", {
+            "pk": 2, "source": {'id': 2, 'name': 'b', 'day': None}, "target": {'id': 2, 'name': 'B', 'day': None}
+        }),
+        ("missing_in_source", {'id': 9, 'name': 'z', 'day': None}),
+        ("missing_in_target", {'id': 3, 'name': 'c', 'day': None}),
+    ]
+
+class TestDiffExport(unittest.TestCase):
+
+    def test_write_diffs_ndjson(self):
+        out = io.StringIO()
+        counts = write_diffs_ndjson(sample_diffs(), out, 'id')
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(counts, {"missing_in_target": 2, "missing_in_source": 1, "values_different": 1})
+        self.assertEqual(records[0], {
+            "kind": "missing_in_target", "key": 1,
+            "source": {'id': 1, 'name': "o'neil", 'day': '2024-01-02'}, "target": None
+        })
+        self.assertEqual(records[1]["target"]["name"], 'B')
+        self.assertEqual((records[2]["key"], records[2]["source"]), (9, None))
+
+    def test_sync_sql_writer_streams_batches(self):
+        out = io.StringIO()
+        writer = SyncSqlWriter(out, ['id', 'name', 'day'], 't', pk='id', batch_bytes=1000)
+        for kind, item in sample_diffs():
+            writer.write(kind, item)
+        # Per-row UPDATEs are written at once, batches when full or on close
+        self.assertEqual(out.getvalue(), "UPDATE `t` SET `name`='b', `day`=NULL WHERE `id`='2';")
+        writer.close()
+
+        self.assertEqual(out.getvalue().splitlines(), [
+            "UPDATE `t` SET `name`='b', `day`=NULL WHERE `id`='2';",
+            "INSERT INTO `t` (`id`, `name`, `day`) VALUES ('1', 'o\\'neil', '2024-01-02'),('3', 'c', NULL);",
+            "DELETE FROM `t` WHERE `id` IN ('9');",
+        ])
+        empty = io.StringIO()
+        SyncSqlWriter(empty, ['id'], 't', pk='id').close()
+        self.assertEqual(empty.getvalue(), "-- No content sync needed")
+
+    def test_export_files(self):
+        diff = {"missing_in_target": [], "missing_in_source": [], "values_different": [], "pk": 'id', "col_names": ['id', 'name', 'day']}
+        for kind, item in sample_diffs():
+            diff[kind].append(item)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "t.sql.gz")
+            write_upgrade_script(path, 't', "ALTER TABLE `t` ADD `day` date;", diff)
+            with gzip.open(path, "rt") as f:
+                script = f.read()
+            counts = export_diffs(iter(sample_diffs()), os.path.join(tmp, "t.jsonl"), diff["col_names"], 't', 'id')
+
+        expected_sql = generate_content_sync_sql(
+            diff["col_names"], diff["missing_in_target"], diff["missing_in_source"], 't', diff["values_different"], 'id'
+        )
+        self.assertEqual(
+            script,
+            f"-- Upgrade Script\n\n-- Structure Upgrade\nALTER TABLE `t` ADD `day` date;\n\n-- Data Sync\n{expected_sql}\n"
+        )
+        self.assertEqual(sum(counts.values()), 4)
+        self.assertEqual(export_format("diff.ndjson.gz"), "ndjson")
+        with self.assertRaises(DbToolsError):
+            export_format("diff.parquet.gz")
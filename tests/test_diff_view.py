@@ -0,0 +1,45 @@
+import unittest
+from db_tools.diff_view import DiffPager, page_count
+
+def sample_diff():
+    return {
+        "missing_in_target": [{'id': 1, 'name': 'a', 'qty': 1}],
+        "missing_in_source": [{'id': 9, 'name': 'z', 'qty': 9}],
+        "values_different": [
+            {"pk": 2, "source": {'id': 2, 'name': 'b', 'qty': 2}, "target": {'id': 2, 'name': 'B', 'qty': 2}},
+            {"pk": 3, "source": {'id': 3, 'name': 'c', 'qty': 3}, "target": {'id': 3, 'name': 'c', 'qty': 4}},
+        ],
+        "pk": 'id',
+        "col_names": ['id', 'name', 'qty'],
+    }
+
+class TestDiffView(unittest.TestCase):
+
+    def test_pages_and_filters(self):
+        pager = DiffPager.from_result(sample_diff())
+
+        self.assertEqual(pager.counts(), {"missing_in_target": 1, "missing_in_source": 1, "values_different": 2})
+        self.assertEqual([row["Key"] for row in pager.page(0, page_size=3)], ['1', '9', '2'])
+        self.assertEqual([row["Key"] for row in pager.page(1, page_size=3)], ['3'])
+        self.assertEqual(pager.page(0, kinds=["values_different"], column='qty'), [{
+            "Type": "Values different", "Key": '3', "Columns": 'qty', "Source": 'qty=3', "Target": 'qty=4'
+        }])
+        self.assertEqual(pager.page(0, kinds=["missing_in_source"])[0]["Target"], "name='z', qty=9")
+        self.assertEqual(page_count(0), 1)
+        self.assertEqual(page_count(401, page_size=200), 3)
+
+    def test_filters_extend_as_diffs_arrive(self):
+        pager = DiffPager('id', ['id', 'name'])
+        pager.add("values_different", {"pk": 1, "source": {'id': 1, 'name': 'a'}, "target": {'id': 1, 'name': 'b'}})
+        self.assertEqual(pager.count(column='name'), 1)
+        pager.add("missing_in_target", {'id': 2, 'name': 'c'})
+        pager.add("values_different", {"pk": 3, "source": {'id': 3, 'name': 'd'}, "target": {'id': 3, 'name': 'e'}})
+
+        self.assertEqual(pager.count(column='name'), 2)
+        self.assertEqual(pager.count(), 3)
+        self.assertFalse(pager.done)
+        pager.finish()
+        self.assertTrue(pager.done)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from db_tools.external_compare import SpilledSide, compare_table_content_external
+
+class TestExternalCompare(unittest.TestCase):
+
+    def test_runs_are_merged_in_key_order(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            side = SpilledSide(work_dir, "source", run_size=2)
+            for i, key in enumerate(['d', 'a', 'c', 'e', 'b']):
+                side.add(key, i, (key, i))
+            side.finish()
+
+            self.assertEqual(len(side.run_paths), 3)
+            entries = list(side.iter_sorted())
+            self.assertEqual([e[0] for e in entries], ['a', 'b', 'c', 'd', 'e'])
+            self.assertEqual(side.read_row(entries[0][2]), ('a', 1))
+            side.close()
+
+    @patch('db_tools.external_compare.RUN_BLOCK_SIZE', 2)
+    @patch('db_tools.external_compare.prepare_content_compare')
+    def test_compare_unordered_sides(self, mock_prepare):
+        cols = [('code', 'varchar(5)', ''), ('n', 'int', '')]
+        mock_prepare.return_value = (cols, cols, 'code', ['code', 'n'], ['code', 'n'])
+        src_conn, tgt_conn = MagicMock(), MagicMock()
+        # Rows arrive in no particular order, in several partitions
+        src_conn.execute.return_value.partitions.return_value = [[('c', 3), ('a', 1)], [('b', 2)]]
+        tgt_conn.execute.return_value.partitions.return_value = [[('d', 4)], [('c', 30), ('b', 2)]]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = compare_table_content_external(
+                src_conn, tgt_conn, 'src', 'tgt', 't', memory_budget=1, temp_dir=temp_dir
+            )
+            self.assertEqual(os.listdir(temp_dir), [])
+
+        self.assertEqual(result["missing_in_target"], [{'code': 'a', 'n': 1}])
+        self.assertEqual(result["missing_in_source"], [{'code': 'd', 'n': 4}])
+        self.assertEqual(result["values_different"], [
+            {"pk": 'c', "source": {'code': 'c', 'n': 3}, "target": {'code': 'c', 'n': 30}}
+        ])
+        self.assertEqual((result["pk"], result["col_names"]), ('code', ['code', 'n']))
+
+    @patch('db_tools.external_compare.prepare_content_compare')
+    def test_digests_tell_rows_apart(self, mock_prepare):
+        cols = [('id', 'bigint', ''), ('n', 'bigint', ''), ('price', 'decimal(5,1)', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'n', 'price'], ['id', 'n', 'price'])
+        src_conn, tgt_conn = MagicMock(), MagicMock()
+        # hash() of 5 and 5 + 2**61 - 1 is the same; 2.5 and Decimal('2.5') compare equal
+        src_conn.execute.return_value.partitions.return_value = [[(1, 5, Decimal('1.0')), (2, 7, Decimal('2.5'))]]
+        tgt_conn.execute.return_value.partitions.return_value = [[(1, 5 + 2**61 - 1, Decimal('1.0')), (2, 7, 2.5)]]
+
+        result = compare_table_content_external(src_conn, tgt_conn, 'src', 'tgt', 't')
+
+        self.assertEqual([d["pk"] for d in result["values_different"]], [1])
+
+if __name__ == '__main__':
+    unittest.main()
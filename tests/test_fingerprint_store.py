@@ -0,0 +1,106 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from db_tools.fingerprint_store import FingerprintStore
+from db_tools.checksum_compare import compare_table_checksums
+
+class TestFingerprintStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = FingerprintStore(os.path.join(self.tmp_dir.name, "fingerprints.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_save_and_load(self):
+        mismatches = [(10, 12, 2, 2), (15, (20, 'b'), 3, 4)]
+        self.store.save('k', [10, (20, 'b')], [((10, 2**64 - 1, 10, 2**64 - 1), []), None, ((5, 1, 6, 2), mismatches)])
+
+        loaded = self.store.load('k')
+
+        self.assertEqual(loaded["boundaries"], [10, (20, 'b')])
+        self.assertEqual(loaded["ranges"], {0: ((10, 2**64 - 1, 10, 2**64 - 1), []), 2: ((5, 1, 6, 2), mismatches)})
+        self.assertEqual(os.stat(self.store.path).st_mode & 0o777, 0o600)
+        self.assertIsNone(self.store.load('other'))
+        self.store.forget('k')
+        self.assertIsNone(self.store.load('k'))
+
+    @patch('db_tools.checksum_compare.iter_table_rows_by_pk')
+    @patch('db_tools.checksum_compare.get_range_midpoint')
+    @patch('db_tools.checksum_compare.get_range_checksum')
+    @patch('db_tools.checksum_compare.get_pk_boundaries')
+    @patch('db_tools.checksum_compare.prepare_content_compare')
+    def test_unchanged_ranges_are_not_bisected_again(
+        self, mock_prepare, mock_boundaries, mock_checksum, mock_midpoint, mock_rows
+    ):
+        cols = [('id', 'int', ''), ('name', 'varchar(10)', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'name'], ['id', 'name'])
+        mock_boundaries.return_value = [10, 20]
+        # (lower, upper) -> (count, checksum); (10, 20] differs only in its upper half (15, 20]
+        checksums = {
+            'src': {(None, 10): (10, 1), (10, 20): (10, 2), (10, 15): (5, 5), (15, 20): (5, 6), (20, None): (5, 3)},
+            'tgt': {(None, 10): (10, 1), (10, 20): (10, 9), (10, 15): (5, 5), (15, 20): (5, 7), (20, None): (5, 8)},
+        }
+        mock_checksum.side_effect = (
+            lambda conn, db, table, cols, pk, lower, upper, where, algorithm: checksums[db][(lower, upper)]
+        )
+        mock_midpoint.return_value = 15
+
+        def rows(conn, db, table, columns, pk, where_clause=None, lower=None, upper=None):
+            return iter([(lower + 1, f"row of {db}")])
+        mock_rows.side_effect = rows
+        src_conn, tgt_conn = MagicMock(), MagicMock()
+
+        first = compare_table_checksums(src_conn, tgt_conn, 'src', 'tgt', 't', min_range_rows=5, fingerprints=self.store)
+        self.assertEqual(first["checksum_stats"]["ranges_fetched"], 2)
+        mock_midpoint.assert_called_once()
+
+        # Only the last range changed on the source since the first run
+        checksums['src'][(20, None)] = (5, 4)
+        mock_rows.reset_mock()
+        second = compare_table_checksums(src_conn, tgt_conn, 'src', 'tgt', 't', min_range_rows=5, fingerprints=self.store)
+
+        mock_boundaries.assert_called_once()
+        mock_midpoint.assert_called_once()
+        self.assertEqual(second["checksum_stats"], {"ranges_checked": 3, "ranges_fetched": 2, "rows_fetched": 20, "ranges_reused": 1})
+        self.assertEqual({(call.kwargs['lower'], call.kwargs['upper']) for call in mock_rows.call_args_list}, {(15, 20), (20, None)})
+        self.assertEqual([d["pk"] for d in second["values_different"]], [16, 21])
+        with open(self.store.path, 'rb') as f:
+            self.assertNotIn(b'row of', f.read())
+
+    @patch('db_tools.checksum_compare.iter_table_rows_by_pk')
+    @patch('db_tools.checksum_compare.get_range_checksum')
+    @patch('db_tools.checksum_compare.get_pk_boundaries', return_value=[])
+    @patch('db_tools.checksum_compare.prepare_content_compare')
+    def test_swapped_values_are_not_served_from_the_store(self, mock_prepare, mock_boundaries, mock_checksum, mock_rows):
+        # auto_increment id, so only name is compared
+        cols = [('id', 'int', 'auto_increment'), ('name', 'varchar(10)', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'name'], ['name'])
+        tables = {'src': {1: 'x', 2: 'y'}, 'tgt': {1: 'x', 2: 'z'}}
+
+        def checksum(conn, db, table, hash_cols, pk, lower, upper, where, algorithm):
+            rows = [{'id': k, 'name': v} for k, v in tables[db].items()]
+            total = 0
+            for row in rows:
+                total ^= int(hashlib.md5(repr([row[c] for c in hash_cols]).encode()).hexdigest()[:16], 16)
+            return len(rows), total
+        mock_checksum.side_effect = checksum
+        mock_rows.side_effect = lambda conn, db, *args, **kwargs: iter(sorted(tables[db].items()))
+        src_conn, tgt_conn = MagicMock(), MagicMock()
+
+        first = compare_table_checksums(src_conn, tgt_conn, 'src', 'tgt', 't', fingerprints=self.store)
+        self.assertEqual([d["pk"] for d in first["values_different"]], [2])
+
+        # Same names on the target, moved between keys: a PK-less checksum would not change
+        tables['tgt'] = {1: 'z', 2: 'x'}
+        second = compare_table_checksums(src_conn, tgt_conn, 'src', 'tgt', 't', fingerprints=self.store)
+
+        self.assertEqual(second["checksum_stats"]["ranges_reused"], 0)
+        self.assertEqual([d["pk"] for d in second["values_different"]], [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from db_tools.incremental_compare import compare_table_incremental, detect_watermark_column
+from db_tools.shared import DbToolsError
+
+class TestIncrementalCompare(unittest.TestCase):
+
+    def test_detect_watermark_column(self):
+        self.assertEqual(detect_watermark_column([('id', 'int', 'auto_increment'), ('Updated_At', 'datetime', '')]), 'Updated_At')
+        self.assertEqual(detect_watermark_column([('id', 'int', 'auto_increment'), ('name', 'text', '')]), 'id')
+        self.assertIsNone(detect_watermark_column([('id', 'int', ''), ('name', 'text', '')]))
+
+    @patch('db_tools.incremental_compare.fetch_rows_by_pk')
+    @patch('db_tools.incremental_compare.find_missing_keys')
+    @patch('db_tools.incremental_compare.get_changed_keys')
+    @patch('db_tools.incremental_compare.get_max_watermark')
+    @patch('db_tools.incremental_compare.prepare_content_compare')
+    def test_compares_changed_pending_and_missing_rows(self, mock_prepare, mock_max, mock_changed, mock_missing, mock_fetch):
+        cols = [('id', 'int', ''), ('name', 'varchar(10)', ''), ('updated_at', 'int', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'name', 'updated_at'], ['id', 'name', 'updated_at'])
+        mock_max.return_value = 50
+        mock_changed.side_effect = lambda conn, db, *args: [1, 2] if db == 'src' else [3]
+        mock_missing.return_value = [9]
+        mock_fetch.side_effect = lambda conn, db, *args, **kwargs: (
+            [(1, 'a', 45), (2, 'b', 41), (9, 'z', 1)] if db == 'src' else [(1, 'a', 45), (2, 'old', 30), (3, 'c', 42)]
+        )
+        store = MagicMock()
+        store.load_watermark.return_value = (40, [7])
+
+        result = compare_table_incremental(MagicMock(), MagicMock(), 'src', 'tgt', 't', store)
+
+        self.assertEqual(set(mock_fetch.call_args_list[0].args[5]), {1, 2, 3, 7, 9})
+        self.assertEqual(mock_changed.call_args_list[0].args[4:6], ('updated_at', 40))
+        self.assertEqual([row['id'] for row in result["missing_in_target"]], [9])
+        self.assertEqual([row['id'] for row in result["missing_in_source"]], [3])
+        self.assertEqual([d["pk"] for d in result["values_different"]], [2])
+        store.save_watermark.assert_called_once()
+        self.assertEqual(store.save_watermark.call_args.args[1:], (50, [9, 3, 2]))
+
+    @patch('db_tools.incremental_compare.get_max_watermark')
+    @patch('db_tools.incremental_compare.prepare_content_compare')
+    def test_failed_run_keeps_watermark(self, mock_prepare, mock_max):
+        cols = [('id', 'int', ''), ('updated_at', 'int', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'updated_at'], ['id', 'updated_at'])
+        mock_max.side_effect = DbToolsError("connection lost")
+        store = MagicMock()
+        store.load_watermark.return_value = (40, [])
+
+        with self.assertRaises(DbToolsError):
+            compare_table_incremental(MagicMock(), MagicMock(), 'src', 'tgt', 't', store)
+        store.save_watermark.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
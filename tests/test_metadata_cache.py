@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from db_tools.metadata_cache import MetadataCache, cached_schema_snapshot
+from db_tools.schema_snapshot import SchemaSnapshot
+
+class TestMetadataCache(unittest.TestCase):
+
+    def test_lru_eviction_and_version_check(self):
+        cache = MetadataCache(max_entries=2)
+        cache.put(('s', 'db', 'a'), 'A', version=1)
+        cache.put(('s', 'db', 'b'), 'B', version=1)
+        self.assertEqual(cache.get(('s', 'db', 'a'), version=1), 'A')
+        cache.put(('s', 'db', 'c'), 'C', version=1)
+
+        self.assertIsNone(cache.get(('s', 'db', 'b'), version=1))
+        self.assertEqual(cache.get(('s', 'db', 'c'), version=1), 'C')
+        self.assertIsNone(cache.get(('s', 'db', 'a'), version=2))
+
+    def test_ttl_expiry(self):
+        cache = MetadataCache(ttl=0)
+        cache.put(('s', 'db', 'a'), 'A')
+        with patch('db_tools.metadata_cache.time.monotonic', return_value=1e12):
+            self.assertIsNone(cache.get(('s', 'db', 'a')))
+
+    @patch('db_tools.metadata_cache.load_schema_snapshot')
+    @patch('db_tools.metadata_cache.get_table_versions')
+    def test_cached_schema_snapshot_reloads_only_changed_tables(self, mock_versions, mock_load):
+        cache = MetadataCache()
+        conn = MagicMock()
+        conn.engine.url.username = 'admin'
+
+        def snapshot(conn, db, tables):
+            return SchemaSnapshot(db, {t: {} for t in tables}, {t: [(t + '_id',)] for t in tables}, {})
+        mock_load.side_effect = snapshot
+
+        mock_versions.return_value = {'a': ('t0', None), 'b': ('t0', None)}
+        cached_schema_snapshot(conn, 'db', ['a', 'b'], cache)
+        mock_versions.return_value = {'a': ('t0', None), 'b': ('t1', None)}
+        schema = cached_schema_snapshot(conn, 'db', ['a', 'b'], cache)
+
+        self.assertEqual(mock_load.call_args_list[1].args[2], ['b'])
+        self.assertEqual(schema.tables(), ['a', 'b'])
+        self.assertEqual(schema.columns('a'), [('a_id',)])
+
+if __name__ == '__main__':
+    unittest.main()
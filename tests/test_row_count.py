@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+from db_tools.metadata_cache import MetadataCache
+from db_tools.row_count import DEFAULT_COUNT_WORKERS, get_count_cached, get_exact_count_parallel
+
+class TestRowCount(unittest.TestCase):
+
+    def test_exact_count_parallel_sums_pk_ranges(self):
+        engine = MagicMock()
+        conn = engine.connect.return_value.__enter__.return_value
+        bounds = MagicMock()
+        bounds.first.return_value = (1, 100)
+        counts = MagicMock()
+        counts.scalar.return_value = 25
+        conn.execute.side_effect = [bounds] + [counts] * 4
+
+        total = get_exact_count_parallel(engine, 'db', 't', 'id', max_workers=4)
+
+        self.assertEqual(total, 100)
+        range_params = sorted(call.args[1]['lo'] for call in conn.execute.call_args_list[1:])
+        self.assertEqual(range_params, [1, 26, 51, 76])
+
+    def test_exact_count_parallel_needs_integer_pk(self):
+        engine = MagicMock()
+        conn = engine.connect.return_value.__enter__.return_value
+        conn.execute.return_value.first.return_value = ('a', 'z')
+
+        self.assertIsNone(get_exact_count_parallel(engine, 'db', 't', 'code'))
+
+    def test_concurrent_counts_share_the_count_connections(self):
+        engine = MagicMock()
+        lock = threading.Lock()
+        open_connections = [0, 0]  # now, most at once
+
+        @contextmanager
+        def connect():
+            with lock:
+                open_connections[0] += 1
+                open_connections[1] = max(open_connections)
+            time.sleep(0.01)
+            conn = MagicMock()
+            conn.execute.return_value.first.return_value = (1, 100)
+            conn.execute.return_value.scalar.return_value = 25
+            try:
+                yield conn
+            finally:
+                with lock:
+                    open_connections[0] -= 1
+        engine.connect.side_effect = connect
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            totals = list(executor.map(lambda table: get_exact_count_parallel(engine, 'db', table, 'id'), range(8)))
+
+        self.assertEqual(totals, [100] * 8)
+        self.assertLessEqual(open_connections[1], DEFAULT_COUNT_WORKERS)
+
+    @patch('db_tools.row_count.get_table_versions')
+    def test_count_cached_until_update_time_moves(self, mock_versions):
+        cache = MetadataCache()
+        conn = MagicMock()
+        count_func = MagicMock(side_effect=[10, 11])
+
+        mock_versions.return_value = {'t': ('c0', 'u0')}
+        self.assertEqual(get_count_cached(conn, 'db', 't', count_func, cache=cache), (10, False))
+        self.assertEqual(get_count_cached(conn, 'db', 't', count_func, cache=cache), (10, True))
+        mock_versions.return_value = {'t': ('c0', 'u1')}
+        self.assertEqual(get_count_cached(conn, 'db', 't', count_func, cache=cache), (11, False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from db_tools.sample_compare import (
+    RECOMMEND_FULL_COMPARE,
+    RECOMMEND_LARGER_SAMPLE,
+    RECOMMEND_NONE,
+    SAMPLE_RANDOM,
+    SAMPLE_STRATIFIED,
+    compare_table_sample,
+    sample_side,
+    wilson_interval,
+)
+
+class TestSampleCompare(unittest.TestCase):
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(0, 1000)
+        self.assertEqual(low, 0.0)
+        # About the "rule of three" bound of 3/n
+        self.assertAlmostEqual(high, 0.0038, places=4)
+        low, high = wilson_interval(10, 100)
+        self.assertLess(low, 0.1)
+        self.assertGreater(high, 0.1)
+
+    @patch('db_tools.sample_compare.get_estimated_count')
+    @patch('db_tools.sample_compare.fetch_rows_by_pk')
+    @patch('db_tools.sample_compare.sample_side')
+    @patch('db_tools.sample_compare.prepare_content_compare')
+    def test_sample_mismatches_from_both_sides(self, mock_prepare, mock_sample, mock_fetch, mock_estimate):
+        cols = [('id', 'int', ''), ('name', 'varchar(10)', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'name'], ['id', 'name'])
+        mock_sample.side_effect = [
+            [(1, 'a'), (2, 'b'), (3, 'c')],
+            [(2, 'x'), (3, 'c'), (9, 'z')],
+        ]
+        # Target rows for the source sample, then source rows for the target sample
+        mock_fetch.side_effect = lambda conn, db, table, columns, pk, keys, where: {
+            'tgt': [(2, 'x'), (3, 'c')], 'src': [(2, 'b'), (3, 'c')]
+        }[db]
+        mock_estimate.return_value = 1000
+
+        result = compare_table_sample(MagicMock(), MagicMock(), 'src', 'tgt', 't', sample_size=3)
+
+        self.assertEqual(result["missing_in_target"], [1])
+        self.assertEqual(result["missing_in_source"], [9])
+        self.assertEqual(result["values_different"], [2])
+        self.assertEqual((result["sampled"], result["mismatches"]), (6, 4))
+        self.assertEqual(result["recommendation"], RECOMMEND_FULL_COMPARE)
+
+    @patch('db_tools.sample_compare.get_estimated_count')
+    @patch('db_tools.sample_compare.fetch_rows_by_pk')
+    @patch('db_tools.sample_compare.sample_side')
+    @patch('db_tools.sample_compare.prepare_content_compare')
+    def test_recommendation_without_mismatches(self, mock_prepare, mock_sample, mock_fetch, mock_estimate):
+        cols = [('id', 'int', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id'], ['id'])
+        rows = [(i,) for i in range(1000)]
+        mock_sample.return_value = rows
+        mock_fetch.return_value = rows
+        mock_estimate.return_value = 10 ** 6
+
+        result = compare_table_sample(MagicMock(), MagicMock(), 'src', 'tgt', 't')
+        self.assertEqual(result["recommendation"], RECOMMEND_NONE)
+
+        result = compare_table_sample(MagicMock(), MagicMock(), 'src', 'tgt', 't', tolerance=0.0001)
+        self.assertEqual(result["recommendation"], RECOMMEND_LARGER_SAMPLE)
+
+    @patch('db_tools.sample_compare.get_estimated_count', return_value=50)
+    @patch('db_tools.sample_compare.fetch_rows_by_pk')
+    def test_integer_pk_is_probed_by_strata(self, mock_fetch, mock_estimate):
+        cols = [('id', 'int', ''), ('body', 'longtext', '')]
+        conn = MagicMock()
+        conn.execute.return_value.first.return_value = (1, 100)
+        conn.execute.return_value.fetchall.return_value = [(5,), (57,)]
+        mock_fetch.return_value = [(5, 'a'), (57, 'b')]
+
+        rows = sample_side(conn, 'db', 't', cols, 'id', 4, SAMPLE_STRATIFIED, strata=2)
+
+        self.assertEqual(rows, [(5, 'a'), (57, 'b')])
+        probe_sql, probes = conn.execute.call_args_list[1].args
+        self.assertNotIn("`body`", str(probe_sql))
+        self.assertNotIn("RAND()", str(probe_sql))
+        # Only exact hits count, so every key is equally likely; half the values are keys, so
+        # 4 * 1.25 / 0.5 = 10 distinct probes, half of them in each half of [1, 100]
+        self.assertIn("`id` IN (", str(probe_sql))
+        self.assertEqual(len(set(probes.values())), 10)
+        self.assertEqual(sorted(v <= 50 for v in probes.values()), [False] * 5 + [True] * 5)
+        self.assertEqual(list(mock_fetch.call_args.args[5]), [5, 57])
+
+    @patch('db_tools.sample_compare.get_estimated_count', return_value=100)
+    @patch('db_tools.sample_compare.fetch_rows_by_pk')
+    def test_sparse_integer_pk_samples_keys_only(self, mock_fetch, mock_estimate):
+        cols = [('id', 'bigint', ''), ('body', 'longtext', '')]
+        conn = MagicMock()
+        conn.execute.return_value.first.return_value = (1, 10 ** 9)
+
+        sample_side(conn, 'db', 't', cols, 'id', 10, SAMPLE_RANDOM)
+
+        self.assertIn("RAND() < :fraction", str(conn.execute.call_args.args[0]))
+
+    @patch('db_tools.sample_compare.get_estimated_count', return_value=100000)
+    @patch('db_tools.sample_compare.fetch_rows_by_pk')
+    def test_composite_pk_samples_keys_only(self, mock_fetch, mock_estimate):
+        cols = [('shard', 'int', ''), ('id', 'int', ''), ('body', 'longtext', '')]
+        conn = MagicMock()
+        conn.execute.return_value = [(1, 7), (2, 3)]
+
+        sample_side(conn, 'db', 't', cols, ['shard', 'id'], 1000, SAMPLE_RANDOM)
+
+        sql, params = conn.execute.call_args.args
+        self.assertTrue(str(sql).startswith("SELECT `shard`, `id` FROM `db`.`t` WHERE RAND() < :fraction"))
+        self.assertEqual(params, {"fraction": 0.02})
+        self.assertEqual(list(mock_fetch.call_args.args[5]), [(1, 7), (2, 3)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import MagicMock
+from db_tools.schema_snapshot import load_schema_snapshot
+from db_tools.shared import DbToolsError
+
+class TestSchemaSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_connection = MagicMock()
+        self.mock_connection.execute.side_effect = [
+            # information_schema.TABLES
+            [('orders', 'BASE TABLE', 'InnoDB', 10, None, None)],
+            # information_schema.COLUMNS
+            [
+                ('orders', 'shop_id', 'int', 'NO', 'PRI', None, ''),
+                ('orders', 'id', 'int', 'NO', 'PRI', None, 'auto_increment'),
+                ('orders', 'ref', 'varchar(20)', 'YES', 'UNI', None, ''),
+            ],
+            # information_schema.STATISTICS
+            [
+                ('orders', 'PRIMARY', 0, 'shop_id'),
+                ('orders', 'PRIMARY', 0, 'id'),
+                ('orders', 'idx_ref_shop', 1, 'ref'),
+                ('orders', 'idx_ref_shop', 1, 'shop_id'),
+                ('orders', 'uq_ref', 0, 'ref'),
+            ],
+        ]
+
+    def test_snapshot_matches_show_helper_shapes(self):
+        schema = load_schema_snapshot(self.mock_connection, 'shop')
+
+        self.assertEqual(self.mock_connection.execute.call_count, 3)
+        self.assertEqual(schema.tables(), ['orders'])
+        self.assertEqual(schema.columns('orders')[1], ('id', 'int', 'NO', 'PRI', None, 'auto_increment'))
+        self.assertEqual(schema.column_triples('orders')[1], ('id', 'int', 'auto_increment'))
+        self.assertEqual(schema.primary_key('orders'), ['shop_id', 'id'])
+        self.assertEqual(schema.constraints('orders'), {
+            "primary_key": ['shop_id', 'id'],
+            "unique_keys": {'uq_ref': ['ref']},
+            "indices": {'idx_ref_shop': ['ref', 'shop_id']},
+        })
+
+    def test_unknown_table_raises(self):
+        schema = load_schema_snapshot(self.mock_connection, 'shop', ['orders'])
+
+        with self.assertRaises(DbToolsError):
+            schema.columns('missing')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from unittest.mock import MagicMock
+from db_tools.session import ensure_database, forget_current_database, get_round_trip_stats, reset_round_trip_stats
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        reset_round_trip_stats()
+        self.mock_connection = MagicMock()
+        self.mock_connection.info = {}
+
+    def test_use_only_issued_when_database_changes(self):
+        ensure_database(self.mock_connection, 'db1')
+        ensure_database(self.mock_connection, 'db1')
+        ensure_database(self.mock_connection, 'db2')
+        ensure_database(self.mock_connection, 'db2')
+
+        statements = [str(call.args[0]) for call in self.mock_connection.execute.call_args_list]
+        self.assertEqual(statements, ['USE `db1`;', 'USE `db2`;'])
+        self.assertEqual(get_round_trip_stats(), {"use_issued": 2, "use_skipped": 2})
+
+    def test_forget_current_database(self):
+        ensure_database(self.mock_connection, 'db1')
+        forget_current_database(self.mock_connection)
+        ensure_database(self.mock_connection, 'db1')
+
+        self.assertEqual(self.mock_connection.execute.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from db_tools.sharded_compare import (
+    _await_worker_snapshots,
+    _start_worker_snapshots,
+    compare_table_sharded,
+    plan_shards,
+)
+
+class InlineExecutor(ThreadPoolExecutor):
+    """Stands in for ProcessPoolExecutor: same interface, no processes."""
+
+    def __init__(self, max_workers=None, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers=max_workers)
+
+class TestShardedCompare(unittest.TestCase):
+
+    @patch('db_tools.sharded_compare.get_pk_boundaries')
+    @patch('db_tools.sharded_compare.get_estimated_count')
+    def test_plan_shards(self, mock_estimate, mock_boundaries):
+        mock_estimate.return_value = 1000
+        mock_boundaries.return_value = [250, 500, 750, 990]
+
+        ranges = plan_shards(MagicMock(), 'db', 't', 'id', 4)
+
+        self.assertEqual(mock_boundaries.call_args.args[4], 250)
+        self.assertEqual(ranges, [(None, 250), (250, 500), (500, 750), (750, None)])
+
+    @patch('db_tools.sharded_compare.ProcessPoolExecutor', InlineExecutor)
+    @patch('db_tools.sharded_compare._compare_shard')
+    @patch('db_tools.sharded_compare.plan_shards')
+    @patch('db_tools.sharded_compare.prepare_content_compare')
+    def test_partials_are_merged_in_pk_order(self, mock_prepare, mock_plan, mock_shard):
+        cols = [('id', 'int', ''), ('name', 'varchar(10)', '')]
+        mock_prepare.return_value = (cols, cols, 'id', ['id', 'name'], ['id', 'name'])
+        mock_plan.return_value = [(None, 10), (10, 20), (20, None)]
+        partials = {
+            None: [("missing_in_target", {'id': 1, 'name': 'a'})],
+            10: [],
+            20: [("missing_in_source", {'id': 25, 'name': 'x'}), ("missing_in_target", {'id': 30, 'name': 'c'})],
+        }
+        mock_shard.side_effect = lambda source_db, target_db, table, meta, lower, *args: partials[lower]
+
+        result = compare_table_sharded(
+            MagicMock(), MagicMock(), 'src', 'tgt', 't', workers=2, engine_factories=(None, None)
+        )
+
+        self.assertEqual(mock_shard.call_count, 3)
+        self.assertEqual([row['id'] for row in result["missing_in_target"]], [1, 30])
+        self.assertEqual([row['id'] for row in result["missing_in_source"]], [25])
+        self.assertEqual(result["values_different"], [])
+        self.assertEqual(result["pk"], 'id')
+
+    def test_read_lock_only_covers_the_snapshot_starts(self):
+        events = []
+        engine = MagicMock()
+        engine.url.host, engine.url.port = 'db', 3306
+        engine.connect.return_value.exec_driver_sql.side_effect = lambda sql: events.append(sql)
+        barrier = threading.Barrier(3)
+
+        def worker(name):
+            connection = MagicMock()
+            connection.exec_driver_sql.side_effect = lambda sql: sql.startswith("START") and events.append(f"snapshot {name}")
+            events.append(f"connected {name}")
+            _start_worker_snapshots([connection], barrier)
+
+        threads = [threading.Thread(target=worker, args=(name,)) for name in "ab"]
+        for thread in threads:
+            thread.start()
+        _await_worker_snapshots(barrier, [engine], locked=True)
+        for thread in threads:
+            thread.join()
+
+        lock = events.index("FLUSH TABLES WITH READ LOCK")
+        unlock = events.index("UNLOCK TABLES")
+        self.assertEqual(sorted(events[:lock]), ["connected a", "connected b"])
+        self.assertEqual(sorted(events[lock + 1:unlock]), ["snapshot a", "snapshot b"])
+
+    def test_failed_worker_snapshot_breaks_the_handshake(self):
+        barrier = threading.Barrier(2)
+        connection = MagicMock()
+        connection.exec_driver_sql.side_effect = Exception("Access denied")
+        thread = threading.Thread(target=lambda: self.assertRaises(Exception, _start_worker_snapshots, [connection], barrier))
+        thread.start()
+
+        with self.assertRaises(threading.BrokenBarrierError):
+            _await_worker_snapshots(barrier, [], locked=False)
+        thread.join()
+
+if __name__ == '__main__':
+    unittest.main()
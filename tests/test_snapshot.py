@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock, call
+from db_tools.shared import DbToolsError
+from db_tools.snapshot import SNAPSHOT_CONSISTENT, SNAPSHOT_LOCKED, start_consistent_snapshots
+from db_tools.submit_handler import iter_tables_parallel
+
+def mock_engine(host):
+    engine = MagicMock()
+    engine.url.host, engine.url.port = host, 3306
+    return engine
+
+def mock_connection(engine):
+    connection = MagicMock()
+    connection.engine = engine
+    return connection
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_locked_snapshots_start_under_one_lock_per_server(self):
+        src_engine, tgt_engine = mock_engine('src'), mock_engine('tgt')
+        events = []
+        lock_connections = []
+        for engine in (src_engine, tgt_engine):
+            lock = MagicMock()
+            lock.exec_driver_sql.side_effect = lambda sql, host=engine.url.host: events.append((host, sql))
+            engine.connect.return_value = lock
+            lock_connections.append(lock)
+        connections = [mock_connection(src_engine), mock_connection(src_engine), mock_connection(tgt_engine)]
+        for i, connection in enumerate(connections):
+            connection.exec_driver_sql.side_effect = lambda sql, i=i: events.append((i, sql))
+
+        start_consistent_snapshots(connections, SNAPSHOT_LOCKED)
+
+        locks = [e for e in events if e[1] == "FLUSH TABLES WITH READ LOCK"]
+        starts = [e for e in events if e[1].startswith("START TRANSACTION WITH CONSISTENT SNAPSHOT")]
+        unlocks = [e for e in events if e[1] == "UNLOCK TABLES"]
+        self.assertEqual(sorted(e[0] for e in locks), ['src', 'tgt'])
+        self.assertEqual([e[0] for e in starts], [0, 1, 2])
+        self.assertLess(max(events.index(e) for e in locks), min(events.index(e) for e in starts))
+        self.assertGreater(min(events.index(e) for e in unlocks), max(events.index(e) for e in starts))
+        for lock in lock_connections:
+            lock.close.assert_called_once()
+        self.assertRaises(DbToolsError, start_consistent_snapshots, connections, "dirty")
+
+    def test_parallel_workers_get_snapshot_connections(self):
+        src_engine, tgt_engine = mock_engine('src'), mock_engine('tgt')
+        src_engine.connect.side_effect = lambda: mock_connection(src_engine)
+        tgt_engine.connect.side_effect = lambda: mock_connection(tgt_engine)
+        seen = []
+
+        def compare_one(src_connection, tgt_connection, table):
+            seen.append((src_connection, tgt_connection))
+            return table
+
+        results = dict(iter_tables_parallel(
+            src_engine, tgt_engine, ['a', 'b', 'c'], compare_one, max_workers=2, snapshot=SNAPSHOT_CONSISTENT
+        ))
+
+        self.assertEqual(results, {'a': 'a', 'b': 'b', 'c': 'c'})
+        # Two pairs opened up front, each started a snapshot before any table was compared
+        self.assertEqual(src_engine.connect.call_count, 2)
+        for src_connection, tgt_connection in seen:
+            for connection in (src_connection, tgt_connection):
+                self.assertIn(call("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"), connection.exec_driver_sql.mock_calls)
+                connection.close.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
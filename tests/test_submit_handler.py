@@ -1,7 +1,11 @@
 
 import unittest
 from unittest.mock import MagicMock, patch
-from db_tools.submit_handler import get_tables
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from db_tools.shared import DbToolsError
+from db_tools.submit_handler import get_tables, compare_tables_parallel, engine_pool_options
 
 class TestSubmitHandler(unittest.TestCase):
 
@@ -25,5 +29,45 @@ class TestSubmitHandler(unittest.TestCase):
         mock_connection.execute.assert_any_call(mock_text('USE `test_db`;'))
         mock_connection.execute.assert_any_call(mock_text('SHOW TABLES;'))
 
+    @patch('db_tools.submit_handler.compare_table_row')
+    def test_compare_tables_parallel_keeps_order(self, mock_compare_row):
+        mock_compare_row.side_effect = lambda s, t, sdb, tdb, table, tgt_tables, where, **kwargs: (table, "✅ Yes", "✅ Same", where)
+        src_engine = MagicMock()
+        tgt_engine = MagicMock()
+        tgt_schema = MagicMock()
+        tgt_schema.tables.return_value = ['t1', 't2', 't3']
+
+        rows = compare_tables_parallel(
+            src_engine, tgt_engine, 'src', 'tgt', ['t3', 't1', 't2'], {'t1': 'id > 1'}, max_workers=2,
+            src_schema=MagicMock(), tgt_schema=tgt_schema
+        )
+
+        self.assertEqual(rows, [
+            ('t3', "✅ Yes", "✅ Same", None),
+            ('t1', "✅ Yes", "✅ Same", 'id > 1'),
+            ('t2', "✅ Yes", "✅ Same", None),
+        ])
+        # One connection per worker and side at most, all closed afterwards
+        self.assertLessEqual(src_engine.connect.call_count, 2)
+        src_engine.connect.return_value.close.assert_called()
+
+    def test_pool_holds_every_worker(self):
+        # Source and target on one engine: two connections per worker plus the caller's own
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_timeout=0.1, **engine_pool_options(8))
+        connections = [engine.connect() for _ in range(2 * 8 + 1)]
+        for connection in connections:
+            connection.close()
+        self.assertEqual(engine_pool_options(8, shared=False)["pool_size"], 9)
+
+    def test_pool_timeout_is_wrapped(self):
+        src_engine = MagicMock()
+        src_engine.connect.side_effect = PoolTimeoutError("QueuePool limit of size 5 overflow 10 reached")
+
+        with self.assertRaises(DbToolsError):
+            compare_tables_parallel(
+                src_engine, MagicMock(), 'src', 'tgt', ['t1', 't2'], max_workers=2,
+                src_schema=MagicMock(), tgt_schema=MagicMock()
+            )
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,90 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from db_tools.sync_apply import apply_content_diff, default_checkpoint_path
+from db_tools.shared import DbToolsError
+
+class TestSyncApply(unittest.TestCase):
+
+    def setUp(self):
+        self.diff = {
+            "col_names": ['id', 'name'],
+            "pk": 'id',
+            "missing_in_target": [{'id': i, 'name': f"n{i}"} for i in (5, 3, 4)],
+            "missing_in_source": [{'id': 9, 'name': 'x'}],
+            "values_different": [{"pk": 1, "source": {'id': 1, 'name': 'new'}, "target": {'id': 1, 'name': 'old'}}],
+        }
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.tmp_dir.name, "db.t.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_apply_batches_in_pk_order_and_commits(self):
+        conn = MagicMock()
+
+        stats = apply_content_diff(conn, 'db', 't', self.diff, batch_size=2, commit_every=2, checkpoint_path=self.checkpoint_path)
+
+        self.assertEqual(stats, {"delete": 1, "update": 1, "insert": 3, "commits": 4, "resumed": False})
+        sql_and_params = [(str(call.args[0]), call.args[1]) for call in conn.execute.call_args_list]
+        self.assertEqual(sql_and_params[0], ("DELETE FROM `db`.`t` WHERE `id` = :p0", [{'p0': 9}]))
+        self.assertEqual(sql_and_params[1], ("UPDATE `db`.`t` SET `name` = :v0 WHERE `id` = :p0", [{'p0': 1, 'v0': 'new'}]))
+        self.assertEqual(sql_and_params[2][1], [{'v0': 3, 'v1': 'n3'}, {'v0': 4, 'v1': 'n4'}])
+        self.assertEqual(sql_and_params[3][1], [{'v0': 5, 'v1': 'n5'}])
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_resume_after_failure(self):
+        conn = MagicMock()
+        conn.execute.side_effect = [None, None, None, Exception("connection lost")]
+
+        with self.assertRaises(DbToolsError):
+            apply_content_diff(conn, 'db', 't', self.diff, batch_size=2, commit_every=2, checkpoint_path=self.checkpoint_path)
+        with open(self.checkpoint_path) as f:
+            self.assertEqual(json.load(f)["phase"], "insert")
+        conn.rollback.assert_called_once()
+
+        conn = MagicMock()
+        stats = apply_content_diff(conn, 'db', 't', self.diff, batch_size=2, commit_every=2, checkpoint_path=self.checkpoint_path)
+
+        self.assertTrue(stats["resumed"])
+        self.assertEqual(stats["insert"], 1)
+        self.assertEqual(conn.execute.call_args_list[0].args[1], [{'v0': 5, 'v1': 'n5'}])
+
+    def test_resume_with_a_recomputed_diff(self):
+        conn = MagicMock()
+        conn.execute.side_effect = [None, None, None, Exception("connection lost")]
+        with self.assertRaises(DbToolsError):
+            apply_content_diff(conn, 'db', 't', self.diff, batch_size=2, commit_every=2, checkpoint_path=self.checkpoint_path)
+
+        # The delete, the update and ids 3 and 4 are committed, so a fresh compare only finds 5
+        self.diff.update(missing_in_source=[], values_different=[], missing_in_target=[{'id': 5, 'name': 'n5'}])
+        conn = MagicMock()
+        stats = apply_content_diff(conn, 'db', 't', self.diff, batch_size=2, commit_every=2, checkpoint_path=self.checkpoint_path)
+
+        self.assertEqual((stats["delete"], stats["update"], stats["insert"]), (0, 0, 1))
+        self.assertEqual(conn.execute.call_args_list[0].args[1], [{'v0': 5, 'v1': 'n5'}])
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_failed_rollback_keeps_the_original_error(self):
+        conn = MagicMock()
+        conn.execute.side_effect = Exception("connection lost")
+        conn.rollback.side_effect = Exception("MySQL server has gone away")
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaisesRegex(DbToolsError, "connection lost"):
+                apply_content_diff(conn, 'db', 't', self.diff, checkpoint_path=self.checkpoint_path)
+
+    def test_checkpoint_path_is_per_server(self):
+        def connection(host):
+            conn = MagicMock()
+            conn.engine.url.username, conn.engine.url.host, conn.engine.url.port = 'app', host, 3306
+            return conn
+
+        first = default_checkpoint_path(connection('db1'), 'db', 't')
+        self.assertNotEqual(first, default_checkpoint_path(connection('db2'), 'db', 't'))
+        self.assertEqual(os.path.basename(first), "app@db1_3306.db.t.json")
+
+if __name__ == '__main__':
+    unittest.main()